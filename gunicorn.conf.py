@@ -0,0 +1,43 @@
+"""
+Gunicorn configuration for restaurante_abba.
+
+Workers share Prometheus metrics through PROMETHEUS_MULTIPROC_DIR, which
+is cleared on startup. The master seeds the open-order gauges from the
+database once, and dead workers are marked so their live gauges drop out.
+
+    PROMETHEUS_MULTIPROC_DIR=/tmp/abba-metrics gunicorn restaurante_abba.wsgi
+"""
+
+import os
+import shutil
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+
+
+def on_starting(server):
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def when_ready(server):
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'restaurante_abba.settings')
+    import django
+    django.setup()
+
+    from django.db import connections
+    from restaurant import metrics
+
+    metrics.seed_open_orders()
+    # Do not hand the master's connection to forked workers
+    connections.close_all()
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -2,16 +2,73 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.shortcuts import render
 from django.utils import timezone
-from .models import MenuItem, Table, Order, OrderItem, UserProfile, RegistrationPIN, AuditLog
+from .models import Branch, MenuCategory, MenuItem, Table, Order, OrderItem, UserProfile, RegistrationPIN, AuditLog, ArchivedOrder, ArchivedOrderItem, PrintJob, Ingredient, RecipeIngredient, TableSession, OrderEvent, EventCursor, DayClose
+from . import audit, board, menu_search
+from .inventory import disable_exhausted
+from .routers import replica_reads
+
+@admin.register(Branch)
+class BranchAdmin(admin.ModelAdmin):
+    list_display = ('name', 'code')
+    search_fields = ('name', 'code')
+    prepopulated_fields = {'code': ('name',)}
+
+    class Media:
+        css = {
+            'all': ('restaurant/css/admin_custom.css',)
+        }
+
+class RecipeIngredientInline(admin.TabularInline):
+    model = RecipeIngredient
+    extra = 1
+    autocomplete_fields = ('ingredient',)
+
+@admin.register(MenuCategory)
+class MenuCategoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'branch', 'position')
+    list_editable = ('position',)
+    list_filter = ('branch',)
+    search_fields = ('name',)
+
+    class Media:
+        css = {
+            'all': ('restaurant/css/admin_custom.css',)
+        }
 
 @admin.register(MenuItem)
 class MenuItemAdmin(admin.ModelAdmin):
-    list_display = ('name', 'price', 'available')
-    list_filter = ('available',)
+    list_display = ('name', 'branch', 'category', 'position', 'price', 'available', 'station')
+    list_filter = ('branch', 'category', 'available', 'station')
+    list_select_related = ('branch', 'category')
+    search_fields = ('name',)
+    inlines = [RecipeIngredientInline]
+
+    def get_search_results(self, request, queryset, search_term):
+        # The waiter search and its index instead of name__icontains
+        if not search_term:
+            return queryset, False
+        return queryset.filter(id__in=menu_search.match_ids(queryset, search_term)), False
+
+    class Media:
+        css = {
+            'all': ('restaurant/css/admin_custom.css',)
+        }
+
+@admin.register(Ingredient)
+class IngredientAdmin(admin.ModelAdmin):
+    list_display = ('name', 'branch', 'stock', 'unit')
+    list_editable = ('stock',)
+    list_filter = ('branch',)
     search_fields = ('name',)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Lowering the stock by hand can also leave dishes without ingredients
+        disable_exhausted([obj.id])
+
     class Media:
         css = {
             'all': ('restaurant/css/admin_custom.css',)
@@ -19,7 +76,8 @@ class MenuItemAdmin(admin.ModelAdmin):
 
 @admin.register(Table)
 class TableAdmin(admin.ModelAdmin):
-    list_display = ('number', 'capacity')
+    list_display = ('number', 'branch', 'capacity', 'is_available', 'occupied_since')
+    list_filter = ('branch',)
     search_fields = ('number',)
 
     class Media:
@@ -29,7 +87,7 @@ class TableAdmin(admin.ModelAdmin):
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
-    fields = ('menu_item', 'quantity', 'get_item_price', 'get_total_price')
+    fields = ('menu_item', 'quantity', 'round', 'get_item_price', 'get_total_price')
     readonly_fields = ('get_item_price', 'get_total_price')
     extra = 1
 
@@ -41,11 +99,23 @@ class OrderItemInline(admin.TabularInline):
         return f"${obj.quantity * obj.menu_item.price}"
     get_total_price.short_description = 'Precio Total'
 
+@admin.register(TableSession)
+class TableSessionAdmin(admin.ModelAdmin):
+    list_display = ('table', 'branch', 'capacity', 'started_at', 'ended_at')
+    list_filter = ('branch', 'capacity')
+    date_hierarchy = 'ended_at'
+    list_select_related = ('table',)
+
+    class Media:
+        css = {
+            'all': ('restaurant/css/admin_custom.css',)
+        }
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     inlines = [OrderItemInline]
-    list_display = ('id', 'table', 'waiter', 'status', 'created_at', 'get_total_cost')
-    list_filter = ('status', 'table', 'created_at')
+    list_display = ('id', 'branch', 'table', 'waiter', 'status', 'created_at', 'get_total_cost')
+    list_filter = ('branch', 'status', 'table', 'created_at')
     search_fields = ('id', 'table__number', 'waiter__username')
     ordering = ('-created_at',)
 
@@ -54,11 +124,117 @@ class OrderAdmin(admin.ModelAdmin):
         return f"${total}"
     get_total_cost.short_description = 'Total del Pedido'
 
+    # Admin edits bypass the order event log the reception board follows
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        transaction.on_commit(board.invalidate)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(board.invalidate)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(board.invalidate)
+
+    class Media:
+        css = {
+            'all': ('restaurant/css/admin_custom.css',)
+        }
+
+class ArchivedOrderItemInline(admin.TabularInline):
+    model = ArchivedOrderItem
+    fields = ('menu_item', 'quantity', 'round', 'unit_price', 'notes')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    """Read-only view of orders moved out of the hot table by archive_orders."""
+    inlines = [ArchivedOrderItemInline]
+    list_display = ('id', 'branch', 'table', 'waiter', 'status', 'created_at', 'get_total_cost')
+    list_filter = ('branch', 'created_at')
+    list_select_related = ('branch', 'table', 'waiter')
+    search_fields = ('id', 'table__number', 'waiter__username')
+    ordering = ('-created_at',)
+    date_hierarchy = 'created_at'
+    readonly_fields = ('id', 'branch', 'table', 'waiter', 'created_at', 'status', 'notes', 'total', 'archived_at')
+
+    def get_total_cost(self, obj):
+        return f"${obj.total}"
+    get_total_cost.short_description = 'Total del Pedido'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    class Media:
+        css = {
+            'all': ('restaurant/css/admin_custom.css',)
+        }
+
+@admin.register(PrintJob)
+class PrintJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'order', 'station', 'status', 'attempts', 'created_at', 'printed_at')
+    list_filter = ('status', 'station')
+    search_fields = ('order__id', 'dedupe_key')
+    readonly_fields = ('order', 'dedupe_key', 'created_at', 'printed_at', 'last_error')
+    list_select_related = ('order__table',)
+    actions = ['retry']
+
+    @admin.action(description='Reintentar impresión')
+    def retry(self, request, queryset):
+        queryset.update(status='pending', attempts=0, next_attempt_at=timezone.now())
+
+    class Media:
+        css = {
+            'all': ('restaurant/css/admin_custom.css',)
+        }
+
+@admin.register(OrderEvent)
+class OrderEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'branch', 'order_id', 'table_id', 'created_at')
+    list_filter = ('kind', 'branch')
+    search_fields = ('order_id',)
+
+    # The log is append-only
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
     class Media:
         css = {
             'all': ('restaurant/css/admin_custom.css',)
         }
 
+@admin.register(DayClose)
+class DayCloseAdmin(admin.ModelAdmin):
+    list_display = ('day', 'branch', 'orders', 'total', 'closed_at', 'closed_by')
+    list_filter = ('branch',)
+    date_hierarchy = 'day'
+    list_select_related = ('branch', 'closed_by')
+
+    # Snapshots are written once by the day close
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    class Media:
+        css = {
+            'all': ('restaurant/css/admin_custom.css',)
+        }
+
+@admin.register(EventCursor)
+class EventCursorAdmin(admin.ModelAdmin):
+    list_display = ('name', 'position', 'updated_at')
+
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = (
@@ -86,6 +262,19 @@ class OrderItemAdmin(admin.ModelAdmin):
     get_fecha_del_pedido.short_description = 'Fecha del Pedido'
     get_fecha_del_pedido.admin_order_field = 'order__created_at'
 
+    # Item edits change order totals without an event, as in OrderAdmin
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        transaction.on_commit(board.invalidate)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(board.invalidate)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(board.invalidate)
+
     class Media:
         css = {
             'all': ('restaurant/css/admin_custom.css',)
@@ -93,8 +282,8 @@ class OrderItemAdmin(admin.ModelAdmin):
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
-    list_display = ('user', 'role', 'pin')
-    list_filter = ('role',)
+    list_display = ('user', 'role', 'branch', 'pin')
+    list_filter = ('role', 'branch')
     search_fields = ('user__username',)
 
     class Media:
@@ -104,8 +293,8 @@ class UserProfileAdmin(admin.ModelAdmin):
 
 @admin.register(RegistrationPIN)
 class RegistrationPINAdmin(admin.ModelAdmin):
-    list_display = ('pin', 'role', 'created_by', 'uses', 'created_at')
-    list_filter = ('role', 'uses')
+    list_display = ('pin', 'role', 'branch', 'created_by', 'uses', 'created_at')
+    list_filter = ('role', 'branch', 'uses')
     search_fields = ('pin', 'created_by__username')
 
     class Media:
@@ -136,9 +325,16 @@ admin.site.register(User, UserAdmin)
 
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
-    list_display = ('user', 'action', 'timestamp')
-    search_fields = ('user__username', 'action')
-    list_filter = ('timestamp',)
+    list_display = ('user', 'action', 'event', 'entity_type', 'entity_id', 'timestamp')
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'action', 'details')
+    list_filter = ('event', 'entity_type', 'timestamp')
+
+    def get_search_results(self, request, queryset, search_term):
+        # "pedido 42" and the full-text index instead of icontains over every row
+        if not search_term:
+            return queryset, False
+        return audit.find(queryset, search_term) | queryset.filter(user__username=search_term.strip()), False
 
     class Media:
         css = {
@@ -150,10 +346,11 @@ original_index = admin.site.index
 
 def custom_index(request, extra_context=None):
     today = timezone.now().date()
-    user_count = User.objects.count()
-    menu_count = MenuItem.objects.count()
-    order_count = Order.objects.filter(created_at__date=today).count()
-    table_count = Table.objects.count()
+    with replica_reads():
+        user_count = User.objects.count()
+        menu_count = MenuItem.objects.count()
+        order_count = Order.objects.filter(created_at__date=today).count()
+        table_count = Table.objects.count()
 
     extra_context = extra_context or {}
     extra_context.update({
@@ -0,0 +1,293 @@
+"""
+Historical sales analytics over order history.
+
+Order and OrderItem history is loaded once into columnar NumPy arrays and
+then refreshed incrementally from the last processed order and item ids,
+so each report is a handful of vectorised ``bincount`` calls instead of
+ORM loops. Items are followed by their own id because amendments add
+rounds and voids to orders already in the snapshot.
+
+Timestamps are stored as local wall-clock seconds since 1970-01-01, which
+makes hour-of-week and per-day bucketing plain integer arithmetic.
+"""
+
+import threading
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, MenuItem, Order, OrderItem, Table
+
+# Orders younger than this are not ingested yet, so that an order is never
+# snapshotted before all of its items have been written.
+SETTLE_SECONDS = 60
+
+CHUNK_SIZE = 5000
+
+SECONDS_PER_DAY = 86400
+EPOCH = datetime(1970, 1, 1)
+# 1970-01-01 was a Thursday; with Monday as 0 that is weekday 3.
+EPOCH_WEEKDAY = 3
+
+WEEKDAYS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+def _local_seconds(utc_seconds):
+    """
+    Convert UTC epoch seconds to local wall-clock seconds since the epoch.
+
+    UTC offsets only change on hour boundaries, so the offset is looked up
+    once per distinct hour instead of once per order.
+    """
+    hours, inverse = np.unique(utc_seconds // 3600, return_inverse=True)
+    offsets = np.array([
+        timezone.localtime(datetime.fromtimestamp(int(hour) * 3600, tz=dt_timezone.utc)).utcoffset().total_seconds()
+        for hour in hours
+    ], dtype=np.int64)
+    return utc_seconds + offsets[inverse]
+
+
+def _date_seconds(value):
+    return (value - EPOCH.date()).days * SECONDS_PER_DAY
+
+
+class OrderHistory:
+    """
+    Columnar, incrementally refreshed snapshot of order history.
+
+    Order-level arrays are indexed by position; item-level arrays point
+    back to their order through ``item_order_idx``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.last_order_id = 0
+        self.last_item_id = 0
+        self.order_id = np.empty(0, dtype=np.int64)
+        self.order_time = np.empty(0, dtype=np.int64)
+        self.order_table = np.empty(0, dtype=np.int64)
+        self.order_waiter = np.empty(0, dtype=np.int64)
+        self.item_order_idx = np.empty(0, dtype=np.int64)
+        self.item_menu_item = np.empty(0, dtype=np.int64)
+        self.item_quantity = np.empty(0, dtype=np.int64)
+        self.item_revenue = np.empty(0, dtype=np.float64)
+
+    def refresh(self):
+        """Append orders created since the last refresh, and items added since then to any order."""
+        cutoff = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+        candidates = [
+            queryset.filter(created_at__lte=cutoff, id__gt=self.last_order_id)
+                    .order_by('-id').values_list('id', flat=True).first()
+            for queryset in (Order.objects, ArchivedOrder.objects)
+        ]
+        upper = max((candidate for candidate in candidates if candidate is not None), default=self.last_order_id)
+        # Items of orders not in the snapshot yet wait for their order, and
+        # so does every item after them
+        pending = OrderItem.objects.filter(order_id__gt=upper).aggregate(first=Min('id'))['first']
+        if pending is not None:
+            item_upper = pending - 1
+        else:
+            item_upper = max((
+                queryset.order_by('-id').values_list('id', flat=True).first() or 0
+                for queryset in (OrderItem.objects, ArchivedOrderItem.objects)
+            ))
+        with self._lock:
+            if upper <= self.last_order_id and item_upper <= self.last_item_id:
+                return
+            upper = max(upper, self.last_order_id)
+            item_upper = max(item_upper, self.last_item_id)
+            self._load(self.last_order_id, upper, self.last_item_id, item_upper)
+            self.last_order_id = upper
+            self.last_item_id = item_upper
+
+    def _load(self, lower, upper, item_lower, item_upper):
+        # Archived orders and items keep their original ids, so both tables
+        # are read over the same id ranges and merged.
+        order_sources = [
+            ArchivedOrder.objects.filter(id__gt=lower, id__lte=upper),
+            Order.objects.filter(id__gt=lower, id__lte=upper),
+        ]
+        ids, times, tables, waiters = [], [], [], []
+        for queryset in order_sources:
+            rows = queryset.values_list('id', 'created_at', 'table_id', 'waiter_id')
+            for order_id, created_at, table_id, waiter_id in rows.iterator(chunk_size=CHUNK_SIZE):
+                ids.append(order_id)
+                times.append(created_at.timestamp())
+                tables.append(table_id)
+                waiters.append(waiter_id)
+
+        item_sources = [
+            ArchivedOrderItem.objects.filter(id__gt=item_lower, id__lte=item_upper)
+                                     .values_list('order_id', 'menu_item_id', 'quantity', 'unit_price'),
+            OrderItem.objects.filter(id__gt=item_lower, id__lte=item_upper)
+                             .values_list('order_id', 'menu_item_id', 'quantity', 'menu_item__price'),
+        ]
+        item_orders, menu_items, quantities, prices = [], [], [], []
+        for rows in item_sources:
+            for order_id, menu_item_id, quantity, price in rows.iterator(chunk_size=CHUNK_SIZE):
+                item_orders.append(order_id)
+                menu_items.append(menu_item_id)
+                quantities.append(quantity)
+                prices.append(float(price))
+
+        order_by_id = np.argsort(np.asarray(ids, dtype=np.int64), kind='stable')
+        ids = np.asarray(ids, dtype=np.int64)[order_by_id]
+        times = np.asarray(times, dtype=np.int64)[order_by_id]
+        tables = np.asarray(tables, dtype=np.int64)[order_by_id]
+        waiters = np.asarray(waiters, dtype=np.int64)[order_by_id]
+
+        self.order_id = np.concatenate([self.order_id, ids])
+        self.order_time = np.concatenate([self.order_time, _local_seconds(times)])
+        self.order_table = np.concatenate([self.order_table, tables])
+        self.order_waiter = np.concatenate([self.order_waiter, waiters])
+
+        # Order ids are appended in increasing order, so positions can be
+        # found with a binary search. Items of orders that are not in the
+        # snapshot (deleted since) are dropped.
+        item_orders = np.asarray(item_orders, dtype=np.int64)
+        item_idx = np.searchsorted(self.order_id, item_orders)
+        known = item_idx < len(self.order_id)
+        known[known] = self.order_id[item_idx[known]] == item_orders[known]
+        quantities = np.asarray(quantities, dtype=np.int64)[known]
+
+        self.item_order_idx = np.concatenate([self.item_order_idx, item_idx[known]])
+        self.item_menu_item = np.concatenate([self.item_menu_item, np.asarray(menu_items, dtype=np.int64)[known]])
+        self.item_quantity = np.concatenate([self.item_quantity, quantities])
+        self.item_revenue = np.concatenate([
+            self.item_revenue, quantities * np.asarray(prices, dtype=np.float64)[known]
+        ])
+
+    def order_mask(self, start=None, end=None):
+        """Boolean mask over orders created in the inclusive date range."""
+        mask = np.ones(len(self.order_id), dtype=bool)
+        if start is not None:
+            mask &= self.order_time >= _date_seconds(start)
+        if end is not None:
+            mask &= self.order_time < _date_seconds(end) + SECONDS_PER_DAY
+        return mask
+
+
+_history = OrderHistory()
+
+
+def get_history():
+    """Return the process-wide snapshot, refreshed up to the latest settled order."""
+    _history.refresh()
+    return _history
+
+
+def _hour_of_week(seconds):
+    days = seconds // SECONDS_PER_DAY
+    weekday = (days + EPOCH_WEEKDAY) % 7
+    hour = (seconds // 3600) % 24
+    return weekday * 24 + hour
+
+
+def revenue_by_hour_of_week(start=None, end=None):
+    history = get_history()
+    order_mask = history.order_mask(start, end)
+    item_mask = order_mask[history.item_order_idx]
+    item_how = _hour_of_week(history.order_time[history.item_order_idx[item_mask]])
+    revenue = np.bincount(item_how, weights=history.item_revenue[item_mask], minlength=168)
+    orders = np.bincount(_hour_of_week(history.order_time[order_mask]), minlength=168)
+    return [
+        {
+            'weekday': WEEKDAYS[how // 24],
+            'hour': how % 24,
+            'orders': int(orders[how]),
+            'revenue': round(float(revenue[how]), 2),
+        }
+        for how in range(168)
+    ]
+
+
+def _grouped_totals(keys, *columns):
+    """Unique keys and per-key sums of each column."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    sums = [np.bincount(inverse, weights=column, minlength=len(unique)) for column in columns]
+    return unique, sums
+
+
+def dish_popularity(start=None, end=None, limit=20):
+    history = get_history()
+    item_mask = history.order_mask(start, end)[history.item_order_idx]
+    dishes, (quantity, revenue) = _grouped_totals(
+        history.item_menu_item[item_mask],
+        history.item_quantity[item_mask],
+        history.item_revenue[item_mask],
+    )
+    top = np.argsort(-quantity, kind='stable')[:limit]
+    names = dict(MenuItem.objects.filter(id__in=dishes[top].tolist()).values_list('id', 'name'))
+    return [
+        {
+            'menu_item_id': int(dishes[i]),
+            'name': names.get(int(dishes[i]), ''),
+            'quantity': int(quantity[i]),
+            'revenue': round(float(revenue[i]), 2),
+        }
+        for i in top
+    ]
+
+
+def waiter_performance(start=None, end=None):
+    history = get_history()
+    order_mask = history.order_mask(start, end)
+    item_mask = order_mask[history.item_order_idx]
+    waiters, (orders,) = _grouped_totals(history.order_waiter[order_mask], np.ones(order_mask.sum()))
+    item_waiters = history.order_waiter[history.item_order_idx[item_mask]]
+    position = np.searchsorted(waiters, item_waiters)
+    revenue = np.bincount(position, weights=history.item_revenue[item_mask], minlength=len(waiters))
+    items = np.bincount(position, weights=history.item_quantity[item_mask], minlength=len(waiters))
+    names = dict(User.objects.filter(id__in=waiters.tolist()).values_list('id', 'username'))
+    result = [
+        {
+            'waiter_id': int(waiter),
+            'username': names.get(int(waiter), ''),
+            'orders': int(orders[i]),
+            'items': int(items[i]),
+            'revenue': round(float(revenue[i]), 2),
+            'average_ticket': round(float(revenue[i] / orders[i]), 2),
+        }
+        for i, waiter in enumerate(waiters)
+    ]
+    return sorted(result, key=lambda row: row['revenue'], reverse=True)
+
+
+def table_turnover(start=None, end=None):
+    history = get_history()
+    order_mask = history.order_mask(start, end)
+    order_tables = history.order_table[order_mask]
+    order_days = history.order_time[order_mask] // SECONDS_PER_DAY
+    tables, (orders,) = _grouped_totals(order_tables, np.ones(len(order_tables)))
+    # Turnover is orders per day the table was used at all.
+    table_days = np.unique(order_tables * 100000 + order_days) // 100000
+    days = np.bincount(np.searchsorted(tables, table_days), minlength=len(tables))
+    numbers = dict(Table.objects.filter(id__in=tables.tolist()).values_list('id', 'number'))
+    return [
+        {
+            'table_id': int(table),
+            'number': numbers.get(int(table)),
+            'orders': int(orders[i]),
+            'days_in_use': int(days[i]),
+            'turnover_per_day': round(float(orders[i] / days[i]), 2),
+        }
+        for i, table in enumerate(tables)
+    ]
+
+
+REPORTS = {
+    'revenue-by-hour': revenue_by_hour_of_week,
+    'dishes': dish_popularity,
+    'waiters': waiter_performance,
+    'tables': table_turnover,
+}
+
+
+def parse_date(value):
+    """Parse an optional YYYY-MM-DD query parameter."""
+    if not value:
+        return None
+    return date.fromisoformat(value)
@@ -0,0 +1,41 @@
+"""
+JSON responses for the API endpoints.
+
+``JsonResponse`` is a drop-in replacement for Django's that serialises
+with orjson when it is installed and with the stdlib encoder otherwise.
+Either way the payload is compact UTF-8 (no spaces, no ``\\uXXXX``
+escapes). Compression of the body is left to
+``JsonCompressionMiddleware``.
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Decimal, lazy translations, UUIDs... the same as Django's JsonResponse
+_django_default = DjangoJSONEncoder().default
+
+
+def dumps(data):
+    """Serialise ``data`` to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_django_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+class JsonResponse(HttpResponse):
+    """An HTTP response with a JSON body, using the fastest available encoder."""
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                'In order to allow non-dict objects to be serialized set the safe parameter to False.'
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class RestaurantConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'restaurant'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import metrics
+
+        connection_created.connect(metrics.install_query_counter)
@@ -0,0 +1,136 @@
+"""
+Hot/cold partitioning of delivered orders.
+
+``archive_orders`` moves delivered orders older than
+``ORDER_ARCHIVE_AFTER_DAYS`` (and their items) from ``Order``/``OrderItem``
+into ``ArchivedOrder``/``ArchivedOrderItem``, freezing item prices and the
+order total so sales rollups are preserved. The hot tables then only hold
+recent business.
+
+``orders_for_day`` reads across both, so reports for old days keep working.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+STATUS_DISPLAY = dict(Order._meta.get_field('status').choices)
+
+
+def archive_cutoff(days=None):
+    """Datetime before which delivered orders belong in the archive."""
+    if days is None:
+        days = settings.ORDER_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_orders(before, batch_size=500):
+    """
+    Move delivered orders created before ``before`` into the archive.
+
+    Each batch is copied and deleted in one transaction. Returns the number
+    of archived orders and items.
+    """
+    archived_orders = 0
+    archived_items = 0
+    candidates = Order.objects.filter(status='delivered', created_at__lt=before).order_by('id')
+
+    while True:
+        with transaction.atomic():
+            orders = list(candidates.select_for_update()[:batch_size])
+            if not orders:
+                break
+            order_ids = [order.id for order in orders]
+            items = list(
+                OrderItem.objects.filter(order_id__in=order_ids)
+                                 .values('id', 'order_id', 'menu_item_id', 'quantity', 'notes', 'round', 'menu_item__price')
+            )
+
+            totals = dict.fromkeys(order_ids, 0)
+            for item in items:
+                totals[item['order_id']] += item['quantity'] * item['menu_item__price']
+
+            ArchivedOrder.objects.bulk_create([
+                ArchivedOrder(
+                    id=order.id,
+                    branch_id=order.branch_id,
+                    table_id=order.table_id,
+                    waiter_id=order.waiter_id,
+                    created_at=order.created_at,
+                    status=order.status,
+                    notes=order.notes,
+                    total=totals[order.id],
+                )
+                for order in orders
+            ])
+            ArchivedOrderItem.objects.bulk_create([
+                ArchivedOrderItem(
+                    id=item['id'],
+                    order_id=item['order_id'],
+                    menu_item_id=item['menu_item_id'],
+                    quantity=item['quantity'],
+                    notes=item['notes'],
+                    round=item['round'],
+                    unit_price=item['menu_item__price'],
+                )
+                for item in items
+            ], batch_size=batch_size)
+
+            OrderItem.objects.filter(order_id__in=order_ids).delete()
+            Order.objects.filter(id__in=order_ids).delete()
+
+        archived_orders += len(orders)
+        archived_items += len(items)
+
+    return archived_orders, archived_items
+
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def orders_for_day(day, branch_id=None):
+    """
+    Yield report rows for every order created on ``day``, optionally in one branch.
+
+    Archived orders are always included: ``archive_orders --days`` can
+    archive newer orders than ``ORDER_ARCHIVE_AFTER_DAYS``, and for a day
+    with nothing archived the ``created_at`` index answers with no rows.
+    """
+    start, end = day_bounds(day)
+    archived_orders, hot_orders = ArchivedOrder.objects.all(), Order.objects.all()
+    if branch_id is not None:
+        archived_orders, hot_orders = archived_orders.for_branch(branch_id), hot_orders.for_branch(branch_id)
+
+    archived = archived_orders.filter(created_at__gte=start, created_at__lt=end)\
+                              .order_by('id')\
+                              .values_list('id', 'table__number', 'waiter__username',
+                                           'created_at', 'status', 'total')
+    for row in archived.iterator(chunk_size=500):
+        yield _report_row(*row)
+
+    hot = hot_orders.filter(created_at__gte=start, created_at__lt=end)\
+                       .annotate(total=Sum(F('items__quantity') * F('items__menu_item__price')))\
+                       .order_by('id')\
+                       .values_list('id', 'table__number', 'waiter__username',
+                                    'created_at', 'status', 'total')
+    for row in hot.iterator(chunk_size=500):
+        yield _report_row(*row)
+
+
+def _report_row(order_id, table_number, waiter, created_at, status, total):
+    return {
+        'id': order_id,
+        'table_number': table_number,
+        'waiter': waiter,
+        'created_at': timezone.localtime(created_at),
+        'status': status,
+        'status_display': STATUS_DISPLAY.get(status, status),
+        'total': total or 0,
+    }
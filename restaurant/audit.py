@@ -0,0 +1,135 @@
+"""
+Audit log search.
+
+Every ``AuditLog`` row says what happened twice: in words (``action``,
+``details``) and as an ``event`` on the ``entity_type`` / ``entity_id`` it
+touched. ``find`` answers "everything on order 42 last Friday" from the
+structured columns and their ``(entity_type, entity_id, timestamp)``
+index; the remaining words go to the full-text index:
+
+* PostgreSQL: migration 0017 adds a GIN index on the ``tsvector`` of
+  ``action || ' ' || details``; ``_PG_MATCH`` repeats that expression so
+  the planner uses it.
+* SQLite: migration 0017 adds the FTS5 table ``restaurant_auditlog_fts``
+  over the same columns, kept in sync by triggers (``install_fulltext``).
+  Django rebuilds a SQLite table to alter it, which drops its triggers,
+  so a later migration that alters ``AuditLog`` must call
+  ``install_fulltext`` again.
+
+Anywhere else, or on a SQLite built without FTS5, words fall back to
+``icontains``.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from . import archive
+
+FTS_TABLE = 'restaurant_auditlog_fts'
+PG_INDEX = 'auditlog_fulltext_idx'
+
+# "pedido 42", "Pedido #42": what waiters and the kitchen call an order
+_ORDER_REF = re.compile(r'\bpedido\s*#?\s*(\d+)\b', re.IGNORECASE)
+_WORD = re.compile(r'\w+')
+
+_PG_MATCH = (
+    "SELECT id FROM restaurant_auditlog "
+    "WHERE to_tsvector('spanish', action || ' ' || details) @@ plainto_tsquery('spanish', %s)"
+)
+_SQLITE_MATCH = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+
+_SQLITE_FTS = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"action, details, content='restaurant_auditlog', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON restaurant_auditlog BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, action, details) VALUES (new.id, new.action, new.details); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON restaurant_auditlog BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, action, details) "
+    f"VALUES ('delete', old.id, old.action, old.details); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON restaurant_auditlog BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, action, details) "
+    f"VALUES ('delete', old.id, old.action, old.details); "
+    f"INSERT INTO {FTS_TABLE}(rowid, action, details) VALUES (new.id, new.action, new.details); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+# Per database alias: whether its SQLite has the FTS table
+_has_fts = {}
+
+
+def install_fulltext(schema_editor):
+    """Create the full-text index of the audit log for the editor's database, if it can have one."""
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON restaurant_auditlog "
+            f"USING gin (to_tsvector('spanish', action || ' ' || details))"
+        )
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pragma_compile_options WHERE compile_options = 'ENABLE_FTS5'")
+            if cursor.fetchone() is None:
+                return
+        for statement in _SQLITE_FTS:
+            schema_editor.execute(statement)
+    _has_fts.pop(connection.alias, None)
+
+
+def uninstall_fulltext(schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+    elif connection.vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    _has_fts.pop(connection.alias, None)
+
+
+def _sqlite_fts(connection):
+    if connection.alias not in _has_fts:
+        _has_fts[connection.alias] = FTS_TABLE in connection.introspection.table_names()
+    return _has_fts[connection.alias]
+
+
+def matching(queryset, text):
+    """Narrow ``queryset`` to the logs whose action or details have every word of ``text``."""
+    words = _WORD.findall(text)
+    if not words:
+        return queryset
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        return queryset.filter(id__in=RawSQL(_PG_MATCH, [' '.join(words)]))
+    if connection.vendor == 'sqlite' and _sqlite_fts(connection):
+        # Quoted, so words are never read as FTS5 operators (AND, NEAR, ...)
+        return queryset.filter(id__in=RawSQL(_SQLITE_MATCH, [' '.join(f'"{word}"' for word in words)]))
+    for word in words:
+        queryset = queryset.filter(Q(action__icontains=word) | Q(details__icontains=word))
+    return queryset
+
+
+def find(queryset, query='', event=None, entity_type=None, entity_id=None, day=None):
+    """
+    Narrow ``queryset`` of audit logs to a search.
+
+    "pedido 42" in ``query`` stands for ``entity_type='order', entity_id=42``;
+    the rest of it is matched as words.
+    """
+    reference = _ORDER_REF.search(query)
+    if reference and entity_type is None:
+        entity_type, entity_id = 'order', int(reference.group(1))
+        query = _ORDER_REF.sub(' ', query, count=1)
+    if entity_type:
+        queryset = queryset.filter(entity_type=entity_type)
+        if entity_id is not None:
+            queryset = queryset.filter(entity_id=entity_id)
+    if event:
+        queryset = queryset.filter(event=event)
+    if day is not None:
+        start, end = archive.day_bounds(day)
+        queryset = queryset.filter(timestamp__gte=start, timestamp__lt=end)
+    return matching(queryset, query)
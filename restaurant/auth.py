@@ -0,0 +1,49 @@
+"""
+Cache-backed user loading for tablets that poll all service long.
+
+Every authenticated request loads the session, the ``User`` and then its
+``UserProfile``. With ``SESSION_PROFILE`` set to ``cached_db`` or
+``signed_cookies`` (see settings), sessions come from the cache or the
+cookie itself, and ``CachedModelBackend`` loads the user from the cache with
+its profile already attached, so ``request.user.userprofile`` costs no
+query either.
+
+Cached users are dropped whenever the user or its profile is saved or
+deleted (password changes, role and branch changes, deactivation). Like
+the other per-branch caches this needs a shared cache (Redis, Memcached,
+database) once there is more than one worker, or a change made in one
+worker is only seen by the others after ``USER_CACHE_TIMEOUT``.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_KEY = 'restaurant:auth_user:{user_id}'
+USER_CACHE_TIMEOUT = 300
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` whose ``get_user`` reads the user and its profile from the cache."""
+
+    def get_user(self, user_id):
+        key = USER_CACHE_KEY.format(user_id=user_id)
+        user = cache.get(key)
+        if user is None:
+            user = get_user_model()._default_manager.select_related('userprofile').filter(pk=user_id).first()
+            if user is not None:
+                cache.set(key, user, timeout=USER_CACHE_TIMEOUT)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        key = USER_CACHE_KEY.format(user_id=user_id)
+        user = await cache.aget(key)
+        if user is None:
+            user = await get_user_model()._default_manager.select_related('userprofile').filter(pk=user_id).afirst()
+            if user is not None:
+                await cache.aset(key, user, timeout=USER_CACHE_TIMEOUT)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+def invalidate_user(user_id):
+    cache.delete(USER_CACHE_KEY.format(user_id=user_id))
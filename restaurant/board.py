@@ -0,0 +1,209 @@
+"""
+Live reception board: the day's orders and sales, by status and by waiter.
+
+Instead of re-summing every order of the day on each load, the board is
+folded from the order event log (see ``events``). The cache holds a
+snapshot per branch and day with the id of the last event it includes.
+Each read applies the events that arrived since, fetched with one
+indexed query, so the totals move order by order. Only settled events go
+into the stored snapshot; newer ones are applied for the current reader
+alone.
+
+A missing snapshot is built from ``archive.orders_for_day``, the rows
+``download_daily_report`` sums, so both always agree, and the
+``reconcile_reception`` command checks it. Changes that bypass the event
+log call ``invalidate`` to rebuild every board from the database: menu
+price changes, orders edited or deleted in the admin, and seeding.
+Amendments log the order's new total, so a table's bill grows (or
+shrinks, for voids) on the order it already has.
+
+Long-polls (``await_change``) wait on the kitchen queue's wakeup: every
+order event is logged together with a kitchen version bump, so the board
+reads the event log only once the version or the generation moves, or
+the wait times out.
+"""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import archive, events, queue_state
+from .models import OrderEvent
+from .queue_state import LONG_POLL_SECONDS
+
+# Versioned so snapshots stored with an older layout are never read back
+BOARD_CACHE_KEY = 'restaurant:reception_board:v2:{generation}:{branch_id}:{day}'
+GENERATION_KEY = 'restaurant:reception_board_generation'
+# Backstop for changes that neither log an event nor invalidate
+BOARD_TIMEOUT = 900
+# Prices have two decimals; SQLite sums them as floats
+CENTS = Decimal('0.01')
+
+
+def get_generation():
+    return cache.get_or_set(GENERATION_KEY, 0, timeout=None)
+
+
+async def aget_generation():
+    return await cache.aget_or_set(GENERATION_KEY, 0, timeout=None)
+
+
+def invalidate():
+    """Start every board over from the database on its next read."""
+    try:
+        generation = cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    queue_state.wake_all()
+    return generation
+
+
+def get_board(branch_id, day=None):
+    """
+    The board of ``branch_id`` for ``day`` (today by default).
+
+    A dict with the last applied event id (``seq``), ``orders`` as
+    ``{order id: (status, waiter, total, table number, HH:MM)}`` and the
+    running ``totals``, ``by_status``, ``by_waiter`` and ``by_table`` as
+    ``{'orders': count, 'total': Decimal}``.
+    """
+    day = day or timezone.localdate()
+    key = BOARD_CACHE_KEY.format(generation=get_generation(), branch_id=branch_id, day=day)
+    board = cache.get(key)
+    changed = board is None
+    if board is None:
+        board = build(branch_id, day)
+
+    settle_time = events.settle_time()
+    pending = []
+    after = board['seq']
+    while True:
+        batch = events.read(after=after, branch_id=branch_id, settled=False)
+        for event in batch:
+            if not pending and event['created_at'] <= settle_time:
+                apply(board, event, day)
+                changed = True
+            else:
+                pending.append(event)
+        if len(batch) < events.READ_LIMIT:
+            break
+        after = batch[-1]['seq']
+
+    if changed:
+        cache.set(key, board, timeout=BOARD_TIMEOUT)
+    # Unsettled events may still be joined by lower ids; show them, don't store them
+    for event in pending:
+        apply(board, event, day)
+    return board
+
+
+def build(branch_id, day):
+    """A board from the database, as of the last settled event."""
+    seq = OrderEvent.objects.filter(branch_id=branch_id, created_at__lte=events.settle_time())\
+                            .order_by('-id')\
+                            .values_list('id', flat=True)\
+                            .first()
+    board = {
+        'seq': seq or 0,
+        'orders': {},
+        'totals': _bucket(),
+        'by_status': {},
+        'by_waiter': {},
+        'by_table': {},
+    }
+    for row in archive.orders_for_day(day, branch_id):
+        _set_order(board, row['id'], (
+            row['status'], row['waiter'], Decimal(row['total']).quantize(CENTS),
+            row['table_number'], row['created_at'].strftime('%H:%M'),
+        ))
+    return board
+
+
+def apply(board, event, day):
+    """Fold one event into ``board``. Replaying events the board already has is harmless."""
+    order = board['orders'].get(event['order_id'])
+    if event['kind'] == 'order_created':
+        created_at = timezone.localtime(event['created_at'])
+        # Already there if the board was built after the order committed
+        if order is None and created_at.date() == day:
+            data = event['data']
+            _set_order(board, event['order_id'], (
+                'not_taken', data['waiter'], Decimal(data['total']).quantize(CENTS),
+                data['table_number'], created_at.strftime('%H:%M'),
+            ))
+    elif event['kind'] == 'order_amended' and order is not None:
+        data = event['data']
+        total = Decimal(data['order_total']).quantize(CENTS)
+        _set_order(board, event['order_id'], (data['status'], order[1], total) + order[3:])
+    elif event['kind'] == 'order_status_changed' and order is not None:
+        _set_order(board, event['order_id'], (event['data']['status'],) + order[1:])
+    board['seq'] = max(board['seq'], event['seq'])
+
+
+def _bucket():
+    return {'orders': 0, 'total': Decimal(0)}
+
+
+def _set_order(board, order_id, row):
+    previous = board['orders'].get(order_id)
+    if previous is not None:
+        _count(board, previous, -1)
+    board['orders'][order_id] = row
+    _count(board, row, 1)
+
+
+def _count(board, row, sign):
+    status, waiter, total, table_number = row[:4]
+    groups = ((board['by_status'], status), (board['by_waiter'], waiter), (board['by_table'], table_number))
+    for group, name in groups:
+        bucket = group.setdefault(name, _bucket())
+        bucket['orders'] += sign
+        bucket['total'] += sign * total
+        if not bucket['orders']:
+            del group[name]
+    board['totals']['orders'] += sign
+    board['totals']['total'] += sign * total
+
+
+def summary(board):
+    """The board as the reception page shows it, oldest order first."""
+    return {
+        'seq': board['seq'],
+        'orders': board['totals']['orders'],
+        'total': board['totals']['total'],
+        'by_status': [
+            {'status': status, 'status_display': label, **board['by_status'][status]}
+            for status, label in archive.STATUS_DISPLAY.items() if status in board['by_status']
+        ],
+        'by_waiter': sorted(
+            ({'waiter': waiter, **bucket} for waiter, bucket in board['by_waiter'].items()),
+            key=lambda bucket: (-bucket['total'], bucket['waiter']),
+        ),
+        'by_table': [
+            {'table_number': table_number, **board['by_table'][table_number]}
+            for table_number in sorted(board['by_table'])
+        ],
+        'order_list': [
+            {
+                'id': order_id, 'table_number': table_number, 'waiter': waiter, 'time': time,
+                'status': status, 'status_display': archive.STATUS_DISPLAY.get(status, status), 'total': total,
+            }
+            for order_id, (status, waiter, total, table_number, time) in sorted(board['orders'].items())
+        ],
+    }
+
+
+async def await_change(branch_id, generation, version, timeout=LONG_POLL_SECONDS):
+    """
+    Wait until the boards are invalidated, the branch's kitchen version moves
+    past ``version``, or ``timeout`` passes.
+
+    Reads only the cache while waiting; the caller reads the board again.
+    """
+    async def changed():
+        return (await aget_generation() != generation
+                or await queue_state.aget_kitchen_version(branch_id) != version)
+
+    await queue_state.await_wakeup(branch_id, changed, timeout)
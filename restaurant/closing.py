@@ -0,0 +1,233 @@
+"""
+End-of-day close.
+
+``close_day`` finishes a branch's day in one transaction: every order of
+the day still open is marked delivered in bulk, occupied tables are
+freed with one ``UPDATE`` (their stays are kept as ``TableSession`` rows
+first), both recorded in the event log with one insert each, and a
+``DayClose`` snapshot is written with the day's totals by waiter, dish
+and hour. Once that commits, the Excel report is generated from the same
+rows and saved under ``settings.DAY_CLOSE_DIR``, so downloading a closed
+day later just sends that file instead of aggregating the orders again.
+
+A day is closed once; closing it again raises ``AlreadyClosed``. Tables
+are only freed when closing today, so catching up on a past day never
+empties the current service. Today keeps taking orders after its close:
+``is_stale`` tells when a snapshot misses some, and ``refresh`` recomputes
+it and its report.
+"""
+
+import os
+from collections import Counter, defaultdict
+from decimal import Decimal
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import archive, events, metrics, queue_state, seating
+from .models import ArchivedOrder, ArchivedOrderItem, AuditLog, Branch, DayClose, Order, OrderItem, Table, TableSession
+
+CENTS = Decimal('0.01')
+UPDATE_BATCH = 500
+
+
+class AlreadyClosed(Exception):
+    """The day already has its close."""
+
+    def __init__(self, day):
+        super().__init__(f'El día {day:%d-%m-%Y} ya está cerrado')
+        self.day = day
+
+
+@transaction.atomic
+def close_day(branch_id, day, user=None):
+    """Close ``day`` for ``branch_id`` and return its ``DayClose``."""
+    # Serialises closes of one branch; the unique constraint backs it up
+    branch = Branch.objects.select_for_update().get(id=branch_id)
+    if DayClose.objects.filter(branch=branch, day=day).exists():
+        raise AlreadyClosed(day)
+    now = timezone.now()
+    start, end = archive.day_bounds(day)
+
+    open_orders = Order.objects.for_branch(branch).filter(created_at__lt=end).exclude(status='delivered')
+    closed = list(open_orders.select_for_update().values('id', 'table_id', 'status'))
+    for start_index in range(0, len(closed), UPDATE_BATCH):
+        batch_ids = [order['id'] for order in closed[start_index:start_index + UPDATE_BATCH]]
+        Order.objects.filter(id__in=batch_ids).update(status='delivered', status_changed_at=now)
+    events.record_many('order_status_changed', branch.id, (
+        {'order_id': order['id'], 'table_id': order['table_id'],
+         'status': 'delivered', 'previous_status': order['status']}
+        for order in closed
+    ), created_at=now)
+    finished = Counter(order['status'] for order in closed)
+    if day >= timezone.localdate():
+        _free_tables(branch, now)
+
+    rows = list(archive.orders_for_day(day, branch.id))
+    summary = summarize(rows, dish_totals(day, branch.id))
+    report_file = os.path.join(branch.code, f'reporte_diario_{day}.xlsx')
+    close = DayClose.objects.create(
+        branch=branch, day=day, closed_at=now, closed_by=user,
+        orders=summary['orders'], total=summary['total'], summary=summary, report_file=report_file,
+    )
+
+    if user is not None:
+        AuditLog.objects.create(
+            user=user,
+            action='Cerrar día',
+            details=f'Día {day:%d-%m-%Y}: {summary["orders"]} pedidos, ${summary["total"]}',
+            event='day_closed', entity_type='day_close', entity_id=close.id,
+        )
+    queue_state.bump_kitchen_version(branch.id)
+    # Freeing tables with one update bypasses seating's in-place index updates
+    transaction.on_commit(partial(seating.bump_version, branch.id))
+    transaction.on_commit(partial(metrics.orders_closed, finished))
+    # Built from the rows read above, but only once the close has committed:
+    # no branch lock is held while openpyxl works, and no file is left for a
+    # close that rolled back. Without the file, downloads compute the report.
+    transaction.on_commit(partial(write_report, rows, summary, report_path(report_file)), robust=True)
+    return close
+
+
+def is_stale(close):
+    """Whether orders were taken on the day of ``close`` after its snapshot."""
+    _, end = archive.day_bounds(close.day)
+    as_of = close.refreshed_at or close.closed_at
+    return any(
+        model.objects.for_branch(close.branch_id).filter(created_at__gt=as_of, created_at__lt=end).exists()
+        for model in (Order, ArchivedOrder)
+    )
+
+
+def refresh(close):
+    """Recompute the snapshot and report of ``close`` from the day's orders; return the workbook."""
+    # Taken before reading, so an order arriving meanwhile makes it stale again
+    now = timezone.now()
+    rows = list(archive.orders_for_day(close.day, close.branch_id))
+    summary = summarize(rows, dish_totals(close.day, close.branch_id))
+    close.orders, close.total, close.summary, close.refreshed_at = summary['orders'], summary['total'], summary, now
+    close.save(update_fields=['orders', 'total', 'summary', 'refreshed_at'])
+    wb = build_report(rows, summary)
+    save_report(wb, report_path(close.report_file))
+    return wb
+
+
+def _free_tables(branch, now):
+    occupied = Table.objects.for_branch(branch).filter(is_available=False)
+    stays = list(occupied.values('id', 'number', 'capacity', 'occupied_since'))
+    TableSession.objects.bulk_create([
+        TableSession(branch=branch, table_id=stay['id'], capacity=stay['capacity'],
+                     started_at=stay['occupied_since'], ended_at=now)
+        for stay in stays if stay['occupied_since']
+    ])
+    occupied.update(is_available=True, occupied_since=None)
+    events.record_many('table_freed', branch.id, (
+        {'table_id': stay['id'], 'table_number': stay['number']} for stay in stays
+    ), created_at=now)
+
+
+def dish_totals(day, branch_id):
+    """``{dish name: (quantity, total)}`` for the orders of ``day``, archived ones included."""
+    start, end = archive.day_bounds(day)
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    hot = OrderItem.objects.filter(order__branch_id=branch_id, order__created_at__gte=start, order__created_at__lt=end)\
+                           .values_list('menu_item__name')\
+                           .annotate(portions=Sum('quantity'), amount=Sum(F('quantity') * F('menu_item__price')))
+    archived = ArchivedOrderItem.objects.filter(order__branch_id=branch_id,
+                                                order__created_at__gte=start, order__created_at__lt=end)\
+                                        .values_list('menu_item__name')\
+                                        .annotate(portions=Sum('quantity'), amount=Sum(F('quantity') * F('unit_price')))
+    for rows in (hot, archived):
+        for name, quantity, total in rows:
+            totals[name][0] += quantity
+            totals[name][1] += Decimal(total or 0)
+    return {name: tuple(values) for name, values in totals.items()}
+
+
+def summarize(rows, dishes):
+    """The snapshot of a day from its report rows and ``dish_totals``, with amounts as strings."""
+    total = Decimal(0)
+    by_waiter = defaultdict(lambda: [0, Decimal(0)])
+    by_hour = defaultdict(lambda: [0, Decimal(0)])
+    for row in rows:
+        amount = Decimal(row['total'])
+        total += amount
+        for bucket in (by_waiter[row['waiter']], by_hour[row['created_at'].hour]):
+            bucket[0] += 1
+            bucket[1] += amount
+    return {
+        'orders': len(rows),
+        'total': _money(total),
+        'by_waiter': [
+            {'waiter': waiter, 'orders': orders, 'total': _money(amount)}
+            for waiter, (orders, amount) in sorted(by_waiter.items(), key=lambda item: (-item[1][1], item[0]))
+        ],
+        'by_dish': [
+            {'dish': name, 'quantity': quantity, 'total': _money(amount)}
+            for name, (quantity, amount) in sorted(dishes.items(), key=lambda item: (-item[1][0], item[0]))
+        ],
+        'by_hour': [
+            {'hour': hour, 'orders': orders, 'total': _money(amount)}
+            for hour, (orders, amount) in sorted(by_hour.items())
+        ],
+    }
+
+
+def _money(amount):
+    # SQLite sums prices as floats
+    return str(Decimal(amount).quantize(CENTS))
+
+
+def build_report(rows, summary=None):
+    """
+    The daily Excel report for ``rows`` from ``archive.orders_for_day``.
+
+    With a close ``summary`` the workbook also gets a sheet per breakdown.
+    """
+    # openpyxl takes longer to import than the rest of the app; only pay for it here
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Reporte Diario"
+    ws.append(['ID Pedido', 'Mesa', 'Garzón', 'Hora', 'Estado', 'Total'])
+    total_general = 0
+    for order in rows:
+        total_general += order['total']
+        ws.append([
+            order['id'], order['table_number'], order['waiter'], order['created_at'].strftime('%H:%M'),
+            order['status_display'], float(order['total']),
+        ])
+    ws.append([None, None, None, None, 'Total General', float(total_general)])
+
+    if summary is not None:
+        sheets = (
+            ('Por Garzón', ['Garzón', 'Pedidos', 'Total'], 'by_waiter', ('waiter', 'orders', 'total')),
+            ('Por Plato', ['Plato', 'Cantidad', 'Total'], 'by_dish', ('dish', 'quantity', 'total')),
+            ('Por Hora', ['Hora', 'Pedidos', 'Total'], 'by_hour', ('hour', 'orders', 'total')),
+        )
+        for title, headers, key, fields in sheets:
+            sheet = wb.create_sheet(title)
+            sheet.append(headers)
+            for bucket in summary[key]:
+                sheet.append([bucket[fields[0]], bucket[fields[1]], float(bucket[fields[2]])])
+    return wb
+
+
+def report_path(report_file):
+    return os.path.join(settings.DAY_CLOSE_DIR, report_file)
+
+
+def write_report(rows, summary, path):
+    save_report(build_report(rows, summary), path)
+
+
+def save_report(wb, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written aside and renamed, so a download never sees half a file
+    partial_path = f'{path}.tmp'
+    wb.save(partial_path)
+    os.replace(partial_path, path)
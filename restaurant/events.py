@@ -0,0 +1,153 @@
+"""
+Order event log (transactional outbox).
+
+Order and table changes append an ``OrderEvent`` in the same transaction
+as the change itself (``record``), so an event exists exactly when the
+change committed. The event id is the log's sequence: consumers keep the
+last id they processed and ask for what came after it (``read``), instead
+of re-querying ``Order``.
+
+The ``event_relay`` management command delivers events in batches to the
+sinks configured in ``settings.EVENT_SINKS``, keeping one ``EventCursor``
+per sink so each sink gets every event at least once, in order:
+
+- ``file:///path/to/events.jsonl`` appends one JSON object per line
+- ``http://host/path`` / ``https://...`` POSTs ``{"events": [...]}`` as JSON
+- ``bus://channel`` calls the handlers ``subscribe``\\d to that channel in
+  the relay process
+
+Ids are handed out at insert time, so on PostgreSQL a transaction can
+commit an id lower than one already visible. Events are only read once
+they are ``SETTLE_SECONDS`` old, which is far longer than any order
+transaction takes.
+"""
+
+import json
+import urllib.request
+from collections import defaultdict
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import EventCursor, OrderEvent
+
+SETTLE_SECONDS = 2
+READ_LIMIT = 500
+WEBHOOK_TIMEOUT = 5
+
+_subscribers = defaultdict(list)
+
+
+def record(kind, branch_id, order_id=None, table_id=None, created_at=None, **data):
+    """
+    Append an event. Must be called inside the transaction making the change.
+
+    ``created_at`` defaults to now; pass the change's own timestamp when
+    consumers compare the two (an order created at 23:59:59.9 belongs to
+    that day).
+    """
+    return OrderEvent.objects.create(
+        kind=kind, branch_id=branch_id, order_id=order_id, table_id=table_id, data=data,
+        created_at=created_at or timezone.now(),
+    )
+
+
+def record_many(kind, branch_id, changes, created_at=None):
+    """
+    Append one event per change with a single insert, inside the transaction
+    making the changes. Each change is a dict of ``order_id``, ``table_id``
+    and the event data.
+    """
+    created_at = created_at or timezone.now()
+    OrderEvent.objects.bulk_create([
+        OrderEvent(
+            kind=kind, branch_id=branch_id, order_id=change.pop('order_id', None),
+            table_id=change.pop('table_id', None), data=change, created_at=created_at,
+        )
+        for change in map(dict, changes)
+    ], batch_size=500)
+
+
+def read(after=0, branch_id=None, limit=READ_LIMIT, settled=True):
+    """
+    Events with an id greater than ``after``, oldest first, as dicts.
+
+    Only settled events are returned unless ``settled`` is false; a cursor
+    must only be advanced over settled ones.
+    """
+    events = OrderEvent.objects.filter(id__gt=after)
+    if settled:
+        events = events.filter(created_at__lte=settle_time())
+    if branch_id is not None:
+        events = events.filter(branch_id=branch_id)
+    return [
+        {
+            'seq': event['id'],
+            'kind': event['kind'],
+            'branch_id': event['branch_id'],
+            'order_id': event['order_id'],
+            'table_id': event['table_id'],
+            'created_at': event['created_at'],
+            'data': event['data'],
+        }
+        for event in events.order_by('id').values(
+            'id', 'kind', 'branch_id', 'order_id', 'table_id', 'created_at', 'data',
+        )[:limit]
+    ]
+
+
+def settle_time():
+    """Events created up to this moment are settled."""
+    return timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+
+
+def subscribe(channel, handler):
+    """Have ``handler(events)`` called with each batch relayed to ``bus://channel``."""
+    _subscribers[channel].append(handler)
+
+
+def send_to_sink(url, events):
+    """Deliver a batch to the sink at ``url``; raises ``OSError`` on failure."""
+    target = urlsplit(url)
+    if target.scheme == 'file':
+        with open(target.path, 'a', encoding='utf-8') as fh:
+            for event in events:
+                fh.write(json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+    elif target.scheme in ('http', 'https'):
+        body = json.dumps({'events': events}, cls=DjangoJSONEncoder).encode('utf-8')
+        request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+        # urllib raises URLError (an OSError) for refused connections and HTTP errors
+        with urllib.request.urlopen(request, timeout=WEBHOOK_TIMEOUT):
+            pass
+    elif target.scheme == 'bus':
+        for handler in _subscribers[target.netloc]:
+            handler(events)
+    else:
+        raise OSError(f'Destino de eventos no soportado: {url}')
+
+
+def relay_batch(batch_size=100):
+    """
+    Deliver the next batch to every sink.
+
+    Returns ``{sink name: delivered count}``; a sink that fails maps to
+    the error message and its cursor stays put, so it is retried next time.
+    """
+    results = {}
+    for name, url in settings.EVENT_SINKS.items():
+        cursor, _ = EventCursor.objects.get_or_create(name=name)
+        events = read(after=cursor.position, limit=batch_size)
+        if not events:
+            results[name] = 0
+            continue
+        try:
+            send_to_sink(url, events)
+        except OSError as exc:
+            results[name] = str(exc)
+            continue
+        EventCursor.objects.filter(name=name).update(position=events[-1]['seq'], updated_at=timezone.now())
+        results[name] = len(events)
+    return results
@@ -0,0 +1,159 @@
+"""
+Prep-quantity forecasting from order history.
+
+Demand for a day is predicted from the same weekday in previous weeks,
+using the columnar snapshot in ``analytics``. For the chosen past days the
+order history is bucketed into two arrays with a single ``bincount`` each:
+
+- orders per (day, hour), and
+- dish portions per (day, service window, dish).
+
+A model then collapses the day axis:
+
+- ``average``: plain seasonal average over the weeks.
+- ``smoothing``: exponential smoothing, i.e. a weighted average where each
+  older week counts ``1 - alpha`` times less than the next one.
+
+Every order is one table visit, so predicted orders stand in for covers.
+Forecasts are cached for the rest of the day they were computed on.
+"""
+
+import math
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import analytics
+from .analytics import SECONDS_PER_DAY, WEEKDAYS
+from .models import MenuItem
+
+# (name, first hour, hour after the last) in local time
+SERVICE_WINDOWS = [
+    ('Desayuno', 6, 12),
+    ('Almuerzo', 12, 17),
+    ('Cena', 17, 24),
+]
+
+DEFAULT_WEEKS = 8
+DEFAULT_ALPHA = 0.3
+METHODS = ('smoothing', 'average')
+
+CACHE_KEY = 'restaurant:forecast:{computed}:{day}:{method}:{weeks}'
+
+# Window index of every hour of the day, -1 outside service
+_HOUR_WINDOW = np.full(24, -1, dtype=np.int64)
+for _index, (_name, _start, _end) in enumerate(SERVICE_WINDOWS):
+    _HOUR_WINDOW[_start:_end] = _index
+
+
+def _past_weekdays(history, day, weeks):
+    """Day numbers of the same weekday over the previous ``weeks`` weeks, oldest first."""
+    target = (day - analytics.EPOCH.date()).days
+    days = target - 7 * np.arange(weeks, 0, -1, dtype=np.int64)
+    if not len(history.order_time):
+        return days[:0]
+    # Weeks before the first recorded order are not known to be zero
+    return days[days >= history.order_time.min() // SECONDS_PER_DAY]
+
+
+def demand_arrays(history, days):
+    """
+    Bucket order history on ``days``.
+
+    Returns ``(hourly, dishes, portions)``: orders per day and hour with
+    shape (days, 24), the dish ids seen, and portions per day, window and
+    dish with shape (days, windows, dishes).
+    """
+    windows = len(SERVICE_WINDOWS)
+    order_day = history.order_time // SECONDS_PER_DAY
+    position = np.searchsorted(days, order_day)
+    on_day = position < len(days)
+    on_day[on_day] = days[position[on_day]] == order_day[on_day]
+    hour = (history.order_time // 3600) % 24
+
+    hourly = np.bincount(
+        position[on_day] * 24 + hour[on_day], minlength=len(days) * 24
+    ).reshape(len(days), 24)
+
+    item_order = history.item_order_idx
+    item_window = _HOUR_WINDOW[hour[item_order]]
+    item_mask = on_day[item_order] & (item_window >= 0)
+    dishes, dish_index = np.unique(history.item_menu_item[item_mask], return_inverse=True)
+    cell = (position[item_order[item_mask]] * windows + item_window[item_mask]) * len(dishes) + dish_index
+    portions = np.bincount(
+        cell, weights=history.item_quantity[item_mask], minlength=len(days) * windows * len(dishes)
+    ).reshape(len(days), windows, len(dishes))
+    return hourly, dishes, portions
+
+
+def fit(series, method=METHODS[0], alpha=DEFAULT_ALPHA):
+    """Collapse the first (week) axis of ``series`` into one expected value per cell."""
+    if not len(series):
+        return np.zeros(series.shape[1:])
+    if method == 'average':
+        return series.mean(axis=0)
+    if method == 'smoothing':
+        # Weight of the newest week is alpha, then alpha * (1 - alpha), ...
+        weights = alpha * (1 - alpha) ** np.arange(len(series))[::-1]
+        return np.tensordot(weights / weights.sum(), series, axes=1)
+    raise ValueError(f'Método desconocido: {method}')
+
+
+def forecast(day, method=METHODS[0], weeks=DEFAULT_WEEKS):
+    """Expected orders per hour and dish portions per service window for ``day``."""
+    key = CACHE_KEY.format(computed=timezone.localdate(), day=day, method=method, weeks=weeks)
+    result = cache.get(key)
+    if result is None:
+        result = _forecast(day, method, weeks)
+        cache.set(key, result, timeout=SECONDS_PER_DAY)
+    return result
+
+
+def _forecast(day, method, weeks):
+    history = analytics.get_history()
+    days = _past_weekdays(history, day, weeks)
+    hourly, dishes, portions = demand_arrays(history, days)
+    expected_hourly = fit(hourly, method)
+    expected_portions = fit(portions, method)
+
+    names = dict(MenuItem.objects.filter(id__in=dishes.tolist()).values_list('id', 'name'))
+    windows = []
+    for index, (name, start, end) in enumerate(SERVICE_WINDOWS):
+        window_portions = expected_portions[index]
+        ranked = np.argsort(-window_portions, kind='stable')
+        windows.append({
+            'name': name,
+            'start': start,
+            'end': end,
+            'orders': round(float(expected_hourly[start:end].sum()), 1),
+            'dishes': [
+                {
+                    'menu_item_id': int(dishes[i]),
+                    'name': names.get(int(dishes[i]), ''),
+                    'expected': round(float(window_portions[i]), 1),
+                    # Prep whole portions, rounding up
+                    'prep': math.ceil(round(float(window_portions[i]), 1)),
+                }
+                for i in ranked if window_portions[i] > 0
+            ],
+        })
+
+    return {
+        'date': day.isoformat(),
+        'weekday': WEEKDAYS[day.weekday()],
+        'method': method,
+        'weeks_used': len(days),
+        'orders': round(float(expected_hourly.sum()), 1),
+        'hours': [
+            {'hour': hour, 'orders': round(float(expected_hourly[hour]), 1)}
+            for hour in range(24) if expected_hourly[hour] > 0
+        ],
+        'windows': windows,
+    }
+
+
+def default_day():
+    """Forecasts are for tomorrow unless a day is given."""
+    return timezone.localdate() + timedelta(days=1)
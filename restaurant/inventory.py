@@ -0,0 +1,108 @@
+"""
+Ingredient stock and the cached waiter menu.
+
+Sending an order consumes the ingredients of its recipes inside the order
+transaction. Each ingredient is decremented with a single conditional
+``UPDATE ... SET stock = stock - n WHERE stock >= n``, so concurrent orders
+can never oversell: the database applies them one at a time and an update
+that would go negative matches no row, raising ``OutOfStock`` and rolling
+the whole order back.
+
+Menu items that can no longer be made are flipped to unavailable in the
+same transaction, and the cached menu is dropped once it commits.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+MENU_CACHE_KEY = 'restaurant:menu_sections:{branch_id}'
+
+
+class OutOfStock(Exception):
+    """An order needs more of an ingredient than is left."""
+
+    def __init__(self, ingredient):
+        super().__init__(f'Sin stock de {ingredient.name}')
+        self.ingredient = ingredient
+
+
+def menu_sections(branch_id):
+    """
+    Menu items waiters of a branch can order, by category in display order.
+
+    A list of ``{'id', 'name', 'items'}`` sections, items without a
+    category last under ``id`` 0. Cached until an item or category changes.
+    """
+    from .models import MenuItem
+
+    key = MENU_CACHE_KEY.format(branch_id=branch_id)
+    sections = cache.get(key)
+    if sections is None:
+        products = MenuItem.objects.for_branch(branch_id)\
+                                   .filter(available=True)\
+                                   .order_by(F('category__position').asc(nulls_last=True),
+                                             'category__name', 'position', 'name')\
+                                   .values('id', 'name', 'description', 'price', 'category_id', 'category__name')
+        sections = []
+        for product in products:
+            category_id = product.pop('category_id') or 0
+            name = product.pop('category__name') or 'Otros'
+            if not sections or sections[-1]['id'] != category_id:
+                sections.append({'id': category_id, 'name': name, 'items': []})
+            sections[-1]['items'].append(product)
+        cache.set(key, sections, timeout=None)
+    return sections
+
+
+def invalidate_menu(*branch_ids):
+    cache.delete_many([MENU_CACHE_KEY.format(branch_id=branch_id) for branch_id in branch_ids])
+
+
+def consume_stock(items):
+    """
+    Take the ingredients for ``items`` (``{'id', 'quantity'}`` dicts) out of stock.
+
+    Must run inside the order's transaction.
+    """
+    from .models import Ingredient, RecipeIngredient
+
+    portions = defaultdict(int)
+    for item in items:
+        portions[item['id']] += item['quantity']
+
+    needed = defaultdict(Decimal)
+    recipe = RecipeIngredient.objects.filter(menu_item_id__in=portions)\
+                                     .values_list('menu_item_id', 'ingredient_id', 'quantity')
+    for menu_item_id, ingredient_id, quantity in recipe:
+        needed[ingredient_id] += quantity * portions[menu_item_id]
+    if not needed:
+        return
+
+    # Same lock order in every transaction so concurrent orders cannot deadlock
+    for ingredient_id in sorted(needed):
+        amount = needed[ingredient_id]
+        updated = Ingredient.objects.filter(id=ingredient_id, stock__gte=amount)\
+                                    .update(stock=F('stock') - amount)
+        if not updated:
+            raise OutOfStock(Ingredient.objects.get(id=ingredient_id))
+
+    disable_exhausted(needed)
+
+
+def disable_exhausted(ingredient_ids):
+    """Mark menu items unavailable when one of ``ingredient_ids`` cannot cover a portion."""
+    from .models import MenuItem
+
+    exhausted = MenuItem.objects.filter(
+        available=True,
+        recipe__ingredient_id__in=ingredient_ids,
+        recipe__quantity__gt=F('recipe__ingredient__stock'),
+    )
+    branch_ids = set(exhausted.values_list('branch_id', flat=True))
+    if branch_ids and exhausted.update(available=False):
+        # update() sends no signals, so drop the cached menus ourselves
+        transaction.on_commit(lambda: invalidate_menu(*branch_ids))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from restaurant.archive import archive_cutoff, archive_orders
+from restaurant.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Move delivered orders older than the archive age into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+                            help='Archive delivered orders older than this many days')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many orders would move')
+
+    def handle(self, *args, **options):
+        before = archive_cutoff(options['days'])
+
+        if options['dry_run']:
+            count = Order.objects.filter(status='delivered', created_at__lt=before).count()
+            self.stdout.write(f'{count} pedidos entregados anteriores a {before:%d-%m-%Y} serían archivados')
+            return
+
+        orders, items = archive_orders(before, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archivados {orders} pedidos y {items} ítems anteriores a {before:%d-%m-%Y}'
+        ))
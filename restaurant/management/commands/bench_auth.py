@@ -0,0 +1,106 @@
+import re
+import time
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from restaurant.models import AuditLog, MenuItem, Order, Table
+
+BENCH_TABLE_NUMBER = 9998
+
+PROFILES = {
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+        'THROTTLE_RATES': {},
+    },
+    'cached_db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['restaurant.auth.CachedModelBackend'],
+        'THROTTLE_RATES': {},
+    },
+    'signed_cookies': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.signed_cookies',
+        'AUTHENTICATION_BACKENDS': ['restaurant.auth.CachedModelBackend'],
+        'THROTTLE_RATES': {},
+    },
+}
+
+# Queries are attributed by the first table they touch
+CATEGORIES = {
+    'django_session': 'sesión',
+    'auth_user': 'usuario',
+    'restaurant_userprofile': 'perfil',
+}
+TABLE_RE = re.compile(r'(?:FROM|INTO|UPDATE)\s+"?(\w+)"?', re.IGNORECASE)
+
+
+class Command(BaseCommand):
+    help = 'Compare queries per request of kitchen polling and send_order across session/auth profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Requests per endpoint and profile')
+
+    def handle(self, *args, **options):
+        cook, _ = User.objects.get_or_create(username='bench_cocinero')
+        waiter, _ = User.objects.get_or_create(username='bench_garzon')
+        for user, role in ((cook, 'cocinero'), (waiter, 'garzon')):
+            user.userprofile.role = role
+            user.userprofile.save()
+        branch_id = waiter.userprofile.branch_id
+        table, _ = Table.objects.get_or_create(branch_id=branch_id, number=BENCH_TABLE_NUMBER, defaults={'capacity': 4})
+        menu_item = MenuItem.objects.for_branch(branch_id).filter(available=True, recipe__isnull=True).first()
+        if menu_item is None:
+            menu_item = MenuItem.objects.create(branch_id=branch_id, name='Bench', price=1)
+        first_order_id = Order.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+        endpoints = [
+            ('kitchen_queue_data', cook, 'get', reverse('kitchen_queue_data'), None),
+            ('send_order', waiter, 'post', reverse('send_order', args=[table.id]),
+             {'item_id_0': menu_item.id, 'quantity_0': 1}),
+        ]
+        self.stdout.write(f'{options["requests"]} peticiones por endpoint y perfil; consultas promedio por petición')
+        self.stdout.write(f'{"Endpoint":<20} {"Perfil":<16} {"sesión":>7} {"usuario":>8} {"perfil":>7} '
+                          f'{"vista":>6} {"total":>6} {"ms":>7}')
+        try:
+            for name, user, method, url, data in endpoints:
+                for profile, overrides in PROFILES.items():
+                    with override_settings(**overrides):
+                        counts, elapsed = self.measure(user, method, url, data, options['requests'])
+                    per_request = {key: value / options['requests'] for key, value in counts.items()}
+                    self.stdout.write(
+                        f'{name:<20} {profile:<16} {per_request.get("sesión", 0):7.1f} '
+                        f'{per_request.get("usuario", 0):8.1f} {per_request.get("perfil", 0):7.1f} '
+                        f'{per_request.get("vista", 0):6.1f} {sum(per_request.values()):6.1f} '
+                        f'{elapsed * 1000 / options["requests"]:7.2f}'
+                    )
+        finally:
+            Order.objects.filter(id__gt=first_order_id, waiter=waiter).delete()
+            AuditLog.objects.filter(user__in=[cook, waiter]).delete()
+            table.delete()
+
+    def measure(self, user, method, url, data, requests):
+        # A new client per profile so its middleware picks up the session engine
+        client = Client(HTTP_HOST='127.0.0.1')
+        client.force_login(user)
+        send = getattr(client, method)
+        send(url, data)  # warm the session and user caches
+
+        counts = Counter()
+        elapsed = 0
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = send(url, data)
+                elapsed += time.perf_counter() - start
+            if response.status_code >= 400:
+                raise RuntimeError(f'{url} respondió {response.status_code}')
+            for query in queries.captured_queries:
+                match = TABLE_RE.search(query['sql'])
+                counts[CATEGORIES.get(match.group(1) if match else '', 'vista')] += 1
+        return counts, elapsed
@@ -0,0 +1,75 @@
+import gzip
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from restaurant import api, middleware
+
+DISHES = ['Pizza Margherita', 'Pasta Carbonara', 'Ensalada César', 'Lomo a lo pobre', 'Empanada de pino', 'Pisco sour']
+NOTES = ['', '', '', 'sin cebolla', 'bien cocido', 'para compartir']
+
+
+class Command(BaseCommand):
+    help = 'Compare serialisation time and bytes on the wire for a kitchen queue payload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        now = timezone.localtime()
+        orders = []
+        for i in range(options['orders']):
+            created_at = now - timedelta(minutes=rng.randint(0, 90))
+            orders.append({
+                'id': 1000 + i,
+                'table_number': rng.randint(1, 30),
+                'created_at': created_at,
+                'status': 'not_taken',
+                'status_display': 'Pedido sin tomar',
+                'notes': rng.choice(NOTES),
+                'items': [
+                    {'menu_item_name': rng.choice(DISHES), 'quantity': rng.randint(1, 3), 'notes': rng.choice(NOTES)}
+                    for _ in range(rng.randint(1, 5))
+                ],
+            })
+
+        # Previous layout: a date and a time string per order, stdlib encoder
+        # with default separators
+        def legacy():
+            rows = []
+            for order in orders:
+                row = {key: value for key, value in order.items() if key != 'created_at'}
+                row['created_at_date'] = order['created_at'].strftime('%d/%m/%Y')
+                row['created_at_time'] = order['created_at'].strftime('%H:%M')
+                rows.append(row)
+            return json.dumps({'orders': rows, 'version': 1, 'long_poll': True}, cls=DjangoJSONEncoder).encode()
+
+        def current():
+            rows = [{**order, 'created_at': order['created_at'].isoformat(timespec='seconds')} for order in orders]
+            return api.dumps({'orders': rows, 'version': 1, 'long_poll': True})
+
+        compressors = [('gzip', lambda body: gzip.compress(body, compresslevel=middleware.GZIP_LEVEL, mtime=0))]
+        if middleware.brotli is not None:
+            compressors.append(('br', lambda body: middleware.brotli.compress(body, quality=middleware.BROTLI_QUALITY)))
+
+        repeat = options['repeat']
+        self.stdout.write(f"Cola de {options['orders']} pedidos, {repeat} repeticiones")
+        for name, encode in [('stdlib, anterior', legacy), (f"api ({'orjson' if api.orjson else 'stdlib'})", current)]:
+            body, seconds = self.timed(encode, repeat)
+            self.stdout.write(f'{name:<18} JSON: {len(body):>6} bytes en {seconds * 1e6:>7.1f} µs')
+            for encoding, compress in compressors:
+                compressed, seconds = self.timed(lambda: compress(body), repeat)
+                self.stdout.write(f"{'':<18} {encoding:<5}: {len(compressed):>6} bytes en {seconds * 1e6:>7.1f} µs")
+
+    def timed(self, func, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        return result, (time.perf_counter() - start) / repeat
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurant.models import UserProfile
+from restaurant.throttling import DEVICE_COOKIE, device_cookie
+
+
+class Command(BaseCommand):
+    help = 'Open many idle kitchen long-poll connections against a running ASGI server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server')
+        parser.add_argument('--connections', type=int, default=300)
+        parser.add_argument('--username', help='Kitchen user (defaults to the first cocinero)')
+
+    def handle(self, *args, **options):
+        profile = UserProfile.objects.filter(role='cocinero').select_related('user').first()
+        user = User.objects.get(username=options['username']) if options['username'] else profile and profile.user
+        if user is None:
+            raise CommandError('No hay usuario cocinero')
+
+        # Authenticate the connections with a regular session
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+
+        try:
+            results = asyncio.run(self.run(options['url'], options['connections'], session.session_key))
+        finally:
+            session.delete()
+
+        held, elapsed, errors = results
+        self.stdout.write(f"Conexiones abiertas: {options['connections']}  Errores: {errors}")
+        self.stdout.write(self.style.SUCCESS(
+            f'{held} conexiones de cocina mantenidas en espera durante {elapsed:.1f} s'
+        ))
+
+    async def run(self, base_url, connections, session_key):
+        url = urlsplit(base_url)
+        host, port = url.hostname, url.port or 80
+        cookie = f'{settings.SESSION_COOKIE_NAME}={session_key}'
+
+        # Learn the current version so the following requests long-poll
+        status, body = await self.get(host, port, '/home/kitchen-queue-data/', cookie)
+        if status != 200:
+            raise CommandError(f'Respuesta inesperada: {status}')
+        version = json.loads(body)['version']
+        path = f'/home/kitchen-queue-data/?version={version}'
+
+        # One device per connection, as many kitchen screens would be
+        cookies = [f'{cookie}; {DEVICE_COOKIE}={device_cookie(f"bench-{i}")}' for i in range(connections)]
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *(self.get(host, port, path, device) for device in cookies),
+            return_exceptions=True,
+        )
+        elapsed = time.perf_counter() - start
+        held = sum(1 for response in responses if not isinstance(response, Exception) and response[0] == 200)
+        return held, elapsed, connections - held
+
+    async def get(self, host, port, path, cookie):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: {host}\r\nCookie: {cookie}\r\nConnection: close\r\n\r\n'.encode()
+        )
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        head, _, body = raw.partition(b'\r\n\r\n')
+        status = int(head.split(b' ', 2)[1])
+        return status, body
@@ -0,0 +1,77 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from restaurant import menu_search
+from restaurant.models import Branch, MenuCategory, MenuItem
+
+BENCH_BRANCH_CODE = 'bench-menu'
+DISHES = ['Pizza', 'Pasta', 'Ensalada César', 'Lomo a lo pobre', 'Empanada de pino', 'Cazuela', 'Ceviche', 'Paila marina']
+STYLES = ['de la casa', 'vegetariana', 'picante', 'al pesto', 'a la parrilla', 'con queso', 'mediterránea']
+WINES = ['Cabernet Sauvignon', 'Carménère', 'Merlot', 'Syrah', 'Sauvignon Blanc', 'Chardonnay', 'Pinot Noir']
+QUERIES = ['piz', 'CAFE', 'carme', 'queso', 'ensalada ce', 'pinot', 'lomo a', 'vino', 'par', 'syrah 1']
+
+
+class Command(BaseCommand):
+    help = 'Time menu search against a synthetic menu of a few thousand items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=3000)
+        parser.add_argument('--repeat', type=int, default=50, help='Runs of every query')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        branch, _ = Branch.objects.get_or_create(code=BENCH_BRANCH_CODE, defaults={'name': 'Bench menú'})
+        categories = [
+            MenuCategory.objects.create(branch=branch, name=name, position=position)
+            for position, name in enumerate(['Platos', 'Vinos', 'Bebidas'])
+        ]
+        items = []
+        for i in range(options['items']):
+            kind = rng.random()
+            if kind < 0.5:
+                name, category = f'{rng.choice(DISHES)} {rng.choice(STYLES)} {i}', categories[0]
+            elif kind < 0.8:
+                name, category = f'Vino {rng.choice(WINES)} {i}', categories[1]
+            else:
+                name, category = f'{rng.choice(["Café", "Jugo", "Té", "Bebida"])} {i}', categories[2]
+            items.append(MenuItem(branch=branch, category=category, name=name,
+                                  search_name=menu_search.normalize(name), price=rng.randint(2, 30)))
+        MenuItem.objects.bulk_create(items, batch_size=1000)
+
+        try:
+            available = MenuItem.objects.for_branch(branch).filter(available=True)
+            self.stdout.write(f"{options['items']} elementos, {options['repeat']} repeticiones por búsqueda")
+            self.stdout.write(f'{"Búsqueda":<14} {"result.":>7} {"índice p50":>11} {"p95":>7} {"icontains p50":>14}')
+            for query in QUERIES:
+                results = menu_search.search(branch.id, query)
+                indexed = self.timed(lambda: menu_search.search(branch.id, query), options['repeat'])
+                # What the admin and a naive endpoint did before
+                naive = self.timed(lambda: list(
+                    available.filter(Q(name__icontains=query)).order_by('name')
+                             .values('id', 'name', 'description', 'price', 'category__name')[:menu_search.SEARCH_LIMIT]
+                ), options['repeat'])
+                self.stdout.write(
+                    f'{query:<14} {len(results):>7} {statistics.median(indexed):>9.2f}ms '
+                    f'{statistics.quantiles(indexed, n=20)[-1]:>5.2f}ms {statistics.median(naive):>12.2f}ms'
+                )
+            if connection.vendor == 'sqlite':
+                term = menu_search.normalize(QUERIES[0])
+                plan = menu_search._name_prefix(available, term).values('id').explain()
+                self.stdout.write(f'\nPlan del prefijo en SQLite:\n{plan}')
+        finally:
+            MenuItem.objects.filter(branch=branch).delete()
+            MenuCategory.objects.filter(branch=branch).delete()
+            branch.delete()
+
+    def timed(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
@@ -0,0 +1,182 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import Q
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from restaurant import board, queue_state, seating
+from restaurant.models import AuditLog, Ingredient, MenuItem, Order, OrderEvent, RecipeIngredient, Table
+
+BENCH_USERNAME = 'bench_garzon'
+BENCH_TABLE_NUMBER = 9999
+
+
+class Command(BaseCommand):
+    help = ('Benchmark write throughput of concurrent send_order calls against the configured database; '
+            'with --compare, under each database profile')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent waiters')
+        parser.add_argument('--orders', type=int, default=50, help='Orders per waiter')
+        parser.add_argument('--items', type=int, default=3, help='Items per order')
+        parser.add_argument('--stock', type=int, help='Order a bench dish whose only ingredient has this much stock')
+        parser.add_argument('--compare', action='store_true',
+                            help='Run once per database profile and print the results side by side')
+        parser.add_argument('--postgres-url',
+                            help='With --compare, also run both profiles against this PostgreSQL database')
+        parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(options)
+        result = self.run(options)
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+            return
+
+        self.stdout.write(f"Perfil: {result['profile']} ({result['engine']})")
+        self.stdout.write(
+            f"Hilos: {options['threads']}  Pedidos por hilo: {options['orders']}  Ítems por pedido: {options['items']}"
+        )
+        self.stdout.write(f"Pedidos correctos: {result['ok']}  Errores: {result['errors']}")
+        if 'remaining' in result:
+            self.stdout.write(
+                f"Sin stock: {result['rejected']}  Stock vendido: {options['stock'] - result['remaining']:g}  "
+                f"Restante: {result['remaining']:g}  Ítems aceptados: {result['ok'] * options['items']}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendimiento: {result['ok'] / result['elapsed']:.1f} pedidos/s en {result['elapsed']:.2f} s"
+        ))
+
+    def compare(self, options):
+        # Profiles are applied when settings load, so each run is its own process
+        targets = [(None, 'development'), (None, 'production')]
+        if options['postgres_url']:
+            targets += [(options['postgres_url'], 'development'), (options['postgres_url'], 'production')]
+        command = [
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'bench_send_order', '--json',
+            '--threads', str(options['threads']), '--orders', str(options['orders']), '--items', str(options['items']),
+        ]
+        if options['stock'] is not None:
+            command += ['--stock', str(options['stock'])]
+
+        results = []
+        for url, profile in targets:
+            env = dict(os.environ, DB_PROFILE=profile)
+            if url:
+                env['DATABASE_URL'] = url
+            self.stdout.write(f'Midiendo perfil {profile}{" (PostgreSQL)" if url else ""}...')
+            child = subprocess.run(command, env=env, capture_output=True, text=True)
+            if child.returncode:
+                self.stderr.write(child.stderr)
+                continue
+            results.append(json.loads(child.stdout.strip().splitlines()[-1]))
+
+        self.stdout.write(
+            f"Hilos: {options['threads']}  Pedidos por hilo: {options['orders']}  Ítems por pedido: {options['items']}"
+        )
+        self.stdout.write(f"{'Perfil':<14}{'Motor':<12}{'Correctos':>10}{'Sin stock':>10}{'Errores':>9}{'Pedidos/s':>11}")
+        for result in results:
+            self.stdout.write(
+                f"{result['profile']:<14}{result['engine']:<12}{result['ok']:>10}{result['rejected']:>10}"
+                f"{result['errors']:>9}{result['ok'] / result['elapsed']:>11.1f}"
+            )
+
+    def run(self, options):
+        threads = options['threads']
+        orders_per_thread = options['orders']
+        items_per_order = options['items']
+
+        waiter, created = User.objects.get_or_create(username=BENCH_USERNAME)
+        if created:
+            waiter.userprofile.role = 'garzon'
+            waiter.userprofile.save()
+        branch_id = waiter.userprofile.branch_id
+        table, _ = Table.objects.get_or_create(branch_id=branch_id, number=BENCH_TABLE_NUMBER, defaults={'capacity': 4})
+        ingredient = None
+        if options['stock'] is not None:
+            # Every item of every order draws one unit from the same ingredient
+            ingredient = Ingredient.objects.create(
+                branch_id=branch_id, name=f'{BENCH_USERNAME}_ingrediente', stock=options['stock']
+            )
+            menu_items = [MenuItem.objects.create(branch_id=branch_id, name='Bench', price=1)]
+            RecipeIngredient.objects.create(menu_item=menu_items[0], ingredient=ingredient, quantity=1)
+        else:
+            menu_items = list(MenuItem.objects.for_branch(branch_id).filter(available=True)[:items_per_order])
+        if not menu_items:
+            menu_items = [MenuItem.objects.create(branch_id=branch_id, name='Bench', price=1, available=False)]
+        first_order_id = Order.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        first_event_id = OrderEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+        payload = {'order_notes': 'bench'}
+        for i in range(items_per_order):
+            payload[f'item_id_{i}'] = menu_items[i % len(menu_items)].id
+            payload[f'quantity_{i}'] = 1
+        url = reverse('send_order', args=[table.id])
+
+        ok = [0] * threads
+        rejected = [0] * threads
+        errors = [0] * threads
+
+        def worker(index):
+            client = Client(raise_request_exception=False, HTTP_HOST='127.0.0.1')
+            client.force_login(waiter)
+            for _ in range(orders_per_thread):
+                response = client.post(url, payload)
+                if response.status_code == 302:
+                    ok[index] += 1
+                elif response.status_code == 409:
+                    rejected[index] += 1
+                else:
+                    errors[index] += 1
+            connections.close_all()
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        # Measure the database, not the per-device throttle
+        with override_settings(THROTTLE_RATES={}):
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+        # Clean up benchmark rows, including their outbox events so event_relay
+        # and the reception board never see the bench orders
+        with transaction.atomic():
+            bench_orders = Order.objects.filter(id__gt=first_order_id, waiter=waiter)
+            OrderEvent.objects.filter(id__gt=first_event_id).filter(
+                Q(order_id__in=bench_orders.values('id')) | Q(table_id=table.id)
+            ).delete()
+            bench_orders.delete()
+            AuditLog.objects.filter(user=waiter).delete()
+            Table.objects.filter(id=table.id).update(is_available=True, occupied_since=None)
+        board.invalidate()
+        seating.bump_version(branch_id)
+        queue_state.bump_kitchen_version(branch_id)
+        if ingredient is not None:
+            ingredient.refresh_from_db()
+            remaining = ingredient.stock
+            MenuItem.objects.filter(recipe__ingredient=ingredient).delete()
+            ingredient.delete()
+
+        result = {
+            'profile': settings.DB_PROFILE,
+            'engine': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+            'ok': sum(ok),
+            'rejected': sum(rejected),
+            'errors': sum(errors),
+            'elapsed': elapsed,
+        }
+        if ingredient is not None:
+            result['remaining'] = float(remaining)
+        return result
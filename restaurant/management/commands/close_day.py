@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from restaurant import analytics, closing
+from restaurant.models import Branch
+
+
+class Command(BaseCommand):
+    help = 'Close the day: deliver open orders, free the tables and store the day snapshot and report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to close (YYYY-MM-DD), today by default')
+        parser.add_argument('--branch', help='Branch code, every branch by default')
+
+    def handle(self, *args, **options):
+        try:
+            day = analytics.parse_date(options['date']) or timezone.localdate()
+        except ValueError:
+            raise CommandError('Fecha inválida, use YYYY-MM-DD')
+        branches = Branch.objects.order_by('name')
+        if options['branch']:
+            branches = branches.filter(code=options['branch'])
+            if not branches:
+                raise CommandError(f'Sucursal no encontrada: {options["branch"]}')
+
+        for branch in branches:
+            try:
+                close = closing.close_day(branch.id, day)
+            except closing.AlreadyClosed as exc:
+                # Re-running the nightly job is harmless
+                self.stdout.write(self.style.WARNING(f'{branch.name}: {exc}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'{branch.name}: día {day:%d-%m-%Y} cerrado, {close.orders} pedidos, ${close.total} '
+                f'({closing.report_path(close.report_file)})'
+            ))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from restaurant import events
+
+
+class Command(BaseCommand):
+    help = 'Deliver order events to the configured sinks in batches, resuming from each sink cursor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Deliver what is pending once and exit')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when nothing was delivered')
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            results = events.relay_batch(options['batch_size'])
+            delivered = sum(count for count in results.values() if isinstance(count, int))
+            for name, result in results.items():
+                if isinstance(result, str):
+                    self.stderr.write(f'{name}: {result}')
+                elif result:
+                    self.stdout.write(f'{name}: {result} eventos')
+            if not delivered:
+                if options['once']:
+                    return
+                # Nothing new, or every sink is down: wait before polling again
+                time.sleep(options['interval'])
@@ -0,0 +1,36 @@
+import socketserver
+
+from django.core.management.base import BaseCommand
+
+from restaurant import printing
+
+CONTROL_CODES = (
+    printing.ESC_INIT, printing.ESC_BOLD_ON, printing.ESC_BOLD_OFF,
+    printing.ESC_DOUBLE_ON, printing.ESC_DOUBLE_OFF, b'\x1dVB\x00',
+)
+
+
+class Command(BaseCommand):
+    help = 'Listen like a raw network printer and write every ticket received to stdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=9100)
+
+    def handle(self, *args, **options):
+        stdout = self.stdout
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                data = self.rfile.read()
+                text = data
+                # Drop the ESC/POS control sequences so the ticket stays readable
+                for code in CONTROL_CODES:
+                    text = text.replace(code, b'')
+                stdout.write(f'--- {len(data)} bytes de {self.client_address[0]} ---')
+                stdout.write(text.decode('cp858', 'replace'))
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        with socketserver.ThreadingTCPServer((options['host'], options['port']), Handler) as server:
+            self.stdout.write(f"Impresora simulada escuchando en {options['host']}:{options['port']}")
+            server.serve_forever()
@@ -0,0 +1,40 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurant import analytics, forecasting
+
+
+class Command(BaseCommand):
+    help = 'Forecast covers and dish portions per service window for a day (default: tomorrow)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to forecast (YYYY-MM-DD)')
+        parser.add_argument('--method', choices=forecasting.METHODS, default=forecasting.METHODS[0])
+        parser.add_argument('--weeks', type=int, default=forecasting.DEFAULT_WEEKS, help='Past weeks to learn from')
+        parser.add_argument('--json', action='store_true', help='Print the forecast as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            day = analytics.parse_date(options['date']) or forecasting.default_day()
+        except ValueError:
+            raise CommandError('Fecha inválida, use YYYY-MM-DD')
+
+        start = time.perf_counter()
+        result = forecasting.forecast(day, method=options['method'], weeks=options['weeks'])
+        elapsed = time.perf_counter() - start
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(
+            f"Previsión para {result['weekday']} {result['date']} "
+            f"({result['method']}, {result['weeks_used']} semanas): {result['orders']} pedidos"
+        )
+        for window in result['windows']:
+            self.stdout.write(f"\n{window['name']} ({window['start']}:00-{window['end']}:00): {window['orders']} pedidos")
+            for dish in window['dishes']:
+                self.stdout.write(f"  {dish['prep']:>4}  {dish['name']}  (esperado {dish['expected']})")
+        self.stdout.write(self.style.SUCCESS(f'\nCalculado en {elapsed:.2f} s'))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from restaurant import printing
+
+
+class Command(BaseCommand):
+    help = 'Print queued kitchen tickets, retrying with backoff while a printer is unreachable'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--batch-size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            printed, failed = printing.process_batch(options['batch_size'])
+            if printed or failed:
+                self.stdout.write(f'Impresos: {printed}  Fallidos: {failed}')
+            elif options['once']:
+                return
+            if not printed:
+                # Nothing due, or the printers are down: wait before polling again
+                time.sleep(options['interval'])
@@ -0,0 +1,120 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter and boots the app the way a WSGI worker does
+BOOT_SCRIPT = '''
+import json, os, resource, sys, time
+started = time.perf_counter()
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+settings_loaded = time.perf_counter()
+django.setup(set_prefix=False)
+apps_ready = time.perf_counter()
+from django.core.handlers.wsgi import WSGIHandler
+application = WSGIHandler()
+handler_ready = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_ready = time.perf_counter()
+print(json.dumps({
+    'settings': settings_loaded - started,
+    'apps': apps_ready - settings_loaded,
+    'middleware': handler_ready - apps_ready,
+    'urls': urls_ready - handler_ready,
+    'total': urls_ready - started,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'modules': len(sys.modules),
+    'loaded': sorted(sys.modules),
+}))
+'''
+
+PHASES = [
+    ('settings', 'Carga de settings'),
+    ('apps', 'Apps listas (django.setup)'),
+    ('middleware', 'Middleware (WSGIHandler)'),
+    ('urls', 'URLconf'),
+    ('total', 'Total'),
+]
+
+# Modules worth knowing about when they show up at boot
+WATCHED = ['numpy', 'openpyxl', 'pyarrow', 'jazzmin', 'restaurant.analytics', 'restaurant.forecasting',
+           'restaurant.exports', 'restaurant.views.reports']
+
+
+class Command(BaseCommand):
+    help = 'Report import time per module and app-ready time of a fresh worker boot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Boots to time; medians are reported')
+        parser.add_argument('--top', type=int, default=20, help='Slowest modules to list')
+        parser.add_argument('--prefix', default='', help='Only list modules whose name starts with this')
+        parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+
+    def boot(self, importtime=False):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+        command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', BOOT_SCRIPT]
+        result = subprocess.run(command, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True)
+        return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+    def handle(self, *args, **options):
+        # One boot with -X importtime for the per-module breakdown; timed
+        # boots run without it since its bookkeeping slows imports down
+        _, trace = self.boot(importtime=True)
+        modules = parse_importtime(trace)
+        boots = [self.boot()[0] for _ in range(max(options['runs'], 1))]
+        phases = {key: statistics.median(boot[key] for boot in boots) * 1000 for key, _ in PHASES}
+        last = boots[-1]
+
+        slowest = sorted(
+            (m for m in modules if m['module'].startswith(options['prefix'])),
+            key=lambda m: m['cumulative_us'], reverse=True,
+        )[:options['top']]
+        report = {
+            'phases_ms': phases,
+            'max_rss_mb': last['max_rss_kb'] / 1024,
+            'modules_loaded': last['modules'],
+            'watched_loaded': [name for name in WATCHED if name in last['loaded']],
+            'slowest_imports': slowest,
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f'Arranque de un worker (mediana de {len(boots)} ejecuciones):')
+        for key, label in PHASES:
+            self.stdout.write(f'  {label:<28} {phases[key]:8.1f} ms')
+        self.stdout.write(f'  {"Memoria máxima (RSS)":<28} {report["max_rss_mb"]:8.1f} MB')
+        self.stdout.write(f'  {"Módulos cargados":<28} {report["modules_loaded"]:8d}')
+        watched = ', '.join(report['watched_loaded']) or 'ninguno'
+        self.stdout.write(f'  Módulos pesados cargados al arrancar: {watched}')
+
+        self.stdout.write(f'\nImportaciones más lentas (acumulado / propio, ms):')
+        for m in slowest:
+            self.stdout.write(
+                f'  {m["cumulative_us"] / 1000:8.1f} {m["self_us"] / 1000:8.1f}  '
+                f'{"  " * m["depth"]}{m["module"]}'
+            )
+
+
+def parse_importtime(trace):
+    """Parse ``-X importtime`` output into one dict per imported module."""
+    modules = []
+    for line in trace.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({
+            'module': name.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return modules
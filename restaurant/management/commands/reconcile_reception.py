@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from restaurant import analytics, board
+from restaurant.models import Branch
+
+
+class Command(BaseCommand):
+    help = 'Check that the live reception board matches the rows of the daily report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to check (YYYY-MM-DD), today by default')
+        parser.add_argument('--repair', action='store_true', help='Rebuild the boards from the database on mismatch')
+
+    def handle(self, *args, **options):
+        try:
+            day = analytics.parse_date(options['date']) or timezone.localdate()
+        except ValueError:
+            raise CommandError('Fecha inválida, use YYYY-MM-DD')
+
+        mismatched = []
+        for branch in Branch.objects.order_by('name'):
+            live = board.get_board(branch.id, day)
+            # The same rows download_daily_report sums
+            report = board.build(branch.id, day)
+            differences = self.compare(live, report)
+            if differences:
+                mismatched.append(branch.name)
+                self.stderr.write(f'{branch.name}: {len(differences)} diferencias')
+                for line in differences:
+                    self.stderr.write(f'  {line}')
+            else:
+                self.stdout.write(
+                    f"{branch.name}: {live['totals']['orders']} pedidos, ${live['totals']['total']} — cuadra"
+                )
+
+        if mismatched:
+            if options['repair']:
+                board.invalidate()
+                self.stdout.write(self.style.WARNING('Tableros reconstruidos desde la base de datos'))
+            else:
+                raise CommandError(f'El tablero no cuadra con el reporte en: {", ".join(mismatched)}')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Tablero y reporte del {day} cuadran'))
+
+    def compare(self, live, report):
+        differences = []
+        for order_id in sorted(live['orders'].keys() | report['orders'].keys()):
+            if live['orders'].get(order_id) != report['orders'].get(order_id):
+                differences.append(
+                    f'Pedido {order_id}: tablero {live["orders"].get(order_id)}, reporte {report["orders"].get(order_id)}'
+                )
+        for group in ('totals', 'by_status', 'by_waiter', 'by_table'):
+            if live[group] != report[group]:
+                differences.append(f'{group}: tablero {live[group]}, reporte {report[group]}')
+        # Running totals must also add up to the board's own rows
+        rows_total = sum(row[2] for row in live['orders'].values())
+        if rows_total != live['totals']['total']:
+            differences.append(f'Suma de pedidos del tablero {rows_total} != total acumulado {live["totals"]["total"]}')
+        return differences
@@ -0,0 +1,56 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurant.seeding import seed_catalog, seed_orders
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with synthetic tables, menu, staff and order history for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branches', type=int, default=1,
+                            help='Branches to create; 1 seeds the default branch')
+        parser.add_argument('--tables', type=int, default=200, help='Tables per branch')
+        parser.add_argument('--menu-items', type=int, default=1000, help='Menu items per branch')
+        parser.add_argument('--waiters', type=int, default=20, help='Waiters per branch')
+        parser.add_argument('--orders', type=int, default=100000, help='Orders in total')
+        parser.add_argument('--days', type=int, default=90, help='Days of history, ending today')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Orders per transaction')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes writing orders; each takes its own range of days')
+        parser.add_argument('--no-audit', action='store_true', help='Skip the audit log entries')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable datasets')
+
+    def handle(self, *args, **options):
+        for name in ('branches', 'tables', 'menu_items', 'waiters', 'days', 'batch_size', 'workers'):
+            if options[name] < 1:
+                raise CommandError(f'--{name.replace("_", "-")} debe ser al menos 1')
+
+        catalog = seed_catalog(
+            options['branches'], options['tables'], options['menu_items'], options['waiters'],
+            random.Random(options['seed']),
+        )
+        self.stdout.write(
+            f'{len(catalog)} sucursales con {options["tables"]} mesas, '
+            f'{options["menu_items"]} platos y {options["waiters"]} garzones cada una'
+        )
+        if options['orders'] < 1:
+            return
+
+        def progress(totals, elapsed):
+            orders, items, logs = totals
+            self.stdout.write(
+                f'  {orders} pedidos, {items} ítems, {logs} registros '
+                f'({(orders + items + logs) / elapsed:.0f} filas/s)'
+            )
+
+        orders, items, logs = seed_orders(
+            catalog, options['orders'], options['days'],
+            batch_size=options['batch_size'], workers=options['workers'],
+            audit=not options['no_audit'], seed=options['seed'], progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Creados {orders} pedidos, {items} ítems y {logs} registros de auditoría '
+            f'en los últimos {options["days"]} días'
+        ))
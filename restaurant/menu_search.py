@@ -0,0 +1,60 @@
+"""
+Menu item search for waiters and the admin.
+
+``MenuItem.search_name`` holds the name in lowercase without accents
+("Café con leche" -> "cafe con leche"), so "cafe" and "CAFÉ" find the
+same items. A query matches items whose name starts with it first, then
+items with a later word starting with it ("leche" -> "Café con leche").
+
+The name prefix is served by the ``(branch, search_name)`` index. On
+SQLite it is written as a range, since ``LIKE`` is case-insensitive there
+and cannot use a plain index. On PostgreSQL migration 0014 adds a pg_trgm
+GIN index on ``search_name`` that serves both the prefix and the
+word-start ``LIKE``.
+"""
+
+import unicodedata
+
+from django.db import connections
+from django.db.models import F
+
+SEARCH_LIMIT = 20
+
+
+def normalize(text):
+    """Lowercase ``text`` without accents, with single spaces."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ' '.join(''.join(char for char in decomposed if not unicodedata.combining(char)).split())
+
+
+def _name_prefix(queryset, term):
+    if connections[queryset.db].vendor == 'sqlite':
+        # Every name starting with ``term`` sorts between it and ``term`` + the last code point
+        return queryset.filter(search_name__gte=term, search_name__lt=term + '\U0010ffff')
+    return queryset.filter(search_name__startswith=term)
+
+
+def _ranked(queryset, query, limit, *fields, **expressions):
+    term = normalize(query)
+    if not term:
+        return []
+    rows = list(_name_prefix(queryset, term).order_by('search_name').values(*fields, **expressions)[:limit])
+    if limit is None or len(rows) < limit:
+        words = queryset.filter(search_name__contains=f' {term}').order_by('search_name')
+        # Names matching both ways ("vino" in "vino de la casa vino") are already listed
+        seen = {row['id'] for row in rows}
+        rows += [row for row in words.values(*fields, **expressions)[:limit] if row['id'] not in seen]
+    return rows[:limit]
+
+
+def match_ids(queryset, query, limit=None):
+    """Ids of the items in ``queryset`` matching ``query``, name-prefix matches first."""
+    return [row['id'] for row in _ranked(queryset, query, limit, 'id')]
+
+
+def search(branch_id, query, limit=SEARCH_LIMIT):
+    """Available items of a branch matching ``query``, best matches first, as dicts."""
+    from .models import MenuItem
+
+    available = MenuItem.objects.for_branch(branch_id).filter(available=True)
+    return _ranked(available, query, limit, 'id', 'name', 'description', 'price', category_name=F('category__name'))
@@ -0,0 +1,210 @@
+"""
+Prometheus metrics for restaurant operations and application health.
+
+All metrics are in-process counters, gauges and histograms updated by the
+views, signals and ``MetricsMiddleware`` as things happen; a scrape never
+runs COUNT queries. Under gunicorn, set ``PROMETHEUS_MULTIPROC_DIR`` to an
+empty directory so every worker writes to a shared multiprocess store and
+``/metrics`` reports the sum across workers (see gunicorn.conf.py).
+"""
+
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+    multiprocess,
+)
+
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+REQUEST_LATENCY = Histogram(
+    'abba_request_latency_seconds',
+    'Request latency by URL name',
+    ['url_name', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_QUERIES = Histogram(
+    'abba_db_queries_per_request',
+    'Database queries executed per request by URL name',
+    ['url_name'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+OPEN_ORDERS = Gauge(
+    'abba_open_orders',
+    'Orders currently in each status',
+    ['status'],
+    multiprocess_mode='sum',
+)
+ORDERS_CREATED = Counter(
+    'abba_orders_created_total',
+    'Orders created (use rate() for orders per minute)',
+)
+ORDER_AMENDMENTS = Counter(
+    'abba_order_amendments_total',
+    'Rounds added to open orders',
+)
+ORDER_STATUS_SECONDS = Histogram(
+    'abba_order_status_seconds',
+    'Time an order spent in a status before moving on',
+    ['status'],
+    buckets=(30, 60, 120, 300, 600, 900, 1200, 1800, 2700, 3600, 7200),
+)
+AUDIT_LOG_WRITES = Counter(
+    'abba_audit_log_writes_total',
+    'Audit log entries written',
+)
+THROTTLED_REQUESTS = Counter(
+    'abba_throttled_requests_total',
+    'Requests refused by the per-device throttle',
+    ['scope'],
+)
+WORKER_INFO = Gauge(
+    'abba_worker_info',
+    'Application worker processes',
+    ['pid', 'server'],
+    multiprocess_mode='liveall',
+)
+
+OPEN_STATUSES = ('not_taken', 'preparing', 'ready')
+
+_query_count = ContextVar('abba_query_count', default=None)
+
+
+def register_worker():
+    server = os.environ.get('SERVER_SOFTWARE', 'django').split('/')[0]
+    WORKER_INFO.labels(pid=str(os.getpid()), server=server).set(1)
+
+
+def order_created():
+    ORDERS_CREATED.inc()
+    OPEN_ORDERS.labels(status='not_taken').inc()
+
+
+def order_amended():
+    ORDER_AMENDMENTS.inc()
+
+
+def order_status_changed(old_status, new_status, seconds_in_old_status):
+    if old_status == new_status:
+        return
+    ORDER_STATUS_SECONDS.labels(status=old_status).observe(seconds_in_old_status)
+    if old_status in OPEN_STATUSES:
+        OPEN_ORDERS.labels(status=old_status).dec()
+    if new_status in OPEN_STATUSES:
+        OPEN_ORDERS.labels(status=new_status).inc()
+
+
+def orders_closed(counts):
+    """Open orders delivered in bulk by the day close, as ``{status: count}``."""
+    for status, count in counts.items():
+        if status in OPEN_STATUSES:
+            OPEN_ORDERS.labels(status=status).dec(count)
+
+
+def audit_logged():
+    AUDIT_LOG_WRITES.inc()
+
+
+def request_throttled(scope):
+    THROTTLED_REQUESTS.labels(scope=scope).inc()
+
+
+def seed_open_orders():
+    """
+    Set the open-order gauges from the database once.
+
+    Called by the gunicorn master on startup (after the multiprocess
+    directory has been cleared) so the gauges start from the real queue.
+    """
+    from django.db.models import Count
+
+    from .models import Order
+
+    counts = dict(
+        Order.objects.filter(status__in=OPEN_STATUSES)
+                     .values_list('status')
+                     .annotate(count=Count('id'))
+    )
+    for status in OPEN_STATUSES:
+        OPEN_ORDERS.labels(status=status).set(counts.get(status, 0))
+
+
+def count_query(execute, sql, params, many, context):
+    """Connection execute wrapper counting queries for the current request."""
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """``connection_created`` receiver adding the query counter to every connection."""
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+_seeded = False
+
+
+def render_latest():
+    """Return the exposition-format payload and its content type."""
+    global _seeded
+    if not _seeded and not MULTIPROCESS:
+        # A single process has no gunicorn master to seed the gauges
+        seed_open_orders()
+        _seeded = True
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Record latency and query count for every request, labelled by URL name."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Middleware is built once per worker when the handler loads
+        register_worker()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        counter = [0]
+        token = _query_count.set(counter)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_count.reset(token)
+        self._observe(request, start, counter[0])
+        return response
+
+    async def __acall__(self, request):
+        # The list is shared with the sync threads the async ORM runs in,
+        # because they inherit a copy of this context.
+        counter = [0]
+        token = _query_count.set(counter)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_count.reset(token)
+        self._observe(request, start, counter[0])
+        return response
+
+    def _observe(self, request, start, queries):
+        match = request.resolver_match
+        url_name = (match.url_name or match.view_name) if match else 'unmatched'
+        REQUEST_LATENCY.labels(url_name=url_name, method=request.method).observe(time.perf_counter() - start)
+        DB_QUERIES.labels(url_name=url_name).observe(queries)
@@ -0,0 +1,109 @@
+"""
+Async-capable middleware for running on the ASGI stack.
+
+Django runs a sync-only middleware in a worker thread for every request,
+and everything inside it waits on that thread. Under ASGI that means each
+long-polling kitchen screen would hold a thread instead of a coroutine.
+"""
+
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+ACCEPTS_BROTLI = re.compile(r'\bbr\b')
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+# Smaller bodies do not win back the compression headers and CPU
+MIN_COMPRESS_BYTES = 512
+# Fast settings: these bodies are compressed on every request
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise middleware that can also run natively in async mode.
+
+    Static files are still served from a thread; every other request goes
+    straight through to the async handler.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class JsonCompressionMiddleware:
+    """
+    Compress JSON API responses with brotli (when installed) or gzip.
+
+    WhiteNoise only serves pre-compressed static files; this covers the
+    dynamic JSON the kitchen, tables and analytics screens poll for. Other
+    content types are left alone, since HTML pages carry CSRF tokens.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith('application/json'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < MIN_COMPRESS_BYTES:
+            return response
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and ACCEPTS_BROTLI.search(accept_encoding):
+            content, encoding = brotli.compress(response.content, quality=BROTLI_QUALITY), 'br'
+        elif ACCEPTS_GZIP.search(accept_encoding):
+            content, encoding = gzip.compress(response.content, compresslevel=GZIP_LEVEL, mtime=0), 'gzip'
+        else:
+            return response
+
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('restaurant', '0006_alter_registrationpin_role_alter_userprofile_role'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(db_index=True, verbose_name='Fecha y Hora')),
+                ('status', models.CharField(choices=[('not_taken', 'Pedido sin tomar'), ('preparing', 'En preparación'), ('ready', 'Listo'), ('delivered', 'Entregado')], max_length=20, verbose_name='Estado')),
+                ('notes', models.TextField(blank=True, verbose_name='Notas')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Total')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Archivado')),
+                ('table', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='restaurant.table', verbose_name='Mesa')),
+                ('waiter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Garzón')),
+            ],
+            options={
+                'verbose_name': 'Pedido Archivado',
+                'verbose_name_plural': 'Pedidos Archivados',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity', models.IntegerField(default=1, verbose_name='Cantidad')),
+                ('notes', models.TextField(blank=True, verbose_name='Notas')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=6, verbose_name='Precio Unitario')),
+                ('menu_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='restaurant.menuitem', verbose_name='Elemento del Menú')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='restaurant.archivedorder', verbose_name='Pedido')),
+            ],
+            options={
+                'verbose_name': 'Artículo de Pedido Archivado',
+                'verbose_name_plural': 'Artículos de Pedidos Archivados',
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0008_order_status_changed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='station',
+            field=models.CharField(choices=[('cocina', 'Cocina'), ('bar', 'Bar')], default='cocina', max_length=20, verbose_name='Estación'),
+        ),
+        migrations.CreateModel(
+            name='PrintJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('station', models.CharField(max_length=20, verbose_name='Estación')),
+                ('dedupe_key', models.CharField(max_length=100, unique=True, verbose_name='Clave')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('done', 'Impreso'), ('failed', 'Fallido')], default='pending', max_length=20, verbose_name='Estado')),
+                ('attempts', models.IntegerField(default=0, verbose_name='Intentos')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de creación')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo intento')),
+                ('printed_at', models.DateTimeField(blank=True, null=True, verbose_name='Impreso')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='print_jobs', to='restaurant.order', verbose_name='Pedido')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Impresión',
+                'verbose_name_plural': 'Trabajos de Impresión',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='printjob_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0009_printjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Nombre')),
+                ('unit', models.CharField(default='unidad', max_length=20, verbose_name='Unidad')),
+                ('stock', models.DecimalField(decimal_places=3, default=0, max_digits=10, verbose_name='Stock')),
+            ],
+            options={
+                'verbose_name': 'Ingrediente',
+                'verbose_name_plural': 'Ingredientes',
+                'constraints': [models.CheckConstraint(condition=models.Q(('stock__gte', 0)), name='ingredient_stock_non_negative')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=10, verbose_name='Cantidad')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='recipe_items', to='restaurant.ingredient', verbose_name='Ingrediente')),
+                ('menu_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe', to='restaurant.menuitem', verbose_name='Elemento del Menú')),
+            ],
+            options={
+                'verbose_name': 'Ingrediente de Receta',
+                'verbose_name_plural': 'Ingredientes de Receta',
+                'constraints': [models.UniqueConstraint(fields=('menu_item', 'ingredient'), name='recipe_unique_ingredient')],
+            },
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:09
+
+import django.db.models.deletion
+from django.core.management.color import no_style
+from django.db import migrations, models
+
+DEFAULT_BRANCH_ID = 1
+
+
+def create_default_branch(apps, schema_editor):
+    """The branch existing rows belong to, with the id new rows default to."""
+    Branch = apps.get_model('restaurant', 'Branch')
+    Branch.objects.using(schema_editor.connection.alias).get_or_create(
+        id=DEFAULT_BRANCH_ID, defaults={'code': 'principal', 'name': 'Principal'},
+    )
+    # The id was given explicitly; move sequences past it (PostgreSQL)
+    for sql in schema_editor.connection.ops.sequence_reset_sql(no_style(), [Branch]):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0010_ingredient_recipe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Branch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Nombre')),
+                ('code', models.SlugField(max_length=30, unique=True, verbose_name='Código')),
+            ],
+            options={
+                'verbose_name': 'Sucursal',
+                'verbose_name_plural': 'Sucursales',
+            },
+        ),
+        migrations.RunPython(create_default_branch, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='branch',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, to='restaurant.branch', verbose_name='Sucursal'),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='branch',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, to='restaurant.branch', verbose_name='Sucursal'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='branch',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, to='restaurant.branch', verbose_name='Sucursal'),
+        ),
+        migrations.AddField(
+            model_name='registrationpin',
+            name='branch',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, to='restaurant.branch', verbose_name='Sucursal'),
+        ),
+        migrations.AddField(
+            model_name='table',
+            name='branch',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, to='restaurant.branch', verbose_name='Sucursal'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='branch',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, to='restaurant.branch', verbose_name='Sucursal'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['branch', 'created_at'], name='archivedorder_branch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['branch', 'available'], name='menuitem_branch_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['branch', 'status', 'created_at'], name='order_branch_status_idx'),
+        ),
+        migrations.AlterField(
+            model_name='table',
+            name='number',
+            field=models.IntegerField(verbose_name='Número'),
+        ),
+        migrations.AddConstraint(
+            model_name='table',
+            constraint=models.UniqueConstraint(fields=('branch', 'number'), name='table_unique_number_per_branch'),
+        ),
+    ]
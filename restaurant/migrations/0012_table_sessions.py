@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+
+def backfill_occupied_since(apps, schema_editor):
+    """Occupied tables were seated at their latest order, or now if they have none."""
+    Table = apps.get_model('restaurant', 'Table')
+    Order = apps.get_model('restaurant', 'Order')
+    latest = Order.objects.filter(table=OuterRef('pk')).values('table').annotate(last=Max('created_at')).values('last')
+    occupied = Table.objects.filter(is_available=False)
+    occupied.update(occupied_since=Subquery(latest))
+    occupied.filter(occupied_since__isnull=True).update(occupied_since=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0011_branch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='table',
+            name='occupied_since',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Ocupada desde'),
+        ),
+        migrations.CreateModel(
+            name='TableSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('capacity', models.IntegerField(verbose_name='Capacidad')),
+                ('started_at', models.DateTimeField(verbose_name='Inicio')),
+                ('ended_at', models.DateTimeField(verbose_name='Fin')),
+                ('branch', models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, to='restaurant.branch', verbose_name='Sucursal')),
+                ('table', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='restaurant.table', verbose_name='Mesa')),
+            ],
+            options={
+                'verbose_name': 'Ocupación de Mesa',
+                'verbose_name_plural': 'Ocupaciones de Mesa',
+                'indexes': [models.Index(fields=['branch', 'ended_at'], name='tablesession_branch_ended_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_occupied_since, migrations.RunPython.noop),
+    ]
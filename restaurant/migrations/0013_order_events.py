@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0012_table_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Destino')),
+                ('position', models.BigIntegerField(default=0, verbose_name='Último evento')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Actualizado')),
+            ],
+            options={
+                'verbose_name': 'Cursor de Eventos',
+                'verbose_name_plural': 'Cursores de Eventos',
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('order_created', 'Pedido creado'), ('order_status_changed', 'Cambio de estado'), ('table_occupied', 'Mesa ocupada'), ('table_freed', 'Mesa liberada')], max_length=30, verbose_name='Tipo')),
+                ('order_id', models.BigIntegerField(blank=True, null=True, verbose_name='Pedido')),
+                ('table_id', models.BigIntegerField(blank=True, null=True, verbose_name='Mesa')),
+                ('data', models.JSONField(default=dict, verbose_name='Datos')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha y Hora')),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='restaurant.branch', verbose_name='Sucursal')),
+            ],
+            options={
+                'verbose_name': 'Evento de Pedido',
+                'verbose_name_plural': 'Eventos de Pedidos',
+                'indexes': [models.Index(fields=['branch', 'id'], name='orderevent_branch_seq_idx')],
+            },
+        ),
+    ]
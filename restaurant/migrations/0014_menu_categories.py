@@ -0,0 +1,78 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+from restaurant.menu_search import normalize
+
+
+def backfill_search_name(apps, schema_editor):
+    MenuItem = apps.get_model('restaurant', 'MenuItem')
+    items = list(MenuItem.objects.only('id', 'name'))
+    for item in items:
+        item.search_name = normalize(item.name)
+    MenuItem.objects.bulk_update(items, ['search_name'], batch_size=500)
+
+
+def add_trigram_index(apps, schema_editor):
+    """On PostgreSQL, index search_name for prefix and substring LIKE. Needs pg_trgm."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS menuitem_search_trgm_idx '
+        'ON restaurant_menuitem USING gin (search_name gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS menuitem_search_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0013_order_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='position',
+            field=models.PositiveIntegerField(default=0, verbose_name='Orden'),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='search_name',
+            field=models.CharField(default='', editable=False, max_length=100, verbose_name='Nombre de búsqueda'),
+        ),
+        migrations.CreateModel(
+            name='MenuCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nombre')),
+                ('position', models.PositiveIntegerField(default=0, verbose_name='Orden')),
+                ('branch', models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, to='restaurant.branch', verbose_name='Sucursal')),
+            ],
+            options={
+                'verbose_name': 'Categoría del Menú',
+                'verbose_name_plural': 'Categorías del Menú',
+                'ordering': ['position', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='items', to='restaurant.menucategory', verbose_name='Categoría'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['branch', 'search_name'], name='menuitem_branch_search_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='menucategory',
+            constraint=models.UniqueConstraint(fields=('branch', 'name'), name='menucategory_branch_name_uniq'),
+        ),
+        migrations.RunPython(backfill_search_name, migrations.RunPython.noop),
+        migrations.RunPython(add_trigram_index, drop_trigram_index),
+    ]
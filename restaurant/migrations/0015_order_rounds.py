@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:50
+
+from django.db import migrations, models
+
+
+def mark_served_rounds(apps, schema_editor):
+    # The kitchen is done with the single round of finished orders
+    Order = apps.get_model('restaurant', 'Order')
+    Order.objects.filter(status__in=['ready', 'delivered']).update(ready_round=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0014_menu_categories'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorderitem',
+            name='round',
+            field=models.PositiveIntegerField(default=1, verbose_name='Ronda'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='ready_round',
+            field=models.PositiveIntegerField(default=0, verbose_name='Ronda lista'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='round',
+            field=models.PositiveIntegerField(default=1, verbose_name='Ronda'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='round',
+            field=models.PositiveIntegerField(default=1, verbose_name='Ronda'),
+        ),
+        migrations.AddField(
+            model_name='printjob',
+            name='round',
+            field=models.PositiveIntegerField(default=1, verbose_name='Ronda'),
+        ),
+        migrations.AlterField(
+            model_name='orderevent',
+            name='kind',
+            field=models.CharField(choices=[('order_created', 'Pedido creado'), ('order_amended', 'Pedido modificado'), ('order_status_changed', 'Cambio de estado'), ('table_occupied', 'Mesa ocupada'), ('table_freed', 'Mesa liberada')], max_length=30, verbose_name='Tipo'),
+        ),
+        migrations.RunPython(mark_served_rounds, migrations.RunPython.noop),
+    ]
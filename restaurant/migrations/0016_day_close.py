@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('restaurant', '0015_order_rounds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DayClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Día')),
+                ('closed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Cerrado')),
+                ('orders', models.IntegerField(verbose_name='Pedidos')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Total')),
+                ('summary', models.JSONField(default=dict, verbose_name='Resumen')),
+                ('report_file', models.CharField(max_length=255, verbose_name='Reporte')),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='restaurant.branch', verbose_name='Sucursal')),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Cerrado por')),
+            ],
+            options={
+                'verbose_name': 'Cierre del Día',
+                'verbose_name_plural': 'Cierres del Día',
+                'ordering': ['-day'],
+                'constraints': [models.UniqueConstraint(fields=('branch', 'day'), name='dayclose_branch_day_uniq')],
+            },
+        ),
+    ]
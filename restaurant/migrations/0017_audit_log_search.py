@@ -0,0 +1,103 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:59
+
+import re
+from datetime import datetime
+
+from django.db import migrations, models
+from restaurant import audit
+
+ORDER_ACTIONS = {
+    'Crear pedido': 'order_created',
+    'Modificar pedido': 'order_amended',
+}
+
+
+def backfill_entities(apps, schema_editor):
+    """Read the event and entity of existing logs back from their action and details."""
+    AuditLog = apps.get_model('restaurant', 'AuditLog')
+    UserProfile = apps.get_model('restaurant', 'UserProfile')
+    Table = apps.get_model('restaurant', 'Table')
+    RegistrationPIN = apps.get_model('restaurant', 'RegistrationPIN')
+    DayClose = apps.get_model('restaurant', 'DayClose')
+    branches = dict(UserProfile.objects.values_list('user_id', 'branch_id'))
+    tables = {(branch_id, number): id for id, branch_id, number in Table.objects.values_list('id', 'branch_id', 'number')}
+    pins = dict(RegistrationPIN.objects.values_list('pin', 'id'))
+    closes = {(user_id, day): id for id, user_id, day in DayClose.objects.values_list('id', 'closed_by_id', 'day')}
+
+    def first_number(pattern, text):
+        match = re.search(pattern, text)
+        return int(match.group(1)) if match else None
+
+    batch = []
+    for log in AuditLog.objects.filter(event='').only('id', 'user_id', 'action', 'details').iterator(chunk_size=2000):
+        action, details = log.action, log.details
+        if action in ORDER_ACTIONS or action.startswith('Cambiar estado pedido a '):
+            log.event = ORDER_ACTIONS.get(action, 'order_status_changed')
+            log.entity_type, log.entity_id = 'order', first_number(r'Pedido (\d+)', details)
+        elif action.startswith('Marcar mesa como '):
+            log.event = 'table_freed' if action.endswith('disponible') else 'table_occupied'
+            number = first_number(r'Mesa (\d+)', details)
+            log.entity_type, log.entity_id = 'table', tables.get((branches.get(log.user_id), number))
+        elif action == 'Generar PIN de registro':
+            match = re.match(r'PIN (\S+)', details)
+            log.event, log.entity_type, log.entity_id = 'pin_created', 'pin', match and pins.get(match.group(1))
+        elif action == 'Registro de usuario':
+            log.event, log.entity_type, log.entity_id = 'user_registered', 'user', log.user_id
+        elif action == 'Cerrar día':
+            match = re.match(r'Día (\d{2}-\d{2}-\d{4})', details)
+            day = match and datetime.strptime(match.group(1), '%d-%m-%Y').date()
+            log.event, log.entity_type, log.entity_id = 'day_closed', 'day_close', closes.get((log.user_id, day))
+        else:
+            continue
+        batch.append(log)
+        if len(batch) >= 2000:
+            AuditLog.objects.bulk_update(batch, ['event', 'entity_type', 'entity_id'])
+            batch = []
+    AuditLog.objects.bulk_update(batch, ['event', 'entity_type', 'entity_id'])
+
+
+def add_fulltext_index(apps, schema_editor):
+    audit.install_fulltext(schema_editor)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    audit.uninstall_fulltext(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0016_day_close'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='entity_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Entidad'),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='entity_type',
+            field=models.CharField(blank=True, choices=[('order', 'Pedido'), ('table', 'Mesa'), ('user', 'Usuario'), ('pin', 'PIN de registro'), ('day_close', 'Cierre del día')], max_length=20, verbose_name='Tipo de entidad'),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='event',
+            field=models.CharField(blank=True, choices=[('order_created', 'Pedido creado'), ('order_amended', 'Pedido modificado'), ('order_status_changed', 'Cambio de estado'), ('table_occupied', 'Mesa ocupada'), ('table_freed', 'Mesa liberada'), ('pin_created', 'PIN generado'), ('user_registered', 'Usuario registrado'), ('day_closed', 'Día cerrado')], max_length=30, verbose_name='Evento'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['entity_type', 'entity_id', 'timestamp'], name='auditlog_entity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['event', 'timestamp'], name='auditlog_event_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['timestamp'], name='auditlog_timestamp_idx'),
+        ),
+        migrations.RunPython(backfill_entities, migrations.RunPython.noop),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def split_shared_ingredients(apps, schema_editor):
+    """
+    Give each other branch using an ingredient its own copy, at zero stock.
+
+    Ingredients were shared, so how much of the stock each branch holds is
+    unknown; orders there report "Sin stock" until someone counts it.
+    """
+    Ingredient = apps.get_model('restaurant', 'Ingredient')
+    RecipeIngredient = apps.get_model('restaurant', 'RecipeIngredient')
+    foreign = RecipeIngredient.objects.exclude(menu_item__branch_id=models.F('ingredient__branch_id'))\
+                                      .select_related('ingredient', 'menu_item')
+    copies = {}
+    for recipe in foreign:
+        key = (recipe.ingredient_id, recipe.menu_item.branch_id)
+        if key not in copies:
+            copies[key], _ = Ingredient.objects.get_or_create(
+                branch_id=recipe.menu_item.branch_id, name=recipe.ingredient.name,
+                defaults={'unit': recipe.ingredient.unit, 'stock': 0},
+            )
+        recipe.ingredient = copies[key]
+        recipe.save(update_fields=['ingredient'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0017_audit_log_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='branch',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, to='restaurant.branch', verbose_name='Sucursal'),
+        ),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='name',
+            field=models.CharField(max_length=100, verbose_name='Nombre'),
+        ),
+        migrations.RunPython(split_shared_ingredients, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('branch', 'name'), name='ingredient_unique_name_per_branch'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0018_ingredient_branch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dayclose',
+            name='refreshed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Actualizado'),
+        ),
+    ]
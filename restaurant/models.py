@@ -1,9 +1,33 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+DEFAULT_BRANCH_CODE = 'principal'
+# Created by migration 0011, for rows created without a branch, so a
+# single-location install needs no setup
+DEFAULT_BRANCH_ID = 1
+
+class Branch(models.Model):
+    """A restaurant location. Tables, menu, orders and staff belong to one."""
+    name = models.CharField("Nombre", max_length=100, unique=True)
+    code = models.SlugField("Código", max_length=30, unique=True)
+
+    class Meta:
+        verbose_name = "Sucursal"
+        verbose_name_plural = "Sucursales"
+
+    def __str__(self):
+        return self.name
+
+class BranchQuerySet(models.QuerySet):
+    def for_branch(self, branch):
+        """Rows of one branch; ``branch`` may be a ``Branch`` or its id."""
+        return self.filter(branch=branch)
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
+    branch = models.ForeignKey(Branch, verbose_name="Sucursal", on_delete=models.PROTECT, default=DEFAULT_BRANCH_ID)
     role = models.CharField("Rol", max_length=20, choices=[
         ('garzon', 'Garzón'),
         ('cocinero', 'Cocinero'),
@@ -12,6 +36,8 @@ class UserProfile(models.Model):
     ], default='garzon')
     pin = models.CharField("PIN", max_length=10, blank=True)  # Para autenticación rápida
 
+    objects = BranchQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Perfil de Usuario"
         verbose_name_plural = "Perfiles de Usuario"
@@ -20,31 +46,146 @@ class UserProfile(models.Model):
         return f"{self.user.username} - {self.role}"
 
 class Table(models.Model):
-    number = models.IntegerField("Número", unique=True)
+    branch = models.ForeignKey(Branch, verbose_name="Sucursal", on_delete=models.PROTECT, default=DEFAULT_BRANCH_ID)
+    number = models.IntegerField("Número")
     capacity = models.IntegerField("Capacidad", default=4)
     is_available = models.BooleanField("Disponible", default=True)
+    occupied_since = models.DateTimeField("Ocupada desde", null=True, blank=True)
+
+    objects = BranchQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Mesa"
         verbose_name_plural = "Mesas"
+        constraints = [
+            models.UniqueConstraint(fields=['branch', 'number'], name='table_unique_number_per_branch'),
+        ]
 
     def __str__(self):
         return f"Mesa {self.number}"
 
+class TableSession(models.Model):
+    """
+    One party's stay at a table, from being seated until the table is freed.
+
+    Capacity is copied from the table so past durations stay in their
+    capacity class if the table is later resized.
+    """
+    branch = models.ForeignKey(Branch, verbose_name="Sucursal", on_delete=models.PROTECT, default=DEFAULT_BRANCH_ID)
+    table = models.ForeignKey(Table, verbose_name="Mesa", related_name='sessions', on_delete=models.CASCADE)
+    capacity = models.IntegerField("Capacidad")
+    started_at = models.DateTimeField("Inicio")
+    ended_at = models.DateTimeField("Fin")
+
+    class Meta:
+        verbose_name = "Ocupación de Mesa"
+        verbose_name_plural = "Ocupaciones de Mesa"
+        indexes = [
+            models.Index(fields=['branch', 'ended_at'], name='tablesession_branch_ended_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.table} ({self.started_at:%d-%m-%Y %H:%M} - {self.ended_at:%H:%M})"
+
+class MenuCategory(models.Model):
+    """A section of the waiter menu (starters, mains, wines...), shown by ``position``."""
+    branch = models.ForeignKey(Branch, verbose_name="Sucursal", on_delete=models.PROTECT, default=DEFAULT_BRANCH_ID)
+    name = models.CharField("Nombre", max_length=100)
+    position = models.PositiveIntegerField("Orden", default=0)
+
+    objects = BranchQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Categoría del Menú"
+        verbose_name_plural = "Categorías del Menú"
+        ordering = ['position', 'name']
+        constraints = [
+            models.UniqueConstraint(fields=['branch', 'name'], name='menucategory_branch_name_uniq'),
+        ]
+
+    def __str__(self):
+        return self.name
+
 class MenuItem(models.Model):
+    branch = models.ForeignKey(Branch, verbose_name="Sucursal", on_delete=models.PROTECT, default=DEFAULT_BRANCH_ID)
+    category = models.ForeignKey(MenuCategory, verbose_name="Categoría", related_name='items',
+                                 on_delete=models.SET_NULL, null=True, blank=True)
+    position = models.PositiveIntegerField("Orden", default=0)
     name = models.CharField("Nombre", max_length=100)
+    # Lowercase name without accents, kept by save(); see restaurant/menu_search.py
+    search_name = models.CharField("Nombre de búsqueda", max_length=100, editable=False, default='')
     description = models.TextField("Descripción", blank=True)
     price = models.DecimalField("Precio", max_digits=6, decimal_places=2)
     available = models.BooleanField("Disponible", default=True)
+    station = models.CharField("Estación", max_length=20, choices=[
+        ('cocina', 'Cocina'),
+        ('bar', 'Bar'),
+    ], default='cocina')
+
+    objects = BranchQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Elemento del Menú"
         verbose_name_plural = "Elementos del Menú"
+        indexes = [
+            models.Index(fields=['branch', 'available'], name='menuitem_branch_available_idx'),
+            models.Index(fields=['branch', 'search_name'], name='menuitem_branch_search_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.search_name = menu_search.normalize(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'search_name'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
+class Ingredient(models.Model):
+    """Stock of one branch's kitchen; recipes only use ingredients of their dish's branch."""
+    branch = models.ForeignKey(Branch, verbose_name="Sucursal", on_delete=models.PROTECT, default=DEFAULT_BRANCH_ID)
+    name = models.CharField("Nombre", max_length=100)
+    unit = models.CharField("Unidad", max_length=20, default='unidad')
+    stock = models.DecimalField("Stock", max_digits=10, decimal_places=3, default=0)
+
+    objects = BranchQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Ingrediente"
+        verbose_name_plural = "Ingredientes"
+        constraints = [
+            models.CheckConstraint(condition=models.Q(stock__gte=0), name='ingredient_stock_non_negative'),
+            models.UniqueConstraint(fields=['branch', 'name'], name='ingredient_unique_name_per_branch'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class RecipeIngredient(models.Model):
+    """Quantity of an ingredient used by one portion of a menu item."""
+    menu_item = models.ForeignKey(MenuItem, verbose_name="Elemento del Menú", related_name='recipe', on_delete=models.CASCADE)
+    ingredient = models.ForeignKey(Ingredient, verbose_name="Ingrediente", related_name='recipe_items', on_delete=models.PROTECT)
+    quantity = models.DecimalField("Cantidad", max_digits=10, decimal_places=3)
+
+    class Meta:
+        verbose_name = "Ingrediente de Receta"
+        verbose_name_plural = "Ingredientes de Receta"
+        constraints = [
+            models.UniqueConstraint(fields=['menu_item', 'ingredient'], name='recipe_unique_ingredient'),
+        ]
+
+    def clean(self):
+        # The dish is still unsaved while a new one's admin inline is validated
+        menu_item = getattr(self, 'menu_item', None)
+        if menu_item is not None and self.ingredient_id and self.ingredient.branch_id != menu_item.branch_id:
+            raise ValidationError({'ingredient': 'El ingrediente es de otra sucursal.'})
+
+    def __str__(self):
+        return f"{self.quantity} {self.ingredient.unit} de {self.ingredient.name}"
+
 class Order(models.Model):
+    branch = models.ForeignKey(Branch, verbose_name="Sucursal", on_delete=models.PROTECT, default=DEFAULT_BRANCH_ID)
     table = models.ForeignKey(Table, verbose_name="Mesa", on_delete=models.CASCADE)
     waiter = models.ForeignKey(User, verbose_name="Garzón", on_delete=models.CASCADE)
     created_at = models.DateTimeField("Fecha y Hora", default=timezone.now, db_index=True)
@@ -54,11 +195,24 @@ class Order(models.Model):
         ('ready', 'Listo'),
         ('delivered', 'Entregado'),
     ], default='not_taken', db_index=True)
+    status_changed_at = models.DateTimeField("Cambio de Estado", null=True, blank=True)
     notes = models.TextField("Notas", blank=True)
+    # Amendments add rounds; the kitchen works on the rounds after ready_round
+    round = models.PositiveIntegerField("Ronda", default=1)
+    ready_round = models.PositiveIntegerField("Ronda lista", default=0)
+
+    objects = BranchQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Pedido"
         verbose_name_plural = "Pedidos"
+        indexes = [
+            # Kitchen queues scan one branch's open orders. A (branch,
+            # created_at) index is left out on purpose: SQLite would pick it
+            # for the kitchen queue to skip the sort and walk every order of
+            # the branch.
+            models.Index(fields=['branch', 'status', 'created_at'], name='order_branch_status_idx'),
+        ]
 
     def calculate_total(self):
         total = sum(item.quantity * item.menu_item.price for item in self.items.all())
@@ -69,10 +223,17 @@ class Order(models.Model):
         return f"Pedido #{self.id} en {self.table} ({fecha_formateada})"
 
 class OrderItem(models.Model):
+    """
+    One line of an order, added in ``round``.
+
+    Lines are never edited: voiding portions adds a line with a negative
+    quantity in a later round, so totals are plain sums.
+    """
     order = models.ForeignKey(Order, verbose_name="Pedido", related_name='items', on_delete=models.CASCADE)
     menu_item = models.ForeignKey(MenuItem, verbose_name="Elemento del Menú", on_delete=models.CASCADE)
     quantity = models.IntegerField("Cantidad", default=1)
     notes = models.TextField("Notas", blank=True)
+    round = models.PositiveIntegerField("Ronda", default=1)
 
     class Meta:
         verbose_name = "Artículo del Pedido"
@@ -81,6 +242,163 @@ class OrderItem(models.Model):
     def __str__(self):
         return f"{self.quantity} x {self.menu_item.name}"
 
+class ArchivedOrder(models.Model):
+    """
+    Delivered order moved out of the hot ``Order`` table by ``archive_orders``.
+
+    Keeps the original order id and a frozen total so sales rollups survive
+    later menu price changes.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    branch = models.ForeignKey(Branch, verbose_name="Sucursal", on_delete=models.PROTECT, default=DEFAULT_BRANCH_ID)
+    table = models.ForeignKey(Table, verbose_name="Mesa", on_delete=models.CASCADE)
+    waiter = models.ForeignKey(User, verbose_name="Garzón", on_delete=models.CASCADE)
+    created_at = models.DateTimeField("Fecha y Hora", db_index=True)
+    status = models.CharField("Estado", max_length=20, choices=Order._meta.get_field('status').choices)
+    notes = models.TextField("Notas", blank=True)
+    total = models.DecimalField("Total", max_digits=10, decimal_places=2, default=0)
+    archived_at = models.DateTimeField("Archivado", default=timezone.now)
+
+    objects = BranchQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Pedido Archivado"
+        verbose_name_plural = "Pedidos Archivados"
+        indexes = [
+            models.Index(fields=['branch', 'created_at'], name='archivedorder_branch_idx'),
+        ]
+
+    def calculate_total(self):
+        return self.total
+
+    def __str__(self):
+        fecha_formateada = self.created_at.strftime("%d-%m-%Y %H:%M")
+        return f"Pedido #{self.id} en {self.table} ({fecha_formateada})"
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, verbose_name="Pedido", related_name='items', on_delete=models.CASCADE)
+    menu_item = models.ForeignKey(MenuItem, verbose_name="Elemento del Menú", on_delete=models.CASCADE)
+    quantity = models.IntegerField("Cantidad", default=1)
+    notes = models.TextField("Notas", blank=True)
+    round = models.PositiveIntegerField("Ronda", default=1)
+    unit_price = models.DecimalField("Precio Unitario", max_digits=6, decimal_places=2)
+
+    class Meta:
+        verbose_name = "Artículo de Pedido Archivado"
+        verbose_name_plural = "Artículos de Pedidos Archivados"
+
+    def __str__(self):
+        return f"{self.quantity} x {self.menu_item.name}"
+
+class PrintJob(models.Model):
+    """
+    Kitchen ticket waiting to be printed by the ``print_worker`` command.
+
+    Jobs are written in the same transaction as the order, so a ticket
+    exists exactly when its order does. ``dedupe_key`` keeps the same
+    ticket from being queued twice.
+    """
+    order = models.ForeignKey(Order, verbose_name="Pedido", related_name='print_jobs', on_delete=models.CASCADE)
+    station = models.CharField("Estación", max_length=20)
+    round = models.PositiveIntegerField("Ronda", default=1)
+    dedupe_key = models.CharField("Clave", max_length=100, unique=True)
+    status = models.CharField("Estado", max_length=20, choices=[
+        ('pending', 'Pendiente'),
+        ('done', 'Impreso'),
+        ('failed', 'Fallido'),
+    ], default='pending')
+    attempts = models.IntegerField("Intentos", default=0)
+    last_error = models.TextField("Último error", blank=True)
+    created_at = models.DateTimeField("Fecha de creación", default=timezone.now)
+    next_attempt_at = models.DateTimeField("Próximo intento", default=timezone.now)
+    printed_at = models.DateTimeField("Impreso", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Trabajo de Impresión"
+        verbose_name_plural = "Trabajos de Impresión"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='printjob_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ticket {self.station} - Pedido {self.order_id} ({self.status})"
+
+class OrderEvent(models.Model):
+    """
+    Append-only log of order and table changes; the id is the sequence.
+
+    Written in the same transaction as the change (see ``events.record``).
+    Orders and tables are referenced by plain ids so events outlive
+    archived orders.
+    """
+    branch = models.ForeignKey(Branch, verbose_name="Sucursal", on_delete=models.PROTECT)
+    kind = models.CharField("Tipo", max_length=30, choices=[
+        ('order_created', 'Pedido creado'),
+        ('order_amended', 'Pedido modificado'),
+        ('order_status_changed', 'Cambio de estado'),
+        ('table_occupied', 'Mesa ocupada'),
+        ('table_freed', 'Mesa liberada'),
+    ])
+    order_id = models.BigIntegerField("Pedido", null=True, blank=True)
+    table_id = models.BigIntegerField("Mesa", null=True, blank=True)
+    data = models.JSONField("Datos", default=dict)
+    created_at = models.DateTimeField("Fecha y Hora", default=timezone.now)
+
+    class Meta:
+        verbose_name = "Evento de Pedido"
+        verbose_name_plural = "Eventos de Pedidos"
+        indexes = [
+            models.Index(fields=['branch', 'id'], name='orderevent_branch_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.get_kind_display()}"
+
+class EventCursor(models.Model):
+    """Last event id delivered to one of ``settings.EVENT_SINKS``."""
+    name = models.CharField("Destino", max_length=50, unique=True)
+    position = models.BigIntegerField("Último evento", default=0)
+    updated_at = models.DateTimeField("Actualizado", default=timezone.now)
+
+    class Meta:
+        verbose_name = "Cursor de Eventos"
+        verbose_name_plural = "Cursores de Eventos"
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+class DayClose(models.Model):
+    """
+    End-of-day snapshot of one branch, written once by ``closing.close_day``.
+
+    Holds the day's totals and the per-waiter, per-dish and per-hour
+    breakdowns, plus the name of the Excel report generated at close
+    time, so past days are served without aggregating orders again.
+    Orders taken on the day after the close make the snapshot stale; it is
+    then recomputed (``closing.refresh``) and ``refreshed_at`` records when.
+    """
+    branch = models.ForeignKey(Branch, verbose_name="Sucursal", on_delete=models.PROTECT)
+    day = models.DateField("Día")
+    closed_at = models.DateTimeField("Cerrado", default=timezone.now)
+    refreshed_at = models.DateTimeField("Actualizado", null=True, blank=True)
+    closed_by = models.ForeignKey(User, verbose_name="Cerrado por", null=True, blank=True, on_delete=models.SET_NULL)
+    orders = models.IntegerField("Pedidos")
+    total = models.DecimalField("Total", max_digits=12, decimal_places=2)
+    summary = models.JSONField("Resumen", default=dict)
+    report_file = models.CharField("Reporte", max_length=255)
+
+    class Meta:
+        verbose_name = "Cierre del Día"
+        verbose_name_plural = "Cierres del Día"
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['branch', 'day'], name='dayclose_branch_day_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Cierre {self.branch} {self.day:%d-%m-%Y}"
+
 class RegistrationPIN(models.Model):
     pin = models.CharField("PIN", max_length=10, unique=True)
     role = models.CharField("Rol", max_length=20, choices=[
@@ -92,6 +410,8 @@ class RegistrationPIN(models.Model):
     created_by = models.ForeignKey(User, verbose_name="Creado por", on_delete=models.CASCADE)
     created_at = models.DateTimeField("Fecha de creación", default=timezone.now)
     uses = models.IntegerField("Usos", default=0)
+    # Users registering with this PIN join this branch
+    branch = models.ForeignKey(Branch, verbose_name="Sucursal", on_delete=models.PROTECT, default=DEFAULT_BRANCH_ID)
 
     class Meta:
         verbose_name = "PIN de Registro"
@@ -101,20 +421,52 @@ class RegistrationPIN(models.Model):
         return f"PIN {self.pin} - {self.role} - Usos: {self.uses}/2"
 
 class AuditLog(models.Model):
+    """
+    Who did what and when, in words (``action``, ``details``) and as
+    ``event`` on the ``entity_type`` / ``entity_id`` it touched.
+
+    The structured columns are indexed for lookups like "everything on
+    order 42"; the text is searched through the full-text index (see
+    ``audit``).
+    """
     user = models.ForeignKey(User, verbose_name="Usuario", on_delete=models.CASCADE)
     action = models.CharField("Acción", max_length=100)
     timestamp = models.DateTimeField("Fecha y Hora", default=timezone.now)
     details = models.TextField("Detalles", blank=True)
+    event = models.CharField("Evento", max_length=30, blank=True, choices=[
+        ('order_created', 'Pedido creado'),
+        ('order_amended', 'Pedido modificado'),
+        ('order_status_changed', 'Cambio de estado'),
+        ('table_occupied', 'Mesa ocupada'),
+        ('table_freed', 'Mesa liberada'),
+        ('pin_created', 'PIN generado'),
+        ('user_registered', 'Usuario registrado'),
+        ('day_closed', 'Día cerrado'),
+    ])
+    entity_type = models.CharField("Tipo de entidad", max_length=20, blank=True, choices=[
+        ('order', 'Pedido'),
+        ('table', 'Mesa'),
+        ('user', 'Usuario'),
+        ('pin', 'PIN de registro'),
+        ('day_close', 'Cierre del día'),
+    ])
+    entity_id = models.BigIntegerField("Entidad", null=True, blank=True)
 
     class Meta:
         verbose_name = "Registro de Auditoría"
         verbose_name_plural = "Registros de Auditoría"
+        indexes = [
+            models.Index(fields=['entity_type', 'entity_id', 'timestamp'], name='auditlog_entity_idx'),
+            models.Index(fields=['event', 'timestamp'], name='auditlog_event_idx'),
+            models.Index(fields=['timestamp'], name='auditlog_timestamp_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.action} - {self.timestamp}"
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from . import auth, board, inventory, menu_search, metrics, seating
 
 @receiver(post_save, sender=User)
 def manage_user_profile(sender, instance, created, **kwargs):
@@ -123,3 +475,29 @@ def manage_user_profile(sender, instance, created, **kwargs):
     else:
         if hasattr(instance, 'userprofile'):
             instance.userprofile.save()
+
+@receiver(post_save, sender=AuditLog)
+def count_audit_log(sender, instance, created, **kwargs):
+    if created:
+        metrics.audit_logged()
+
+@receiver([post_save, post_delete], sender=MenuCategory)
+def invalidate_menu_sections(sender, instance, **kwargs):
+    inventory.invalidate_menu(instance.branch_id)
+
+@receiver([post_save, post_delete], sender=MenuItem)
+def invalidate_menu_cache(sender, instance, **kwargs):
+    inventory.invalidate_menu(instance.branch_id)
+    # Order totals use current prices; rebuild boards once the new price is visible
+    transaction.on_commit(board.invalidate)
+
+@receiver([post_save, post_delete], sender=Table)
+def invalidate_seating_index(sender, instance, **kwargs):
+    seating.bump_version(instance.branch_id)
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_id = instance.pk if sender is User else instance.user_id
+    # After commit, so a concurrent request cannot cache the old row again
+    transaction.on_commit(lambda: auth.invalidate_user(user_id))
@@ -0,0 +1,171 @@
+"""
+Kitchen ticket printing.
+
+Orders queue one ``PrintJob`` per station inside the order transaction
+(``enqueue_order_tickets``); each amendment round queues its own, printing
+only that round's lines. The ``print_worker`` management command
+claims pending jobs in batches, renders them as ESC/POS or plain text and
+sends each station's batch to its sink in one go, so the waiter's request
+never waits on a printer.
+
+Sinks are configured per station in ``settings.PRINT_SINKS`` as URLs. A
+``'<branch code>:<station>'`` key overrides the station's sink for one
+branch:
+
+- ``tcp://host:9100`` raw socket printer (JetDirect / ESC/POS)
+- ``file:///path/to/tickets.txt`` append to a file
+"""
+
+import socket
+from collections import defaultdict
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OrderItem, PrintJob
+
+MAX_ATTEMPTS = 5
+# Retry delays grow as RETRY_BASE_SECONDS * 2 ** attempts
+RETRY_BASE_SECONDS = 5
+TCP_TIMEOUT = 5
+
+ESC_INIT = b'\x1b@'
+ESC_BOLD_ON = b'\x1bE\x01'
+ESC_BOLD_OFF = b'\x1bE\x00'
+ESC_DOUBLE_ON = b'\x1d!\x11'
+ESC_DOUBLE_OFF = b'\x1d!\x00'
+ESC_FEED_CUT = b'\n\n\n\x1dVB\x00'
+
+
+def enqueue_order_tickets(order, stations, kind='pedido', round=1):
+    """
+    Queue one ticket per station for ``round`` of ``order``.
+
+    ``stations`` is the set of stations the round touches. Must be
+    called inside the order's transaction; duplicates are ignored.
+    """
+    prefix = f'{kind}-{order.id}' if round == 1 else f'{kind}-{order.id}-r{round}'
+    PrintJob.objects.bulk_create([
+        PrintJob(order=order, station=station, round=round, dedupe_key=f'{prefix}-{station}')
+        for station in sorted(stations)
+    ], ignore_conflicts=True)
+
+
+def render_ticket(job, items):
+    """Plain-text lines for one station's ticket."""
+    order = job.order
+    created_at = timezone.localtime(order.created_at)
+    lines = [
+        f'MESA {order.table.number}',
+        f'Pedido #{order.id} - {job.station.upper()}' + (f' - RONDA {job.round}' if job.round > 1 else ''),
+        f'{created_at:%d/%m/%Y %H:%M} - {order.waiter.username}',
+        '-' * 32,
+    ]
+    for item in items:
+        if item.quantity < 0:
+            lines.append(f'ANULAR {-item.quantity} x {item.menu_item.name}')
+        else:
+            lines.append(f'{item.quantity} x {item.menu_item.name}')
+        if item.notes.strip():
+            lines.append(f'   > {item.notes.strip()}')
+    if order.notes:
+        lines.append('-' * 32)
+        lines.append(f'NOTAS: {order.notes}')
+    return lines
+
+
+def encode_ticket(lines, fmt):
+    if fmt == 'escpos':
+        header, body = lines[0], lines[1:]
+        return (
+            ESC_INIT
+            + ESC_BOLD_ON + ESC_DOUBLE_ON + header.encode('cp858', 'replace') + b'\n'
+            + ESC_DOUBLE_OFF + ESC_BOLD_OFF
+            + '\n'.join(body).encode('cp858', 'replace')
+            + ESC_FEED_CUT
+        )
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+def send_to_sink(url, payload):
+    """Deliver ``payload`` to the sink at ``url``; raises ``OSError`` on failure."""
+    target = urlsplit(url)
+    if target.scheme == 'tcp':
+        with socket.create_connection((target.hostname, target.port or 9100), timeout=TCP_TIMEOUT) as sock:
+            sock.sendall(payload)
+    elif target.scheme == 'file':
+        with open(target.path, 'ab') as fh:
+            fh.write(payload)
+    else:
+        raise OSError(f'Destino de impresión no soportado: {url}')
+
+
+def claim_jobs(batch_size):
+    """Lock and return up to ``batch_size`` due jobs, skipping ones another worker holds."""
+    with transaction.atomic():
+        jobs = list(
+            PrintJob.objects.select_for_update(skip_locked=True)
+                            .filter(status='pending', next_attempt_at__lte=timezone.now())
+                            .select_related('order__table', 'order__waiter', 'order__branch')
+                            .order_by('id')[:batch_size]
+        )
+        # Push them back so a crashed worker's jobs are retried later
+        PrintJob.objects.filter(id__in=[job.id for job in jobs])\
+                        .update(next_attempt_at=timezone.now() + timedelta(seconds=60))
+    return jobs
+
+
+def process_batch(batch_size=20):
+    """Print one batch of due jobs. Returns ``(printed, failed)`` counts."""
+    jobs = claim_jobs(batch_size)
+    if not jobs:
+        return 0, 0
+
+    items_by_order = defaultdict(list)
+    items = OrderItem.objects.filter(order_id__in={job.order_id for job in jobs})\
+                             .select_related('menu_item')\
+                             .order_by('id')
+    for item in items:
+        items_by_order[(item.order_id, item.round, item.menu_item.station)].append(item)
+
+    by_printer = defaultdict(list)
+    for job in jobs:
+        by_printer[(job.order.branch.code, job.station)].append(job)
+
+    printed = failed = 0
+    for (branch_code, station), station_jobs in by_printer.items():
+        payload = b''.join(
+            encode_ticket(render_ticket(job, items_by_order[(job.order_id, job.round, station)]), settings.PRINT_FORMAT)
+            for job in station_jobs
+        )
+        sink = (
+            settings.PRINT_SINKS.get(f'{branch_code}:{station}')
+            or settings.PRINT_SINKS.get(station)
+            or settings.PRINT_SINKS.get('default')
+        )
+        try:
+            if not sink:
+                raise OSError(f'Sin impresora configurada para {station}')
+            send_to_sink(sink, payload)
+        except OSError as exc:
+            _mark_failed(station_jobs, str(exc))
+            failed += len(station_jobs)
+        else:
+            PrintJob.objects.filter(id__in=[job.id for job in station_jobs])\
+                            .update(status='done', printed_at=timezone.now(), last_error='')
+            printed += len(station_jobs)
+    return printed, failed
+
+
+def _mark_failed(jobs, error):
+    now = timezone.now()
+    for job in jobs:
+        job.attempts += 1
+        job.last_error = error
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = 'failed'
+        job.next_attempt_at = now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** job.attempts)
+    PrintJob.objects.bulk_update(jobs, ['attempts', 'last_error', 'status', 'next_attempt_at'])
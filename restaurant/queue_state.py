@@ -0,0 +1,157 @@
+"""
+Kitchen queue change tracking.
+
+A version counter per branch in the cache is bumped whenever that
+branch's kitchen queue changes. Kitchen screens send the last version they saw and long-poll
+until it moves, instead of re-downloading the queue on a fixed interval.
+
+Screens that cannot long-poll (WSGI) are told when to ask again instead:
+``poll_interval`` grows with the time since the queue last changed, from
+``POLL_MIN_SECONDS`` during service to ``POLL_MAX_SECONDS`` when the
+kitchen is idle, so request volume follows activity rather than the
+number of open screens.
+
+A waiting long-poll (``await_wakeup``; the kitchen's and the reception
+board's) is a coroutine parked on an ``asyncio.Event`` of its branch, set by bumps made in the same process (from the event loop or a
+worker thread), so idle screens use no thread and no connection. Bumps
+made by other processes reach it through the shared cache, which is only
+read every ``CROSS_PROCESS_CHECK_SECONDS``. With the default per-process
+cache there are no other processes to hear from and the cache is not
+read at all; configure a shared cache (Redis, Memcached, database) in
+production.
+"""
+
+import asyncio
+import time
+import weakref
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db import transaction
+
+KITCHEN_VERSION_KEY = 'restaurant:kitchen_queue_version:{branch_id}'
+KITCHEN_CHANGED_KEY = 'restaurant:kitchen_queue_changed:{branch_id}'
+
+# How long a kitchen long-poll waits for a change before answering anyway
+LONG_POLL_SECONDS = 25
+# How often a waiting long-poll reads the shared cache for other processes' bumps
+CROSS_PROCESS_CHECK_SECONDS = 5
+
+# Suggested wait between plain polls: idle time / POLL_BACKOFF, within these bounds
+POLL_MIN_SECONDS = 3
+POLL_MAX_SECONDS = 30
+POLL_BACKOFF = 10
+
+
+def get_kitchen_version(branch_id):
+    return cache.get_or_set(KITCHEN_VERSION_KEY.format(branch_id=branch_id), 0, timeout=None)
+
+
+def bump_kitchen_version(branch_id):
+    cache.set(KITCHEN_CHANGED_KEY.format(branch_id=branch_id), time.time(), timeout=None)
+    key = KITCHEN_VERSION_KEY.format(branch_id=branch_id)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key)
+    # Screens woken before the change commits would reload the old queue
+    transaction.on_commit(partial(_wake, branch_id))
+    return version
+
+
+async def aget_kitchen_version(branch_id):
+    return await cache.aget_or_set(KITCHEN_VERSION_KEY.format(branch_id=branch_id), 0, timeout=None)
+
+
+async def abump_kitchen_version(branch_id):
+    await cache.aset(KITCHEN_CHANGED_KEY.format(branch_id=branch_id), time.time(), timeout=None)
+    key = KITCHEN_VERSION_KEY.format(branch_id=branch_id)
+    try:
+        version = await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 1, timeout=None)
+        version = await cache.aget(key)
+    _wake(branch_id)
+    return version
+
+
+# Event loop -> {branch id: event the loop's long-polls on that branch wait on}
+_waiting = weakref.WeakKeyDictionary()
+
+
+def _wake(branch_id):
+    """Wake this process's long-polls on ``branch_id``; callable from any thread."""
+    for loop, events in list(_waiting.items()):
+        event = events.get(branch_id)
+        if event is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(event.set)
+
+
+def wake_all():
+    """Wake this process's long-polls on every branch; callable from any thread."""
+    for loop, events in list(_waiting.items()):
+        if not loop.is_closed():
+            for event in list(events.values()):
+                loop.call_soon_threadsafe(event.set)
+
+
+def _branch_event(loop, branch_id):
+    events = _waiting.setdefault(loop, {})
+    event = events.get(branch_id)
+    # A set event has already woken its waiters; later waits need a new one
+    if event is None or event.is_set():
+        event = events[branch_id] = asyncio.Event()
+    return event
+
+
+def _shared_cache():
+    backend = settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND']
+    return not backend.endswith(('.LocMemCache', '.DummyCache'))
+
+
+def poll_interval(changed_at, now):
+    """Seconds a screen should wait before polling again, given the last queue change."""
+    if changed_at is None:
+        return POLL_MAX_SECONDS
+    return round(min(max((now - changed_at) / POLL_BACKOFF, POLL_MIN_SECONDS), POLL_MAX_SECONDS))
+
+
+async def apoll_interval(branch_id):
+    return poll_interval(await cache.aget(KITCHEN_CHANGED_KEY.format(branch_id=branch_id)), time.time())
+
+
+async def await_wakeup(branch_id, changed, timeout=LONG_POLL_SECONDS):
+    """
+    Wait until the coroutine function ``changed`` returns true or ``timeout`` passes; return whether it did.
+
+    ``changed`` is called again whenever the branch is woken in this process
+    and, with a shared cache, every ``CROSS_PROCESS_CHECK_SECONDS``.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    check_every = CROSS_PROCESS_CHECK_SECONDS if _shared_cache() else timeout
+    while (remaining := deadline - loop.time()) > 0:
+        # Registered before checking, so a wakeup in between is not missed
+        event = _branch_event(loop, branch_id)
+        if await changed():
+            return True
+        try:
+            await asyncio.wait_for(event.wait(), min(remaining, check_every))
+        except asyncio.TimeoutError:
+            pass
+    return False
+
+
+async def await_kitchen_change(branch_id, version, timeout=LONG_POLL_SECONDS):
+    """Wait until the branch's kitchen version differs from ``version`` or ``timeout`` passes."""
+    current = version
+
+    async def changed():
+        nonlocal current
+        current = await aget_kitchen_version(branch_id)
+        return current != version
+
+    await await_wakeup(branch_id, changed, timeout)
+    return current
@@ -0,0 +1,134 @@
+"""
+Read-replica routing for reporting queries.
+
+Reporting views (reception, daily report, audit log, admin dashboard) are
+decorated with ``@read_from_replica`` so their read queries go to the
+``replica`` database alias; other code can wrap a block in
+``with replica_reads():``. Every other read, and every write, goes to
+``default`` (the primary). The decorator only wraps sync views: an async
+view decorated with it would return its coroutine before running any
+query, so async views (the live reception board, the kitchen queue)
+read from the primary.
+
+To keep read-your-writes consistency, ``ReplicaPinningMiddleware`` pins a
+client to the primary for ``REPLICA_PIN_SECONDS`` after it performs a
+mutation (any successful non-GET request), so a waiter or cook never reads
+stale data right after changing it.
+
+The router is only enabled when ``REPLICA_DATABASE_URL`` is set. For local
+testing, two SQLite files can stand in for primary and replica::
+
+    cp db.sqlite3 replica.sqlite3
+    REPLICA_DATABASE_URL=sqlite:///replica.sqlite3 python manage.py runserver
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE_NAME = 'abba_pin_primary'
+
+_use_replica = ContextVar('abba_use_replica', default=False)
+_pinned_to_primary = ContextVar('abba_pinned_to_primary', default=False)
+
+
+def replica_available():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def replica_reads():
+    """Route reads inside the block to the replica unless pinned to primary."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def read_from_replica(view_func):
+    """View decorator sending the view's read queries to the replica."""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        with replica_reads():
+            return view_func(request, *args, **kwargs)
+    return _wrapped_view
+
+
+class PrimaryReplicaRouter:
+    """Send annotated reporting reads to the replica; everything else to primary."""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and not _pinned_to_primary.get() and replica_available():
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pin clients to the primary for a few seconds after they write.
+
+    The pin is carried in a short-lived cookie so it works across gunicorn
+    workers without shared state.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _pinned_to_primary.set(self._is_pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned_to_primary.reset(token)
+        return self._pin_after_write(request, response)
+
+    async def __acall__(self, request):
+        token = _pinned_to_primary.set(self._is_pinned(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned_to_primary.reset(token)
+        return self._pin_after_write(request, response)
+
+    def _is_pinned(self, request):
+        pinned_until = request.COOKIES.get(PIN_COOKIE_NAME)
+        try:
+            return pinned_until is not None and float(pinned_until) > time.time()
+        except ValueError:
+            return False
+
+    def _pin_after_write(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE_NAME,
+                str(time.time() + seconds),
+                max_age=seconds,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,228 @@
+"""
+Table suggestions for hosts and time-to-free estimates for occupied tables.
+
+Each worker keeps a small index per branch with the tables grouped by
+capacity class: free tables sorted by number, occupied ones in the order
+they were seated. A suggestion walks the capacity classes (a handful per
+restaurant) from the smallest one that fits the party, so it costs the
+same however many tables are taken and never touches order history.
+
+``send_order`` and ``toggle_table_availability`` update the worker's own
+index in place and bump a version in the cache. Other workers notice the
+new version and rebuild theirs from the branch's tables and open orders.
+The kitchen bumps it too when an order is ready, since a party still
+waiting for food is not about to leave.
+
+The expected stay per capacity class is the median of recent
+``TableSession`` rows, which are recorded whenever a table is freed.
+"""
+
+import statistics
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Order, Table, TableSession
+
+SEATING_VERSION_KEY = 'restaurant:seating_version:{branch_id}'
+DURATIONS_CACHE_KEY = 'restaurant:seat_durations:{branch_id}'
+DURATIONS_TIMEOUT = 3600
+
+# Seat durations are taken from the latest sessions within this window
+HISTORY_DAYS = 60
+HISTORY_LIMIT = 2000
+MIN_SAMPLES = 5
+
+# Stay assumed for a capacity class without enough history
+DEFAULT_BASE_MINUTES = 60
+DEFAULT_MINUTES_PER_SEAT = 5
+
+# A party still waiting for its food stays at least this long
+OPEN_ORDER_MINUTES = 20
+OPEN_STATUSES = ('not_taken', 'preparing')
+
+
+class SeatingIndex:
+    """Tables of one branch by capacity class, as of ``version``."""
+
+    def __init__(self, version, tables, open_tables, durations):
+        self.version = version
+        self.durations = durations
+        self.open_tables = set(open_tables)
+        self.capacities = sorted({table['capacity'] for table in tables})
+        self.free = {capacity: [] for capacity in self.capacities}
+        self.occupied = {capacity: {} for capacity in self.capacities}
+        self.tables = {}
+        now = timezone.now()
+        for table in sorted(tables, key=lambda table: (table['occupied_since'] or now, table['number'])):
+            self.tables[table['id']] = (table['number'], table['capacity'])
+            if table['is_available']:
+                self.free[table['capacity']].append((table['number'], table['id']))
+            else:
+                self.occupied[table['capacity']][table['id']] = (table['occupied_since'] or now).timestamp()
+        for free in self.free.values():
+            free.sort()
+
+    def occupy(self, table_id, since, open_order=False):
+        if table_id not in self.tables:
+            return False
+        number, capacity = self.tables[table_id]
+        free = self.free[capacity]
+        position = bisect_left(free, (number, table_id))
+        if position < len(free) and free[position][1] == table_id:
+            del free[position]
+            self.occupied[capacity][table_id] = since.timestamp()
+        if open_order:
+            self.open_tables.add(table_id)
+        return True
+
+    def release(self, table_id):
+        if table_id not in self.tables:
+            return False
+        number, capacity = self.tables[table_id]
+        if self.occupied[capacity].pop(table_id, None) is not None:
+            insort(self.free[capacity], (number, table_id))
+        self.open_tables.discard(table_id)
+        return True
+
+    def expected_seconds(self, capacity):
+        minutes = self.durations.get(capacity, DEFAULT_BASE_MINUTES + DEFAULT_MINUTES_PER_SEAT * capacity)
+        return minutes * 60
+
+    def time_to_free(self, table_id, now):
+        """Estimated seconds until ``table_id`` is free; 0 if it already is."""
+        if table_id not in self.tables:
+            return None
+        capacity = self.tables[table_id][1]
+        since = self.occupied[capacity].get(table_id)
+        if since is None:
+            return 0
+        remaining = self.expected_seconds(capacity) - (now.timestamp() - since)
+        if table_id in self.open_tables:
+            remaining = max(remaining, OPEN_ORDER_MINUTES * 60)
+        return max(int(remaining), 0)
+
+    def suggest(self, party_size, now):
+        """
+        Best-fit table for ``party_size``.
+
+        The smallest free table that seats the party, or else the fitting
+        table expected to free up first. ``None`` if no table is big enough.
+        """
+        fitting = self.capacities[bisect_left(self.capacities, party_size):]
+        for capacity in fitting:
+            if self.free[capacity]:
+                number, table_id = self.free[capacity][0]
+                return {'table_id': table_id, 'number': number, 'capacity': capacity, 'wait_seconds': 0}
+        best = None
+        for capacity in fitting:
+            # The longest-seated party of a class is the first one expected to leave
+            table_id = next(iter(self.occupied[capacity]), None)
+            if table_id is None:
+                continue
+            wait = self.time_to_free(table_id, now)
+            if best is None or wait < best['wait_seconds']:
+                best = {
+                    'table_id': table_id, 'number': self.tables[table_id][0],
+                    'capacity': capacity, 'wait_seconds': wait,
+                }
+        return best
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_version(branch_id):
+    return cache.get_or_set(SEATING_VERSION_KEY.format(branch_id=branch_id), 0, timeout=None)
+
+
+def bump_version(branch_id):
+    key = SEATING_VERSION_KEY.format(branch_id=branch_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+        return cache.get(key)
+
+
+async def abump_version(branch_id):
+    key = SEATING_VERSION_KEY.format(branch_id=branch_id)
+    try:
+        return await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 1, timeout=None)
+        return await cache.aget(key)
+
+
+def get_index(branch_id):
+    """The worker's index for ``branch_id``, rebuilt if another worker changed seating."""
+    version = get_version(branch_id)
+    with _lock:
+        index = _indexes.get(branch_id)
+    if index is None or index.version != version:
+        index = build_index(branch_id, version)
+        with _lock:
+            _indexes[branch_id] = index
+    return index
+
+
+def build_index(branch_id, version):
+    tables = list(Table.objects.for_branch(branch_id).values(
+        'id', 'number', 'capacity', 'is_available', 'occupied_since'
+    ))
+    open_tables = Order.objects.for_branch(branch_id)\
+                               .filter(status__in=OPEN_STATUSES)\
+                               .values_list('table_id', flat=True)\
+                               .distinct()
+    return SeatingIndex(version, tables, open_tables, seat_durations(branch_id))
+
+
+def seat_durations(branch_id):
+    """Median stay in minutes per capacity class, for classes with enough history."""
+    key = DURATIONS_CACHE_KEY.format(branch_id=branch_id)
+    durations = cache.get(key)
+    if durations is None:
+        since = timezone.now() - timedelta(days=HISTORY_DAYS)
+        sessions = TableSession.objects.filter(branch_id=branch_id, ended_at__gte=since)\
+                                       .order_by('-ended_at')\
+                                       .values_list('capacity', 'started_at', 'ended_at')[:HISTORY_LIMIT]
+        by_capacity = defaultdict(list)
+        for capacity, started_at, ended_at in sessions:
+            by_capacity[capacity].append((ended_at - started_at).total_seconds() / 60)
+        durations = {
+            capacity: round(statistics.median(minutes))
+            for capacity, minutes in by_capacity.items() if len(minutes) >= MIN_SAMPLES
+        }
+        cache.set(key, durations, timeout=DURATIONS_TIMEOUT)
+    return durations
+
+
+def _apply(branch_id, version, change):
+    # Only an index that saw every earlier change can take this one in place;
+    # anything else is rebuilt on its next use
+    with _lock:
+        index = _indexes.get(branch_id)
+        if index is not None and index.version == version - 1 and change(index):
+            index.version = version
+
+
+def table_occupied(branch_id, table_id, since):
+    """A waiter sent an order for the table. Call after the order commits."""
+    _apply(branch_id, bump_version(branch_id), lambda index: index.occupy(table_id, since, open_order=True))
+
+
+async def atable_occupied(branch_id, table_id, since):
+    """A waiter marked the table occupied by hand. Call after the change commits."""
+    # Whatever orders it still has count as open, as in build_index
+    open_order = await Order.objects.for_branch(branch_id)\
+                                    .filter(table_id=table_id, status__in=OPEN_STATUSES).aexists()
+    _apply(branch_id, await abump_version(branch_id), lambda index: index.occupy(table_id, since, open_order=open_order))
+
+
+async def atable_freed(branch_id, table_id):
+    _apply(branch_id, await abump_version(branch_id), lambda index: index.release(table_id))
@@ -0,0 +1,352 @@
+"""
+Synthetic restaurant data for benchmarks and capacity tests.
+
+``seed_restaurant`` creates branches, tables, a menu and staff, then
+generates orders over the last ``days`` days:
+
+- Days are weighted by weekday (busier Friday and Saturday) and each
+  order's time of day is drawn from a lunch/dinner mixture.
+- Dishes follow a Zipf-like popularity curve, so a few are ordered a lot
+  and most rarely.
+- Every order gets the audit log entries the views would have written.
+
+Order and item ids are assigned up front, so the days can be split into
+contiguous ranges and written by several processes at once. Each batch
+of orders, items and audit logs is one ``bulk_create`` transaction.
+"""
+
+import multiprocessing
+import time as time_module
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from restaurante_abba.db_profiles import SQLITE_BUSY_TIMEOUT
+
+from . import board, inventory, menu_search, seating
+from .models import ArchivedOrder, ArchivedOrderItem, AuditLog, Branch, MenuCategory, MenuItem, Order, OrderItem, Table, UserProfile, DEFAULT_BRANCH_ID
+
+SECONDS_PER_DAY = 86400
+
+# Relative traffic Monday..Sunday
+WEEKDAY_WEIGHTS = np.array([0.8, 0.85, 0.9, 1.0, 1.35, 1.5, 1.1])
+
+# Time of day mixture: (weight, mean hour, standard deviation in hours)
+SERVICE_PEAKS = [
+    (0.15, 9.5, 1.0),
+    (0.45, 13.5, 1.2),
+    (0.40, 20.75, 1.5),
+]
+
+# Orders created this recently may still be open in the kitchen
+OPEN_ORDER_SECONDS = 3 * 3600
+ORDER_FLOW = ('preparing', 'ready', 'delivered')
+
+MAX_ITEMS_PER_ORDER = 8
+ZIPF_EXPONENT = 1.1
+
+DISHES = [
+    'Pizza', 'Pasta', 'Ensalada', 'Lomo', 'Pollo', 'Salmón', 'Risotto', 'Hamburguesa',
+    'Empanada', 'Ceviche', 'Sopa', 'Tarta', 'Sándwich', 'Tabla', 'Costillar', 'Gnocchi',
+]
+STYLES = [
+    'de la casa', 'al pil pil', 'a lo pobre', 'napolitana', 'con champiñones', 'especial',
+    'vegetariana', 'picante', 'al pesto', 'a la parrilla', 'con queso', 'mediterránea',
+]
+DRINKS = ['Jugo', 'Limonada', 'Pisco sour', 'Vino', 'Cerveza', 'Café', 'Té', 'Bebida']
+NOTES = ['sin cebolla', 'bien cocido', 'sin sal', 'para compartir', 'extra queso', 'sin gluten']
+
+
+def seed_catalog(branches, tables, menu_items, waiters, rng, cooks=2):
+    """
+    Create branches, tables, menu items, waiters and cooks.
+
+    ``rng`` is a ``random.Random``. Returns ``{branch_id: {'tables': [(id,
+    number)], 'menu': [ids], 'garzon': [user ids], 'cocinero': [user ids]}}``.
+    """
+    if branches == 1:
+        branch_objs = [Branch.objects.get(pk=DEFAULT_BRANCH_ID)]
+    else:
+        branch_objs = [
+            Branch.objects.get_or_create(code=f'sucursal-{i}', defaults={'name': f'Sucursal {i}'})[0]
+            for i in range(1, branches + 1)
+        ]
+
+    password = make_password(None)
+    catalog = {}
+    for branch in branch_objs:
+        first_number = (Table.objects.for_branch(branch).aggregate(Max('number'))['number__max'] or 0) + 1
+        Table.objects.bulk_create([
+            Table(branch=branch, number=number, capacity=rng.choice([2, 4, 4, 4, 6, 8]))
+            for number in range(first_number, first_number + tables)
+        ], batch_size=1000)
+
+        categories = {
+            station: MenuCategory.objects.get_or_create(branch=branch, name=name, defaults={'position': position})[0]
+            for position, (station, name) in enumerate((('cocina', 'Platos'), ('bar', 'Bebidas')))
+        }
+        items = []
+        for i in range(menu_items):
+            if rng.random() < 0.2:
+                name, station, price = f'{rng.choice(DRINKS)} {i}', 'bar', rng.randint(2, 8)
+            else:
+                name, station, price = f'{rng.choice(DISHES)} {rng.choice(STYLES)} {i}', 'cocina', rng.randint(6, 25)
+            # bulk_create skips MenuItem.save(), which fills search_name
+            items.append(MenuItem(branch=branch, category=categories[station], name=name,
+                                  search_name=menu_search.normalize(name), station=station, price=price))
+        MenuItem.objects.bulk_create(items, batch_size=1000)
+
+        for role, count in (('garzon', waiters), ('cocinero', cooks)):
+            prefix = f'seed_{branch.code}_{role}_'
+            start = User.objects.filter(username__startswith=prefix).count()
+            users = User.objects.bulk_create([
+                User(username=f'{prefix}{i}', password=password)
+                for i in range(start, start + count)
+            ], batch_size=1000)
+            # bulk_create skips the post_save signal that creates profiles
+            users = User.objects.filter(username__in=[user.username for user in users])
+            UserProfile.objects.bulk_create([
+                UserProfile(user=user, role=role, branch=branch) for user in users
+            ], batch_size=1000)
+
+        catalog[branch.id] = {
+            'tables': list(Table.objects.for_branch(branch).values_list('id', 'number')),
+            'menu': list(MenuItem.objects.for_branch(branch).values_list('id', flat=True)),
+        }
+        for role in ('garzon', 'cocinero'):
+            catalog[branch.id][role] = list(
+                UserProfile.objects.for_branch(branch).filter(role=role).values_list('user_id', flat=True)
+            )
+    # bulk_create skips the signals that drop the cached menu and seating index
+    inventory.invalidate_menu(*catalog)
+    for branch_id in catalog:
+        seating.bump_version(branch_id)
+    return catalog
+
+
+def plan_orders(total_orders, days, seed):
+    """
+    Split ``total_orders`` over the last ``days`` days (today included).
+
+    Returns the first day, the order count per day and the item count per
+    order, which is what fixes every order and item id before any work
+    is handed out.
+    """
+    rng = np.random.default_rng(seed)
+    first_day = timezone.localdate() - timedelta(days=days - 1)
+    weekdays = (first_day.weekday() + np.arange(days)) % 7
+    weights = WEEKDAY_WEIGHTS[weekdays]
+    per_day = rng.multinomial(total_orders, weights / weights.sum())
+    items_per_order = np.minimum(1 + rng.poisson(1.6, total_orders), MAX_ITEMS_PER_ORDER)
+    return first_day, per_day, items_per_order
+
+
+def split_work(per_day, items_per_order, first_order_id, first_item_id, workers):
+    """Cut the days into ``workers`` contiguous ranges with balanced order counts."""
+    order_offsets = np.concatenate([[0], np.cumsum(per_day)])
+    item_offsets = np.concatenate([[0], np.cumsum(items_per_order)])
+    targets = np.linspace(0, order_offsets[-1], workers + 1)
+    cuts = np.unique(np.searchsorted(order_offsets, targets))
+    cuts[0], cuts[-1] = 0, len(per_day)
+    ranges = []
+    for start_day, end_day in zip(cuts[:-1], cuts[1:]):
+        first_order = order_offsets[start_day]
+        last_order = order_offsets[end_day]
+        if last_order == first_order:
+            continue
+        ranges.append({
+            'start_day': int(start_day),
+            'end_day': int(end_day),
+            'first_order_id': first_order_id + int(first_order),
+            'first_item_id': first_item_id + int(item_offsets[first_order]),
+            'per_day': per_day[start_day:end_day].tolist(),
+            'items_per_order': items_per_order[first_order:last_order].tolist(),
+        })
+    return ranges
+
+
+def _time_of_day(rng, count):
+    weights = np.array([peak[0] for peak in SERVICE_PEAKS])
+    peak = rng.choice(len(SERVICE_PEAKS), size=count, p=weights / weights.sum())
+    means = np.array([p[1] for p in SERVICE_PEAKS])[peak]
+    spreads = np.array([p[2] for p in SERVICE_PEAKS])[peak]
+    hours = np.clip(rng.normal(means, spreads), 7, 23.99)
+    return (hours * 3600).astype(np.int64)
+
+
+def write_range(work, first_day, catalog, batch_size, audit, seed):
+    """Generate and insert the orders of one day range. Returns (orders, items, audit logs)."""
+    rng = np.random.default_rng([seed, work['start_day']])
+    now = timezone.now()
+    branches = list(catalog)
+    menus = []
+    for branch_id in branches:
+        ranks = np.arange(1, len(catalog[branch_id]['menu']) + 1)
+        popularity = np.cumsum(1 / ranks ** ZIPF_EXPONENT)
+        # Shuffle so popularity is not tied to creation order
+        menus.append((rng.permutation(catalog[branch_id]['menu']), popularity / popularity[-1]))
+
+    order_id = work['first_order_id']
+    item_id = work['first_item_id']
+    first_order = 0
+    totals = [0, 0, 0]
+    pending = ([], [], [])
+
+    for offset, count in enumerate(work['per_day']):
+        day = first_day + timedelta(days=work['start_day'] + offset)
+        midnight = timezone.make_aware(datetime.combine(day, time.min))
+        # All random draws for the day at once; the loop below only builds rows
+        seconds = _time_of_day(rng, count)
+        until_now = int((now - midnight).total_seconds())
+        future = seconds > until_now
+        # Today's orders end now
+        seconds[future] = np.maximum(until_now - rng.integers(0, OPEN_ORDER_SECONDS, future.sum()), 0)
+        seconds.sort()
+        open_order = (until_now - seconds <= OPEN_ORDER_SECONDS)
+        steps = np.where(open_order, rng.integers(0, 4, count), 3)
+        changes = np.minimum(seconds[:, None] + np.cumsum(rng.integers(60, 1200, (count, 3)), axis=1), until_now)
+        order_branch = rng.integers(len(branches), size=count)
+        picks = rng.random((count, 4))
+        order_note = rng.random(count) < 0.05
+
+        n_items = np.asarray(work['items_per_order'][first_order:first_order + count])
+        first_order += count
+        item_branch = np.repeat(order_branch, n_items)
+        item_menu = np.empty(len(item_branch), dtype=np.int64)
+        for index, (menu, cdf) in enumerate(menus):
+            mask = item_branch == index
+            item_menu[mask] = menu[np.minimum(np.searchsorted(cdf, rng.random(mask.sum())), len(menu) - 1)]
+        item_quantity = np.where(rng.random(len(item_branch)) < 0.8, 1, rng.integers(2, 4, len(item_branch)))
+        item_note = rng.random(len(item_branch)) < 0.08
+        item_starts = np.concatenate([[0], np.cumsum(n_items)])
+
+        rows = zip(
+            seconds.tolist(), order_branch.tolist(), picks.tolist(), steps.tolist(), changes.tolist(),
+            order_note.tolist(), item_starts[:-1].tolist(), item_starts[1:].tolist(),
+        )
+        item_menu, item_quantity, item_note = item_menu.tolist(), item_quantity.tolist(), item_note.tolist()
+        for second, branch_index, pick, step, changed, noted, start, end in rows:
+            entry = catalog[branches[branch_index]]
+            table_id, table_number = entry['tables'][int(pick[0] * len(entry['tables']))]
+            waiter_id = entry['garzon'][int(pick[1] * len(entry['garzon']))]
+            cook_id = entry['cocinero'][int(pick[2] * len(entry['cocinero']))]
+            created_at = midnight + timedelta(seconds=second)
+            history = [
+                (status, midnight + timedelta(seconds=changed[i]))
+                for i, status in enumerate(ORDER_FLOW[:step])
+            ]
+
+            pending[0].append(Order(
+                id=order_id, branch_id=branches[branch_index], table_id=table_id, waiter_id=waiter_id,
+                created_at=created_at,
+                status=history[-1][0] if history else 'not_taken',
+                status_changed_at=history[-1][1] if history else None,
+                ready_round=1 if step >= 2 else 0,
+                notes=NOTES[int(pick[3] * len(NOTES))] if noted else '',
+            ))
+            for i in range(start, end):
+                pending[1].append(OrderItem(
+                    id=item_id, order_id=order_id, menu_item_id=item_menu[i], quantity=item_quantity[i],
+                    notes=NOTES[i % len(NOTES)] if item_note[i] else '',
+                ))
+                item_id += 1
+            if audit:
+                pending[2].append(AuditLog(
+                    user_id=waiter_id, action='Crear pedido', timestamp=created_at,
+                    details=f'Pedido {order_id} para mesa {table_number}',
+                    event='order_created', entity_type='order', entity_id=order_id,
+                ))
+                for status, changed_at in history:
+                    # Only the kitchen's changes are logged by the views
+                    if status != 'delivered':
+                        pending[2].append(AuditLog(
+                            user_id=cook_id, action=f'Cambiar estado pedido a {status}',
+                            timestamp=changed_at, details=f'Pedido {order_id}',
+                            event='order_status_changed', entity_type='order', entity_id=order_id,
+                        ))
+            order_id += 1
+
+            if len(pending[0]) >= batch_size:
+                _flush(pending, totals)
+    _flush(pending, totals)
+    return tuple(totals)
+
+
+def _flush(pending, totals):
+    orders, items, logs = pending
+    if not orders:
+        return
+    with transaction.atomic():
+        Order.objects.bulk_create(orders)
+        OrderItem.objects.bulk_create(items, batch_size=len(orders))
+        AuditLog.objects.bulk_create(logs, batch_size=len(orders))
+    totals[0] += len(orders)
+    totals[1] += len(items)
+    totals[2] += len(logs)
+    for rows in pending:
+        rows.clear()
+
+
+def _worker(args):
+    # Runs in a forked child: never reuse the parent's connections
+    connections.close_all()
+    if connection.vendor == 'sqlite':
+        # Workers take turns on SQLite's single write lock
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT * 1000}')
+    try:
+        return write_range(*args)
+    finally:
+        connections.close_all()
+
+
+def _next_id(*models):
+    return max(model.objects.aggregate(Max('id'))['id__max'] or 0 for model in models) + 1
+
+
+def seed_orders(catalog, orders, days, batch_size=5000, workers=1, audit=True, seed=0, progress=None):
+    """Generate ``orders`` orders over ``days`` days. Returns (orders, items, audit logs)."""
+    # Archived rows keep their ids and analytics merges both tables by id
+    first_order_id = _next_id(Order, ArchivedOrder)
+    first_item_id = _next_id(OrderItem, ArchivedOrderItem)
+    first_day, per_day, items_per_order = plan_orders(orders, days, seed)
+    # Several ranges per worker so the progress output keeps moving
+    ranges = split_work(per_day, items_per_order, first_order_id, first_item_id, max(workers * 4, 1))
+    jobs = [(work, first_day, catalog, batch_size, audit, seed) for work in ranges]
+
+    totals = [0, 0, 0]
+    started = time_module.perf_counter()
+
+    def report(result):
+        for i, value in enumerate(result):
+            totals[i] += value
+        if progress:
+            progress(totals, time_module.perf_counter() - started)
+
+    if workers > 1:
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            for result in pool.imap_unordered(_worker, jobs):
+                report(result)
+    else:
+        for job in jobs:
+            report(write_range(*job))
+
+    # Explicit ids leave PostgreSQL sequences behind; they must also stay
+    # past archived ids, which sequence_reset_sql does not look at
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for model, archived in ((Order, ArchivedOrder), (OrderItem, ArchivedOrderItem)):
+                cursor.execute(
+                    "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, false)",
+                    [model._meta.db_table, _next_id(model, archived)],
+                )
+    # Seeded orders log no events
+    board.invalidate()
+    return tuple(totals)
+
@@ -1,3 +1,284 @@
-from django.test import TestCase
+import json
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.db.models import F
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import analytics, audit, board, closing, events
+from .models import AuditLog, DayClose, Ingredient, MenuItem, Order, RecipeIngredient, Table
+
+
+# Every thread posts as the same device; only stock may turn orders away
+@override_settings(THROTTLE_RATES={})
+class StockConcurrencyTests(TransactionTestCase):
+    """Many waiters ordering the last portions of the same ingredient at once."""
+
+    # Keeps the default branch created by the migrations across the flushes
+    serialized_rollback = True
+    threads = 8
+    orders_per_thread = 10
+    stock = 25
+
+    def setUp(self):
+        self.waiter = User.objects.create_user('garzon_stock', password='x')
+        self.waiter.userprofile.role = 'garzon'
+        self.waiter.userprofile.save()
+        self.table = Table.objects.create(number=1)
+        self.ingredient = Ingredient.objects.create(name='Masa', stock=self.stock)
+        self.pizza = MenuItem.objects.create(name='Pizza', price=10)
+        self.calzone = MenuItem.objects.create(name='Calzone', price=12)
+        RecipeIngredient.objects.create(menu_item=self.pizza, ingredient=self.ingredient, quantity=1)
+        RecipeIngredient.objects.create(menu_item=self.calzone, ingredient=self.ingredient, quantity=2)
+
+    def post_orders(self, payload):
+        url = reverse('send_order', args=[self.table.id])
+        results = [[] for _ in range(self.threads)]
+
+        def waiter(index):
+            client = Client(HTTP_HOST='127.0.0.1')
+            client.force_login(self.waiter)
+            for _ in range(self.orders_per_thread):
+                results[index].append(client.post(url, payload).status_code)
+            connections.close_all()
+
+        workers = [threading.Thread(target=waiter, args=(i,)) for i in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return [status for statuses in results for status in statuses]
+
+    def test_concurrent_orders_never_oversell(self):
+        statuses = self.post_orders({'item_id_0': self.pizza.id, 'quantity_0': 1})
+
+        self.assertEqual(statuses.count(302), self.stock)
+        self.assertEqual(statuses.count(409), self.threads * self.orders_per_thread - self.stock)
+        self.assertEqual(Order.objects.count(), self.stock)
+        self.ingredient.refresh_from_db()
+        self.assertEqual(self.ingredient.stock, 0)
+
+    def test_exhausted_items_become_unavailable(self):
+        statuses = self.post_orders({'item_id_0': self.calzone.id, 'quantity_0': 1})
+
+        # Two units per calzone: twelve fit, the last unit is not enough for another
+        self.assertEqual(statuses.count(302), self.stock // 2)
+        self.ingredient.refresh_from_db()
+        self.assertEqual(self.ingredient.stock, Decimal(1))
+        self.calzone.refresh_from_db()
+        self.pizza.refresh_from_db()
+        self.assertFalse(self.calzone.available)
+        self.assertTrue(self.pizza.available)
+
+    def test_rejected_order_leaves_stock_untouched(self):
+        Ingredient.objects.filter(id=self.ingredient.id).update(stock=1)
+        client = Client(HTTP_HOST='127.0.0.1')
+        client.force_login(self.waiter)
+
+        response = client.post(reverse('send_order', args=[self.table.id]), {
+            'item_id_0': self.pizza.id, 'quantity_0': 1,
+            'item_id_1': self.calzone.id, 'quantity_1': 1,
+        })
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
+        self.ingredient.refresh_from_db()
+        self.assertEqual(self.ingredient.stock, 1)
+
+
+class ReceptionBoardTests(TestCase):
+    """The live board must add up to the same figures as the daily report."""
+
+    def setUp(self):
+        self.staff = {}
+        for role in ('garzon', 'cocinero', 'recepcion'):
+            user = User.objects.create_user(f'{role}_board', password='x')
+            user.userprofile.role = role
+            user.userprofile.save()
+            self.staff[role] = Client(HTTP_HOST='127.0.0.1')
+            self.staff[role].force_login(user)
+        self.tables = [Table.objects.create(number=number) for number in (1, 2)]
+        self.pizza = MenuItem.objects.create(name='Pizza', price=Decimal('10.50'))
+        self.juice = MenuItem.objects.create(name='Jugo', price=3)
+        board.invalidate()
+
+    def test_board_reconciles_with_report(self):
+        board_data = reverse('reception_board_data')
+        self.assertEqual(self.staff['recepcion'].get(board_data).json()['orders'], 0)
+        for table in self.tables:
+            self.staff['garzon'].post(reverse('send_order', args=[table.id]), {
+                'item_id_0': self.pizza.id, 'quantity_0': 2, 'item_id_1': self.juice.id, 'quantity_1': 1,
+            })
+        order = Order.objects.first()
+        self.staff['cocinero'].post(
+            reverse('update_order_status', args=[order.id]),
+            json.dumps({'status': 'ready'}), content_type='application/json',
+        )
+        # Reports price orders at current prices
+        self.juice.price = 4
+        with self.captureOnCommitCallbacks(execute=True):
+            self.juice.save()
+
+        data = self.staff['recepcion'].get(board_data).json()
+        self.assertEqual((data['orders'], data['total']), (2, '50.00'))
+        self.assertEqual([bucket['status'] for bucket in data['by_status']], ['not_taken', 'ready'])
+        call_command('reconcile_reception', stdout=StringIO())
+
+    def test_amendment_adds_round_to_open_order(self):
+        table = self.tables[0]
+        self.staff['garzon'].post(reverse('send_order', args=[table.id]), {'item_id_0': self.pizza.id, 'quantity_0': 2})
+        order = Order.objects.get()
+        self.staff['cocinero'].post(
+            reverse('update_order_status', args=[order.id]),
+            json.dumps({'status': 'ready'}), content_type='application/json',
+        )
+        amend = reverse('amend_order', args=[order.id])
+        response = self.staff['garzon'].post(amend, {'void_item_id_0': self.pizza.id, 'void_quantity_0': 3})
+        self.assertEqual(response.status_code, 409)
+        self.staff['garzon'].post(amend, {
+            'item_id_0': self.juice.id, 'quantity_0': 1, 'void_item_id_0': self.pizza.id, 'void_quantity_0': 1,
+        })
+
+        # Still one order, back in the queue with only the new round's lines
+        order.refresh_from_db()
+        self.assertEqual((Order.objects.count(), order.status, order.round), (1, 'not_taken', 2))
+        queued = self.staff['cocinero'].get(reverse('kitchen_queue_data')).json()['orders']
+        self.assertEqual(
+            [(item['menu_item_name'], item['quantity'], item['round']) for item in queued[0]['items']],
+            [('Jugo', 1, 2), ('Pizza', -1, 2)],
+        )
+        self.assertEqual(order.print_jobs.filter(round=2).count(), 1)
+
+        data = self.staff['recepcion'].get(reverse('reception_board_data')).json()
+        self.assertEqual(data['total'], '13.50')
+        self.assertEqual(data['by_table'], [{'table_number': table.number, 'orders': 1, 'total': '13.50'}])
+        call_command('reconcile_reception', stdout=StringIO())
+
+
+    def test_history_follows_amendments(self):
+        table = self.tables[0]
+        self.staff['garzon'].post(reverse('send_order', args=[table.id]), {'item_id_0': self.pizza.id, 'quantity_0': 2})
+        order = Order.objects.get()
+        # Settled, so the snapshot takes it
+        earlier = timezone.now() - timedelta(seconds=analytics.SETTLE_SECONDS + 60)
+        Order.objects.filter(id=order.id).update(created_at=earlier)
+        Table.objects.filter(id=table.id).update(occupied_since=earlier)
+        history = analytics.OrderHistory()
+        history.refresh()
+        self.assertEqual(history.item_quantity.sum(), 2)
+
+        self.staff['garzon'].post(reverse('amend_order', args=[order.id]), {
+            'item_id_0': self.juice.id, 'quantity_0': 1, 'void_item_id_0': self.pizza.id, 'void_quantity_0': 1,
+        })
+        history.refresh()
+        self.assertEqual((len(history.order_id), history.item_quantity.sum()), (1, 2))
+        self.assertAlmostEqual(history.item_revenue.sum(), 10.50 + 3)
+
+class DayCloseTests(TestCase):
+    """Closing a day and serving its report from the snapshot."""
+
+    def setUp(self):
+        self.report_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.report_dir.cleanup)
+        settings_override = override_settings(DAY_CLOSE_DIR=self.report_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.staff = {}
+        for role in ('garzon', 'recepcion'):
+            user = User.objects.create_user(f'{role}_close', password='x')
+            user.userprofile.role = role
+            user.userprofile.save()
+            self.staff[role] = Client(HTTP_HOST='127.0.0.1')
+            self.staff[role].force_login(user)
+        self.table = Table.objects.create(number=1)
+        self.pizza = MenuItem.objects.create(name='Pizza', price=Decimal('10.50'))
+
+    def test_close_day(self):
+        self.staff['garzon'].post(reverse('send_order', args=[self.table.id]), {'item_id_0': self.pizza.id, 'quantity_0': 2})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.staff['recepcion'].post(reverse('close_day')).status_code, 302)
+        self.assertEqual(self.staff['recepcion'].post(reverse('close_day')).status_code, 409)
+
+        close = DayClose.objects.get()
+        self.assertEqual((close.orders, close.total), (1, Decimal('21.00')))
+        self.assertEqual(close.summary['by_dish'], [{'dish': 'Pizza', 'quantity': 2, 'total': '21.00'}])
+        order = Order.objects.get()
+        self.assertEqual(order.status, 'delivered')
+        self.table.refresh_from_db()
+        self.assertTrue(self.table.is_available)
+        # Event consumers see the close like any other change
+        closed = events.read(settled=False)[-2:]
+        self.assertEqual(
+            [(event['kind'], event['order_id'], event['data'].get('status')) for event in closed],
+            [('order_status_changed', order.id, 'delivered'), ('table_freed', None, None)],
+        )
+
+    def test_past_day_report_comes_from_snapshot(self):
+        self.staff['garzon'].post(reverse('send_order', args=[self.table.id]), {'item_id_0': self.pizza.id, 'quantity_0': 1})
+        yesterday = timezone.localdate() - timedelta(days=1)
+        Order.objects.update(created_at=timezone.now() - timedelta(days=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('close_day', date=str(yesterday), stdout=StringIO())
+
+        # Later changes do not alter a closed day's report
+        self.pizza.price = 99
+        self.pizza.save()
+        response = self.staff['recepcion'].get(reverse('download_daily_report'), {'date': str(yesterday)})
+        self.assertTrue(response.streaming)
+        with open(f'{self.report_dir.name}/{DayClose.objects.get().report_file}', 'rb') as fh:
+            self.assertEqual(b''.join(response.streaming_content), fh.read())
+        # A past day closed from the command leaves the current tables alone
+        self.table.refresh_from_db()
+        self.assertFalse(self.table.is_available)
+
+    def test_orders_after_close_refresh_the_snapshot(self):
+        order_url = reverse('send_order', args=[self.table.id])
+        self.staff['garzon'].post(order_url, {'item_id_0': self.pizza.id, 'quantity_0': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.staff['recepcion'].post(reverse('close_day'))
+        self.staff['garzon'].post(order_url, {'item_id_0': self.pizza.id, 'quantity_0': 2})
+        # The next morning
+        Order.objects.update(created_at=F('created_at') - timedelta(days=1))
+        DayClose.objects.update(day=F('day') - timedelta(days=1), closed_at=F('closed_at') - timedelta(days=1))
+
+        yesterday = timezone.localdate() - timedelta(days=1)
+        response = self.staff['recepcion'].get(reverse('download_daily_report'), {'date': str(yesterday)})
+        self.assertEqual(response.status_code, 200)
+        close = DayClose.objects.get()
+        self.assertEqual((close.orders, close.total), (2, Decimal('31.50')))
+        self.assertIsNotNone(close.refreshed_at)
+        self.assertFalse(closing.is_stale(close))
+
+
+class AuditLogSearchTests(TestCase):
+    """Searching the audit log by entity and by words."""
+
+    def test_find_order_history(self):
+        waiter = User.objects.create_user('garzon_audit', password='x')
+        waiter.userprofile.role = 'garzon'
+        waiter.userprofile.save()
+        client = Client(HTTP_HOST='127.0.0.1')
+        client.force_login(waiter)
+        table = Table.objects.create(number=7)
+        pizza = MenuItem.objects.create(name='Pizza', price=Decimal('10.50'))
+        client.post(reverse('send_order', args=[table.id]), {'item_id_0': pizza.id, 'quantity_0': 1})
+        order = Order.objects.get()
+        client.post(reverse('amend_order', args=[order.id]), {'item_id_0': pizza.id, 'quantity_0': 1})
+
+        logs = audit.find(AuditLog.objects.all(), f'pedido {order.id}')
+        self.assertEqual(sorted(logs.values_list('event', flat=True)), ['order_amended', 'order_created'])
+        # The same through the full-text index, which follows edits
+        self.assertEqual(audit.find(AuditLog.objects.all(), 'ronda').count(), 1)
+        AuditLog.objects.filter(event='order_amended').update(details='anulación')
+        self.assertEqual(audit.find(AuditLog.objects.all(), 'ronda').count(), 0)
+        self.assertEqual(audit.find(AuditLog.objects.all(), 'ANULACION').count(), 1)
+        self.assertEqual(audit.find(AuditLog.objects.all(), f'mesa {table.number}', day=timezone.localdate()).count(), 1)
@@ -0,0 +1,122 @@
+"""
+Per-device throttling for the tablet endpoints.
+
+Every user and device gets a token bucket per scope in the cache: a burst
+of ``capacity`` requests, refilled at ``rate`` requests per second
+(``settings.THROTTLE_RATES``). A request that finds its bucket empty is
+answered 429 with ``Retry-After`` before the view runs, so a stuck or
+misbehaving tablet cannot hammer the database; the pages wait that long
+before trying again.
+
+Devices are told apart by a long-lived cookie set on their first request
+to a throttled view (tablets of one restaurant usually share the
+server-facing IP), falling back to the client address for clients that drop cookies. The
+cookie is signed and its id chosen by the server: a client making up a
+new id on each request would get a full bucket each time, whereas
+without a valid cookie it shares its address's bucket, which also paces
+how fast it can collect new ids. The
+bucket is read and written without a lock: two simultaneous requests from
+one device may both take the last token, which is close enough for
+keeping a runaway client in check. Like the other cached state this needs
+a shared cache once there is more than one worker.
+"""
+
+import math
+import time
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from . import metrics
+from .api import JsonResponse
+
+THROTTLE_CACHE_KEY = 'restaurant:throttle:{scope}:{user_id}:{device}'
+DEVICE_COOKIE = 'abba_device'
+DEVICE_COOKIE_MAX_AGE = 365 * 24 * 3600
+DEVICE_COOKIE_SALT = 'restaurant.throttling'
+
+
+def take(bucket, capacity, rate, now):
+    """
+    Take one token from ``bucket`` (``(tokens, updated_at)`` or ``None`` for full).
+
+    Returns the new bucket and the seconds to wait, 0 if the token was taken.
+    """
+    tokens, updated_at = bucket or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / rate
+
+
+def device_cookie(device):
+    """The value of the device cookie for ``device``."""
+    return signing.get_cookie_signer(salt=DEVICE_COOKIE + DEVICE_COOKIE_SALT).sign(device)
+
+
+def _signed_device(request):
+    return request.get_signed_cookie(DEVICE_COOKIE, default=None, salt=DEVICE_COOKIE_SALT)
+
+
+def device_id(request):
+    return _signed_device(request) or request.META.get('REMOTE_ADDR', '')
+
+
+def _key(scope, user, request):
+    return THROTTLE_CACHE_KEY.format(scope=scope, user_id=user.pk, device=device_id(request))
+
+
+def _throttled(scope, wait):
+    metrics.request_throttled(scope)
+    retry_after = max(math.ceil(wait), 1)
+    response = JsonResponse(
+        {'error': 'Demasiadas solicitudes, intente nuevamente en unos segundos', 'retry_after': retry_after},
+        status=429,
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def _remember_device(request, response):
+    if _signed_device(request) is None:
+        response.set_signed_cookie(DEVICE_COOKIE, uuid.uuid4().hex, salt=DEVICE_COOKIE_SALT,
+                                   max_age=DEVICE_COOKIE_MAX_AGE, httponly=True, samesite='Lax')
+    return response
+
+
+def throttle(scope):
+    """
+    View decorator limiting each user and device to the ``scope`` rate.
+
+    Goes below ``login_required``. Scopes missing from
+    ``settings.THROTTLE_RATES`` are not limited.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                rate = settings.THROTTLE_RATES.get(scope)
+                if rate is not None:
+                    key = _key(scope, await request.auser(), request)
+                    bucket, wait = take(await cache.aget(key), *rate, time.time())
+                    await cache.aset(key, bucket, timeout=math.ceil(rate[0] / rate[1]) + 1)
+                    if wait:
+                        return _remember_device(request, _throttled(scope, wait))
+                return _remember_device(request, await view_func(request, *args, **kwargs))
+        else:
+            @wraps(view_func)
+            def _wrapped_view(request, *args, **kwargs):
+                rate = settings.THROTTLE_RATES.get(scope)
+                if rate is not None:
+                    key = _key(scope, request.user, request)
+                    bucket, wait = take(cache.get(key), *rate, time.time())
+                    cache.set(key, bucket, timeout=math.ceil(rate[0] / rate[1]) + 1)
+                    if wait:
+                        return _remember_device(request, _throttled(scope, wait))
+                return _remember_device(request, view_func(request, *args, **kwargs))
+        return _wrapped_view
+    return decorator
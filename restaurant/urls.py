@@ -1,17 +1,30 @@
 from django.urls import path
 from . import views
+from .views import lazy_view
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('select-table/', views.select_table, name='select_table'),
+    path('suggest-table/', views.suggest_table, name='suggest_table'),
     path('menu/<int:table_id>/', views.menu, name='menu'),
+    path('menu-section/<int:category_id>/', views.menu_section, name='menu_section'),
+    path('menu-search/', views.search_menu, name='search_menu'),
     path('send-order/<int:table_id>/', views.send_order, name='send_order'),
+    path('amend-order/<int:order_id>/', views.amend_order, name='amend_order'),
     path('toggle-table/<int:table_id>/', views.toggle_table_availability, name='toggle_table'),
     path('kitchen-queue/', views.kitchen_queue, name='kitchen_queue'),
+    path('kitchen-queue-data/', views.kitchen_queue_data, name='kitchen_queue_data'),
     path('update-order-status/<int:order_id>/', views.update_order_status, name='update_order_status'),
     path('admin-users/', views.admin_users, name='admin_users'),
+    path('order-events/', views.order_events, name='order_events'),
     path('audit-log/', views.audit_log, name='audit_log'),
     path('register/', views.register, name='register'),
     path('reception/', views.reception, name='reception'),
-    path('download-daily-report/', views.download_daily_report, name='download_daily_report'),
+    path('reception-board-data/', views.reception_board_data, name='reception_board_data'),
+    path('close-day/', views.close_day, name='close_day'),
+    path('download-daily-report/', lazy_view('download_daily_report'), name='download_daily_report'),
+    path('export-history/', lazy_view('export_history'), name='export_history'),
+    path('analytics/', lazy_view('analytics_dashboard'), name='analytics_dashboard'),
+    path('prep-forecast/', lazy_view('prep_forecast'), name='prep_forecast'),
+    path('analytics/<str:report>/', lazy_view('analytics_data'), name='analytics_data'),
 ]
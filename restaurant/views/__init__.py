@@ -0,0 +1,75 @@
+"""
+Views for the Restaurante ABBA application, one submodule per area:
+
+- ``accounts``: register, home
+- ``waiter``: select_table, suggest_table, menu, menu_section, search_menu, send_order,
+  amend_order, toggle_table_availability
+- ``kitchen``: kitchen_queue, kitchen_queue_data, update_order_status
+- ``staff``: admin_users, audit_log
+- ``reception``: reception, reception_board_data, close_day, download_daily_report
+- ``reports``: export_history, analytics_dashboard, analytics_data, prep_forecast
+- ``feed``: order_events
+- ``monitoring``: metrics_view
+
+Submodules are imported on first use: ``views.home`` loads ``accounts``
+only, and ``lazy_view`` lets a URLconf route to a view without importing
+its module until a request needs it. Check what a worker loads at boot
+with ``python manage.py profile_startup``.
+"""
+
+from importlib import import_module
+
+VIEW_MODULES = {
+    'register': 'accounts',
+    'home': 'accounts',
+    'select_table': 'waiter',
+    'suggest_table': 'waiter',
+    'menu': 'waiter',
+    'menu_section': 'waiter',
+    'search_menu': 'waiter',
+    'send_order': 'waiter',
+    'amend_order': 'waiter',
+    'toggle_table_availability': 'waiter',
+    'kitchen_queue': 'kitchen',
+    'kitchen_queue_data': 'kitchen',
+    'update_order_status': 'kitchen',
+    'admin_users': 'staff',
+    'audit_log': 'staff',
+    'reception': 'reception',
+    'reception_board_data': 'reception',
+    'close_day': 'reception',
+    'download_daily_report': 'reception',
+    'export_history': 'reports',
+    'analytics_dashboard': 'reports',
+    'analytics_data': 'reports',
+    'prep_forecast': 'reports',
+    'order_events': 'feed',
+    'metrics_view': 'monitoring',
+}
+
+
+def __getattr__(name):
+    module = VIEW_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    return getattr(import_module(f'{__name__}.{module}'), name)
+
+
+def lazy_view(name):
+    """
+    URLconf entry for the sync view ``name`` that imports its module on the first request.
+
+    Async views must be routed directly: Django decides how to call a
+    view from the function it is given, before this wrapper could load it.
+    """
+    view = None
+
+    def lazy(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = __getattr__(name)
+        return view(request, *args, **kwargs)
+
+    lazy.__name__ = lazy.__qualname__ = name
+    lazy.__module__ = f'{__name__}.{VIEW_MODULES[name]}'
+    return lazy
@@ -0,0 +1,96 @@
+"""Registration and the role-based landing page."""
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth import login
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.shortcuts import redirect, render
+
+from ..models import AuditLog, RegistrationPIN, UserProfile
+
+
+def register(request):
+    """
+    Handle user registration with PIN-based role assignment.
+
+    Allows new users to register using a generated PIN that determines their role.
+    After successful registration, automatically logs in the user and redirects to home.
+    """
+    if request.method == 'POST':
+        username = request.POST.get('username')
+        password = request.POST.get('password')
+        pin = request.POST.get('pin')
+
+        if not username or not password or not pin:
+            messages.error(request, 'Todos los campos son requeridos')
+            return render(request, 'restaurant/register.html')
+
+        try:
+            pin_obj = RegistrationPIN.objects.get(pin=pin, uses__lt=2)
+        except RegistrationPIN.DoesNotExist:
+            messages.error(request, 'PIN inválido o agotado')
+            return render(request, 'restaurant/register.html')
+
+        if User.objects.filter(username=username).exists():
+            messages.error(request, 'Usuario ya existe')
+            return render(request, 'restaurant/register.html')
+
+        user = User.objects.create_user(username=username, password=password)
+
+        # Assign role based on PIN
+        role_mapping = {
+            'garzon': 'garzon',
+            'cocinero': 'cocinero',
+            'admin': 'admin',
+            'recepcion': 'recepcion'
+        }
+        user.userprofile.role = role_mapping.get(pin_obj.role, 'garzon')
+        user.userprofile.branch_id = pin_obj.branch_id
+        user.userprofile.save()
+
+        pin_obj.uses += 1
+        pin_obj.save()
+
+        # Log audit
+        AuditLog.objects.create(
+            user=user,
+            action='Registro de usuario',
+            details=f'Usuario {username} registrado con rol {user.userprofile.role}',
+            event='user_registered', entity_type='user', entity_id=user.id,
+        )
+
+        messages.success(request, 'Usuario registrado exitosamente')
+        login(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
+        return redirect('home')
+
+    return render(request, 'restaurant/register.html')
+
+
+@login_required
+def home(request):
+    """
+    Main dashboard view that redirects users to their role-specific page.
+
+    Ensures UserProfile exists for the user and redirects based on their role.
+    Superusers are redirected to Django admin.
+    """
+    # Ensure UserProfile exists
+    UserProfile.objects.get_or_create(user=request.user, defaults={'role': 'garzon'})
+
+    # If superuser, redirect to Django admin
+    if request.user.is_superuser:
+        return redirect('/admin/')
+
+    role_redirects = {
+        'garzon': 'select_table',
+        'cocinero': 'kitchen_queue',
+        'admin': 'admin_users',
+        'recepcion': 'reception'
+    }
+
+    redirect_url = role_redirects.get(request.user.userprofile.role)
+    if redirect_url:
+        return redirect(redirect_url)
+    else:
+        return render(request, 'restaurant/home.html', {'message': 'Rol no reconocido'})
@@ -0,0 +1,28 @@
+"""Helpers shared by the view modules."""
+
+from django.contrib.auth.models import User
+from django.http import Http404
+
+from ..models import UserProfile
+
+
+async def aprofile(request):
+    """
+    Async-safe lookup of the current user's ``(role, branch_id)``.
+
+    ``request.user.userprofile`` would hit the database synchronously, which
+    is not allowed inside async views.
+    """
+    user = await request.auser()
+    # CachedModelBackend hands out users with their profile attached
+    if User.userprofile.is_cached(user):
+        return user.userprofile.role, user.userprofile.branch_id
+    profile = await UserProfile.objects.filter(user_id=user.pk).values_list('role', 'branch_id').afirst()
+    return profile or (None, None)
+
+
+async def aget_or_404(model, **kwargs):
+    try:
+        return await model.objects.aget(**kwargs)
+    except model.DoesNotExist:
+        raise Http404(f'{model._meta.verbose_name} no encontrado')
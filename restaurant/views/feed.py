@@ -0,0 +1,30 @@
+"""Incremental order event feed for displays and other consumers."""
+
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_GET
+
+from .. import events
+from ..api import JsonResponse
+from ..throttling import throttle
+
+
+@login_required
+@throttle('poll')
+@require_GET
+def order_events(request):
+    """
+    API endpoint with the branch's order events after a cursor.
+
+    Pass the ``cursor`` from the previous answer as ``after`` (0 to start
+    from the beginning); ``limit`` caps the batch size.
+    """
+    if request.user.userprofile.role not in ['garzon', 'cocinero', 'admin', 'recepcion']:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    try:
+        after = int(request.GET.get('after', 0))
+        limit = min(int(request.GET.get('limit', events.READ_LIMIT)), events.READ_LIMIT)
+    except ValueError:
+        return JsonResponse({'error': 'Parámetros inválidos'}, status=400)
+
+    batch = events.read(after=after, branch_id=request.user.userprofile.branch_id, limit=limit)
+    return JsonResponse({'events': batch, 'cursor': batch[-1]['seq'] if batch else after})
@@ -0,0 +1,170 @@
+"""Kitchen queue page, its data endpoint and order status changes."""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import F, Prefetch
+from django.http import Http404
+from django.shortcuts import redirect, render
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from .. import events, metrics, queue_state, seating
+from ..api import JsonResponse
+from ..models import AuditLog, Order, OrderItem
+from ..throttling import throttle
+from .common import aprofile
+
+
+@login_required
+def kitchen_queue(request):
+    """
+    Display kitchen queue with pending orders.
+
+    Shows orders that are not taken or in preparation, grouped by items.
+    """
+    if request.user.userprofile.role not in ['cocinero', 'admin']:
+        return redirect('home')
+
+    orders = _queued_orders(request.user.userprofile.branch_id)
+    for order in orders:
+        order.grouped_items = _grouped_items(order)
+
+    return render(request, 'restaurant/kitchen_queue.html', {'orders': orders})
+
+
+def _queued_orders(branch_id):
+    # Rounds up to ready_round are done; the kitchen only sees what came after
+    pending_items = OrderItem.objects.filter(round__gt=F('order__ready_round'))\
+                                     .select_related('menu_item')\
+                                     .order_by('round', 'id')
+    return Order.objects.for_branch(branch_id)\
+                        .filter(status__in=['not_taken', 'preparing'])\
+                        .select_related('table')\
+                        .prefetch_related(Prefetch('items', queryset=pending_items))\
+                        .order_by('created_at')
+
+
+def _grouped_items(order):
+    """Pending lines of ``order`` summed by round, product and notes; voids stay separate negative lines."""
+    grouped_items = {}
+    for item in order.items.all():
+        key = (item.round, item.menu_item.id, item.notes.strip(), item.quantity < 0)
+        if key not in grouped_items:
+            grouped_items[key] = {
+                'menu_item_name': item.menu_item.name, 'quantity': 0,
+                'notes': item.notes.strip(), 'round': item.round,
+            }
+        grouped_items[key]['quantity'] += item.quantity
+    return list(grouped_items.values())
+
+
+@login_required
+@throttle('poll')
+@require_GET
+async def kitchen_queue_data(request):
+    """
+    API endpoint for kitchen queue data.
+
+    Returns JSON data for AJAX updates of the kitchen queue. Each order
+    lists only the lines of rounds not marked ready yet, tagged with their
+    ``round``, so an amended order shows just what was added. Under ASGI,
+    passing the last seen ``version`` turns the request into a long-poll
+    that only answers once the queue changes (or after a timeout), so idle
+    kitchen screens hold a cheap coroutine instead of re-polling. Otherwise
+    ``poll_after`` tells the screen how many seconds to wait, longer the
+    longer the queue has been quiet.
+    """
+    role, branch_id = await aprofile(request)
+    if role not in ['cocinero', 'admin']:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+
+    version = await queue_state.aget_kitchen_version(branch_id)
+    long_poll = isinstance(request, ASGIRequest)
+    if long_poll and request.GET.get('version') == str(version):
+        version = await queue_state.await_kitchen_change(branch_id, version)
+
+    data = []
+    async for order in _queued_orders(branch_id):
+        data.append({
+            'id': order.id,
+            'table_number': order.table.number,
+            # Local wall-clock time; the screen shows it as is
+            'created_at': timezone.localtime(order.created_at).isoformat(timespec='seconds'),
+            'status': order.status,
+            'status_display': order.get_status_display(),
+            'notes': order.notes,
+            'round': order.round,
+            'items': _grouped_items(order),
+        })
+    poll_after = 0 if long_poll else await queue_state.apoll_interval(branch_id)
+    return JsonResponse({'orders': data, 'version': version, 'long_poll': long_poll, 'poll_after': poll_after})
+
+
+@login_required
+@throttle('order_status')
+async def update_order_status(request, order_id):
+    """
+    Update order status (preparing or ready).
+
+    Allows kitchen staff to change order status and logs the action.
+    """
+    role, branch_id = await aprofile(request)
+    if role not in ['cocinero', 'admin']:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            new_status = data.get('status')
+            if new_status not in ['preparing', 'ready']:
+                return JsonResponse({'error': 'Estado inválido'}, status=400)
+
+            previous, now = await sync_to_async(_change_status)(branch_id, order_id, new_status, await request.auser())
+            entered_at = previous['status_changed_at'] or previous['created_at']
+            metrics.order_status_changed(previous['status'], new_status, (now - entered_at).total_seconds())
+            await queue_state.abump_kitchen_version(branch_id)
+            if new_status == 'ready':
+                # Served parties are closer to leaving
+                await seating.abump_version(branch_id)
+
+            return JsonResponse({'success': True})
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Datos JSON inválidos'}, status=400)
+        except Http404:
+            raise
+        except Exception as e:
+            return JsonResponse({'error': 'Error interno del servidor'}, status=500)
+
+    return JsonResponse({'error': 'Método no permitido'}, status=405)
+
+
+@transaction.atomic
+def _change_status(branch_id, order_id, new_status, user):
+    """Move an order to ``new_status`` with its audit log and event. Returns the previous state and the time."""
+    orders = Order.objects.for_branch(branch_id).filter(id=order_id)
+    previous = orders.select_for_update().values('status', 'created_at', 'status_changed_at', 'table_id').first()
+    if previous is None:
+        raise Http404('Pedido no encontrado')
+    now = timezone.now()
+    if new_status == 'ready':
+        # Rounds added later come back as new work
+        orders.update(status=new_status, status_changed_at=now, ready_round=F('round'))
+    else:
+        orders.update(status=new_status, status_changed_at=now)
+
+    # Log audit
+    AuditLog.objects.create(
+        user=user,
+        action=f'Cambiar estado pedido a {new_status}',
+        details=f'Pedido {order_id}',
+        event='order_status_changed', entity_type='order', entity_id=order_id,
+    )
+    events.record(
+        'order_status_changed', branch_id, order_id=order_id, table_id=previous['table_id'],
+        status=new_status, previous_status=previous['status'],
+    )
+    return previous, now
@@ -0,0 +1,22 @@
+"""Prometheus scrape endpoint."""
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from .. import metrics
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint in text exposition format.
+
+    Open to scrapers unless ``METRICS_TOKEN`` is set, in which case the
+    request must carry it as a bearer token.
+    """
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=403)
+    payload, content_type = metrics.render_latest()
+    return HttpResponse(payload, content_type=content_type)
@@ -0,0 +1,138 @@
+"""Reception dashboard, its live board data, the day close and the daily Excel report."""
+
+import os
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse
+from django.shortcuts import redirect, render
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
+
+from .. import archive, board, closing, queue_state
+from ..api import JsonResponse
+from ..models import DayClose
+from ..routers import read_from_replica
+from ..throttling import throttle
+from .common import aprofile
+
+RECENT_CLOSES = 7
+
+
+@login_required
+@read_from_replica
+def reception(request):
+    """
+    Reception dashboard with the day's running totals.
+
+    Shows today's orders and sales, overall, by status and by waiter, from
+    the live board; the page then follows it through ``reception_board_data``.
+    Also lists the last day closes, whose reports download instantly.
+    """
+    if request.user.userprofile.role != 'recepcion':
+        return redirect('home')
+
+    branch_id = request.user.userprofile.branch_id
+    summary = board.summary(board.get_board(branch_id))
+    closes = list(DayClose.objects.filter(branch_id=branch_id).select_related('closed_by')[:RECENT_CLOSES])
+    today = timezone.localdate()
+    return render(request, 'restaurant/reception.html', {
+        'board': summary,
+        'total_general': summary['total'],
+        'today_close': next((close for close in closes if close.day == today), None),
+        'closes': closes,
+    })
+
+
+
+@login_required
+@require_POST
+def close_day(request):
+    """
+    Close today for the user's branch.
+
+    Delivers the open orders, frees the tables and stores the day's
+    snapshot and report (see ``closing``).
+    """
+    if request.user.userprofile.role != 'recepcion':
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    try:
+        closing.close_day(request.user.userprofile.branch_id, timezone.localdate(), request.user)
+    except closing.AlreadyClosed as exc:
+        return JsonResponse({'error': str(exc)}, status=409)
+    return redirect('reception')
+
+
+@login_required
+@throttle('poll')
+@require_GET
+async def reception_board_data(request):
+    """
+    API endpoint for the live reception board.
+
+    Under ASGI, passing the last seen ``seq`` turns the request into a
+    long-poll that answers once an order changes (or after a timeout);
+    otherwise ``poll_after`` suggests when to ask again.
+    """
+    role, branch_id = await aprofile(request)
+    if role != 'recepcion':
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+
+    # Read before the board, so a change made while it is read still ends the wait
+    generation = await board.aget_generation()
+    version = await queue_state.aget_kitchen_version(branch_id)
+    current = await sync_to_async(board.get_board)(branch_id)
+    long_poll = isinstance(request, ASGIRequest)
+    if long_poll and request.GET.get('seq') == str(current['seq']):
+        await board.await_change(branch_id, generation, version)
+        current = await sync_to_async(board.get_board)(branch_id)
+    poll_after = 0 if long_poll else await queue_state.apoll_interval(branch_id)
+    return JsonResponse({**board.summary(current), 'long_poll': long_poll, 'poll_after': poll_after})
+
+
+@login_required
+@read_from_replica
+def download_daily_report(request):
+    """
+    Generate and download daily sales report as Excel file.
+
+    Creates an Excel spreadsheet with the orders and totals of the day given
+    in the ``date`` query parameter (YYYY-MM-DD), today by default. Past
+    days that were closed are answered with the report saved at close
+    time, recomputed first if orders were taken after the close; others
+    are computed from the orders, archived ones included.
+    """
+    if request.user.userprofile.role != 'recepcion':
+        return redirect('home')
+
+    try:
+        report_date = date.fromisoformat(request.GET['date']) if request.GET.get('date') else timezone.localdate()
+    except ValueError:
+        return JsonResponse({'error': 'Fecha inválida'}, status=400)
+
+    filename = f'reporte_diario_{report_date}.xlsx'
+    branch_id = request.user.userprofile.branch_id
+    wb = None
+    # Today keeps taking orders after a close; only finished days come from the snapshot
+    if report_date < timezone.localdate():
+        close = DayClose.objects.filter(branch_id=branch_id, day=report_date).first()
+        if close is not None and closing.is_stale(close):
+            wb = closing.refresh(close)
+        elif close is not None and os.path.exists(closing.report_path(close.report_file)):
+            return FileResponse(open(closing.report_path(close.report_file), 'rb'),
+                                as_attachment=True, filename=filename)
+
+    if wb is None:
+        # Totals are computed in the database and rows are streamed with
+        # .iterator() (server-side cursor on PostgreSQL) to keep memory bounded.
+        wb = closing.build_report(archive.orders_for_day(report_date, branch_id))
+
+    # Response
+    response = HttpResponse(
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    wb.save(response)
+    return response
@@ -0,0 +1,123 @@
+"""
+History exports, sales analytics and the prep forecast.
+
+These pull in NumPy (and pyarrow when installed) and serve a handful of
+admin requests a day, so ``restaurant.urls`` routes to them through
+``lazy_view`` and a worker only imports this module when one is requested.
+"""
+
+import os
+import tempfile
+import zipfile
+from datetime import date
+
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_GET
+
+from .. import analytics, exports, forecasting
+from ..api import JsonResponse
+from ..routers import read_from_replica
+
+
+@login_required
+@require_GET
+@read_from_replica
+def export_history(request):
+    """
+    Download order history for a date range as a ZIP of compressed files.
+
+    Accepts optional ``start`` and ``end`` (YYYY-MM-DD) query parameters.
+    Parquet is used when pyarrow is installed, gzip CSV otherwise.
+    """
+    if request.user.userprofile.role != 'admin':
+        return redirect('home')
+
+    try:
+        start = analytics.parse_date(request.GET.get('start'))
+        end = analytics.parse_date(request.GET.get('end'))
+    except ValueError:
+        return JsonResponse({'error': 'Fecha inválida'}, status=400)
+
+    archive = tempfile.TemporaryFile()
+    with tempfile.TemporaryDirectory() as directory:
+        manifest = exports.export_history(directory, start=start, end=end)
+        # Parts are already compressed, so they are stored as-is.
+        with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_STORED) as zf:
+            zf.write(os.path.join(directory, exports.MANIFEST_NAME), exports.MANIFEST_NAME)
+            for part in manifest['parts']:
+                zf.write(os.path.join(directory, part['file']), part['file'])
+    archive.seek(0)
+
+    filename = f"historial_{start or 'inicio'}_{end or date.today()}.zip"
+    return FileResponse(archive, as_attachment=True, filename=filename, content_type='application/zip')
+
+
+
+@login_required
+def analytics_dashboard(request):
+    """
+    Sales trends dashboard for administrators.
+
+    The page loads its data from the analytics JSON endpoints.
+    """
+    if request.user.userprofile.role != 'admin':
+        return redirect('home')
+    return render(request, 'restaurant/analytics.html')
+
+
+@login_required
+@require_GET
+@read_from_replica
+def analytics_data(request, report):
+    """
+    API endpoint for historical sales aggregates.
+
+    Accepts optional ``start`` and ``end`` (YYYY-MM-DD) query parameters.
+    """
+    if request.user.userprofile.role != 'admin':
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+
+    report_func = analytics.REPORTS.get(report)
+    if report_func is None:
+        return JsonResponse({'error': 'Reporte no encontrado'}, status=404)
+
+    try:
+        start = analytics.parse_date(request.GET.get('start'))
+        end = analytics.parse_date(request.GET.get('end'))
+    except ValueError:
+        return JsonResponse({'error': 'Fecha inválida'}, status=400)
+
+    return JsonResponse({'report': report, 'rows': report_func(start=start, end=end)})
+
+
+@login_required
+@require_GET
+@read_from_replica
+def prep_forecast(request):
+    """
+    Mise-en-place plan for a day: expected covers and dish portions per service window.
+
+    Accepts optional ``date`` (YYYY-MM-DD, default tomorrow) and ``method``
+    query parameters.
+    """
+    if request.user.userprofile.role != 'admin':
+        return redirect('home')
+
+    method = request.GET.get('method', forecasting.METHODS[0])
+    if method not in forecasting.METHODS:
+        method = forecasting.METHODS[0]
+    error = None
+    try:
+        day = analytics.parse_date(request.GET.get('date')) or forecasting.default_day()
+    except ValueError:
+        error = 'Fecha inválida'
+        day = forecasting.default_day()
+
+    return render(request, 'restaurant/prep_forecast.html', {
+        'forecast': forecasting.forecast(day, method=method),
+        'day': day,
+        'method': method,
+        'error': error,
+    })
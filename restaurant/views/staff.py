@@ -0,0 +1,84 @@
+"""Branch administration: users, registration PINs and the audit log."""
+
+import random
+import string
+from datetime import date
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect, render
+
+from .. import audit
+from ..models import AuditLog, RegistrationPIN, UserProfile
+from ..routers import read_from_replica
+
+AUDIT_LOG_LIMIT = 200
+
+
+@login_required
+def admin_users(request):
+    """
+    Admin interface for user management.
+
+    Displays users and PINs, allows generating new registration PINs.
+    """
+    if request.user.userprofile.role != 'admin':
+        return redirect('home')
+
+    branch_id = request.user.userprofile.branch_id
+    users = UserProfile.objects.for_branch(branch_id)
+    pins = RegistrationPIN.objects.filter(branch_id=branch_id).order_by('-created_at')
+
+    if request.method == 'POST':
+        role = request.POST.get('role')
+        if role in ['garzon', 'cocinero', 'admin', 'recepcion']:
+            pin = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+            registration_pin = RegistrationPIN.objects.create(
+                pin=pin, role=role, created_by=request.user, branch_id=branch_id
+            )
+            messages.success(request, f'PIN generado: {pin} para rol {role}')
+
+            # Log audit
+            AuditLog.objects.create(
+                user=request.user,
+                action='Generar PIN de registro',
+                details=f'PIN {pin} para rol {role}',
+                event='pin_created', entity_type='pin', entity_id=registration_pin.id,
+            )
+        else:
+            messages.error(request, 'Rol inválido')
+        return redirect('admin_users')
+
+    return render(request, 'restaurant/admin_users.html', {'users': users, 'pins': pins})
+
+
+@login_required
+@read_from_replica
+def audit_log(request):
+    """
+    Display audit log for administrative review.
+
+    Shows the latest logged actions in reverse chronological order,
+    narrowed by the optional ``q`` (words, or "pedido 42"), ``evento`` and
+    ``fecha`` (YYYY-MM-DD) query parameters. See ``audit.find``.
+    """
+    if request.user.userprofile.role != 'admin':
+        return redirect('home')
+
+    query = request.GET.get('q', '').strip()
+    event = request.GET.get('evento', '')
+    try:
+        # Not analytics.parse_date: importing analytics loads numpy at boot
+        day = date.fromisoformat(request.GET['fecha']) if request.GET.get('fecha') else None
+    except ValueError:
+        messages.error(request, 'Fecha inválida')
+        day = None
+    logs = audit.find(AuditLog.objects.select_related('user'), query, event=event, day=day)
+    return render(request, 'restaurant/audit_log.html', {
+        'logs': logs.order_by('-timestamp')[:AUDIT_LOG_LIMIT],
+        'limit': AUDIT_LOG_LIMIT,
+        'query': query,
+        'event': event,
+        'day': day,
+        'events': AuditLog._meta.get_field('event').choices,
+    })
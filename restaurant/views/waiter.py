@@ -0,0 +1,425 @@
+"""Waiter views: tables, the menu, menu search, and sending and amending orders."""
+
+from collections import defaultdict
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.http import Http404
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from .. import events, inventory, menu_search, metrics, printing, queue_state, seating
+from ..api import JsonResponse
+from ..models import AuditLog, MenuItem, Order, OrderItem, Table, TableSession
+from ..throttling import throttle
+from .common import aget_or_404, aprofile
+
+
+@login_required
+def select_table(request):
+    """
+    Display available tables for order placement.
+
+    Accessible by waiters and admins. Shows all tables with their availability
+    status and, for occupied ones, the estimated minutes until they free up.
+    With a ``party`` size in the query string the best-fit table is suggested.
+    """
+    if request.user.userprofile.role not in ['garzon', 'admin']:
+        return redirect('home')
+    branch_id = request.user.userprofile.branch_id
+    index = seating.get_index(branch_id)
+    now = timezone.now()
+    tables = list(Table.objects.for_branch(branch_id))
+    for table in tables:
+        if not table.is_available:
+            table.minutes_to_free = _minutes(index.time_to_free(table.id, now))
+
+    party = _party_size(request)
+    suggestion = index.suggest(party, now) if party else None
+    if suggestion:
+        suggestion['wait_minutes'] = _minutes(suggestion['wait_seconds'])
+    return render(request, 'restaurant/select_table.html', {
+        'tables': tables,
+        'party': party,
+        'suggestion': suggestion,
+    })
+
+
+@login_required
+@require_GET
+def suggest_table(request):
+    """
+    API endpoint with the best-fit table for a ``party`` size.
+
+    Answers from the in-memory seating index; ``table`` is null when no
+    table of the branch seats the party.
+    """
+    if request.user.userprofile.role not in ['garzon', 'admin']:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    party = _party_size(request)
+    if not party:
+        return JsonResponse({'error': 'Cantidad de comensales inválida'}, status=400)
+    index = seating.get_index(request.user.userprofile.branch_id)
+    return JsonResponse({'party': party, 'table': index.suggest(party, timezone.now())})
+
+
+def _party_size(request):
+    try:
+        party = int(request.GET.get('party', ''))
+    except ValueError:
+        return None
+    return party if party > 0 else None
+
+
+def _minutes(seconds):
+    return -(-seconds // 60) if seconds is not None else None
+
+
+@login_required
+def menu(request, table_id):
+    """
+    Display menu for a specific table.
+
+    Shows the menu categories with the items of the first one; the page
+    loads the others from ``menu_section`` as the waiter opens them. When
+    the party at the table has an open order, the cart amends it instead
+    of sending a new one, and its lines can be voided.
+    """
+    if request.user.userprofile.role not in ['garzon', 'admin']:
+        return redirect('home')
+    branch_id = request.user.userprofile.branch_id
+    table = get_object_or_404(Table.objects.for_branch(branch_id), id=table_id)
+    sections = inventory.menu_sections(branch_id)
+    order = open_order(table)
+    order_lines = []
+    if order is not None:
+        order_lines = OrderItem.objects.filter(order=order)\
+                                       .values('menu_item_id', name=F('menu_item__name'))\
+                                       .annotate(quantity=Sum('quantity'))\
+                                       .filter(quantity__gt=0)\
+                                       .order_by('name')
+    return render(request, 'restaurant/menu.html', {
+        'table': table,
+        'order': order,
+        'order_lines': order_lines,
+        'sections': [{'id': section['id'], 'name': section['name'], 'count': len(section['items'])} for section in sections],
+        'products': sections[0]['items'] if sections else [],
+    })
+
+
+@login_required
+@require_GET
+def menu_section(request, category_id):
+    """API endpoint with the available items of one menu category (0 for uncategorised items)."""
+    if request.user.userprofile.role not in ['garzon', 'admin']:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    for section in inventory.menu_sections(request.user.userprofile.branch_id):
+        if section['id'] == category_id:
+            return JsonResponse({'id': section['id'], 'name': section['name'], 'items': section['items']})
+    return JsonResponse({'error': 'Categoría no encontrada'}, status=404)
+
+
+@login_required
+@require_GET
+def search_menu(request):
+    """API endpoint searching the available menu by name, for the ``q`` query parameter."""
+    if request.user.userprofile.role not in ['garzon', 'admin']:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    query = request.GET.get('q', '')
+    return JsonResponse({'query': query, 'items': menu_search.search(request.user.userprofile.branch_id, query)})
+
+
+@login_required
+@throttle('send_order')
+async def send_order(request, table_id):
+    """
+    Process order submission for a table.
+
+    Creates a new order with selected items, marks table as occupied,
+    and logs the action in audit log.
+    """
+    role, branch_id = await aprofile(request)
+    if role not in ['garzon', 'admin']:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+
+    if request.method == 'POST':
+        items = _posted_items(request.POST)
+        notes = request.POST.get('order_notes', '')
+
+        if not items:
+            return JsonResponse({'error': 'No hay ítems en el pedido'}, status=400)
+
+        table = await aget_or_404(Table, id=table_id, branch_id=branch_id)
+        stations = await _price_items(branch_id, items)
+
+        user = await request.auser()
+        try:
+            await sync_to_async(_create_order)(table, user, notes, items, stations)
+        except inventory.OutOfStock as exc:
+            return JsonResponse({'error': str(exc)}, status=409)
+
+        return redirect('select_table')
+
+    return JsonResponse({'error': 'Método no permitido'}, status=405)
+
+
+def _posted_items(post, prefix=''):
+    """Order lines from ``<prefix>item_id_N``, ``<prefix>quantity_N`` and ``<prefix>notes_N`` form fields."""
+    items = []
+    for key in post:
+        if key.startswith(f'{prefix}item_id_'):
+            suffix = key[len(f'{prefix}item_id_'):]
+            try:
+                item_id = int(post.get(f'{prefix}item_id_{suffix}'))
+                quantity = int(post.get(f'{prefix}quantity_{suffix}', 1))
+                if quantity <= 0:
+                    continue
+                item_notes = post.get(f'{prefix}notes_{suffix}', '')
+                items.append({'id': item_id, 'quantity': quantity, 'notes': item_notes})
+            except (ValueError, TypeError):
+                continue
+    return items
+
+
+async def _price_items(branch_id, items):
+    """Set each line's current ``price``; returns the stations the lines go to."""
+    item_ids = {item['id'] for item in items}
+    menu_items = MenuItem.objects.for_branch(branch_id).filter(id__in=item_ids)
+    stations, prices = {}, {}
+    async for item_id, station, price in menu_items.values_list('id', 'station', 'price'):
+        stations[item_id], prices[item_id] = station, price
+    if len(stations) != len(item_ids):
+        raise Http404('Elemento del menú no encontrado')
+    for item in items:
+        item['price'] = prices[item['id']]
+    return {stations[item['id']] for item in items}
+
+
+@transaction.atomic
+def _create_order(table, user, notes, items, stations):
+    """Write an order, its items, tickets, the table state and the audit log in one transaction."""
+    inventory.consume_stock(items)
+    order = Order.objects.create(branch_id=table.branch_id, table=table, waiter=user, notes=notes)
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            menu_item_id=item['id'],
+            quantity=item['quantity'],
+            notes=item.get('notes', '')
+        )
+        for item in items
+    ])
+    printing.enqueue_order_tickets(order, stations)
+
+    # Mark table as occupied; a party ordering again keeps its seating time
+    seated = Table.objects.filter(id=table.id, is_available=True).update(
+        is_available=False, occupied_since=order.created_at,
+    )
+    if seated:
+        events.record('table_occupied', table.branch_id, table_id=table.id, table_number=table.number)
+    events.record(
+        'order_created', table.branch_id, order_id=order.id, table_id=table.id, created_at=order.created_at,
+        table_number=table.number, waiter=user.username, notes=notes,
+        total=str(sum(item['quantity'] * item['price'] for item in items)),
+        items=[
+            {'menu_item_id': item['id'], 'quantity': item['quantity'], 'notes': item.get('notes', '')}
+            for item in items
+        ],
+    )
+
+    # Log audit
+    AuditLog.objects.create(
+        user=user,
+        action='Crear pedido',
+        details=f'Pedido {order.id} para mesa {table.number}',
+        event='order_created', entity_type='order', entity_id=order.id,
+    )
+    queue_state.bump_kitchen_version(table.branch_id)
+    transaction.on_commit(metrics.order_created)
+    transaction.on_commit(partial(seating.table_occupied, table.branch_id, table.id, order.created_at))
+    return order
+
+
+class AmendmentRejected(Exception):
+    """An amendment the order cannot take as it stands."""
+
+
+def open_order(table):
+    """
+    The order the party now at ``table`` can still amend, or ``None``.
+
+    That is its latest undelivered order placed since the table was last
+    occupied; orders of earlier parties stay closed.
+    """
+    if table.is_available or table.occupied_since is None:
+        return None
+    return Order.objects.filter(table=table, created_at__gte=table.occupied_since)\
+                        .exclude(status='delivered')\
+                        .order_by('-created_at')\
+                        .first()
+
+
+@login_required
+@throttle('send_order')
+async def amend_order(request, order_id):
+    """
+    Add items to or void items of an open order as a new round.
+
+    Takes the same item fields as ``send_order`` plus ``void_item_id_N`` /
+    ``void_quantity_N`` for portions to cancel. The kitchen gets a ticket
+    with only this round's lines instead of a second whole order.
+    """
+    role, branch_id = await aprofile(request)
+    if role not in ['garzon', 'admin']:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+
+    if request.method == 'POST':
+        additions = _posted_items(request.POST)
+        voids = _posted_items(request.POST, prefix='void_')
+        if not additions and not voids:
+            return JsonResponse({'error': 'No hay ítems en el pedido'}, status=400)
+
+        stations = await _price_items(branch_id, additions + voids)
+        user = await request.auser()
+        try:
+            await sync_to_async(_amend_order)(branch_id, order_id, user, additions, voids, stations)
+        except (AmendmentRejected, inventory.OutOfStock) as exc:
+            return JsonResponse({'error': str(exc)}, status=409)
+
+        return redirect('select_table')
+
+    return JsonResponse({'error': 'Método no permitido'}, status=405)
+
+
+@transaction.atomic
+def _amend_order(branch_id, order_id, user, additions, voids, stations):
+    """
+    Append one round of added and voided lines to an order in one transaction.
+
+    Voids are stored as negative lines and cannot exceed what the order
+    still has of an item. Their stock is not returned, since the portions
+    may already be cooked. New items send a finished order back to the
+    kitchen queue.
+    """
+    order = Order.objects.for_branch(branch_id).select_for_update().filter(id=order_id).first()
+    if order is None:
+        raise Http404('Pedido no encontrado')
+    table = Table.objects.get(id=order.table_id)
+    if open_order(table) != order:
+        raise AmendmentRejected('El pedido ya está cerrado')
+
+    if voids:
+        voided = defaultdict(int)
+        for item in voids:
+            voided[item['id']] += item['quantity']
+        left = dict(
+            OrderItem.objects.filter(order=order, menu_item_id__in=voided)
+                             .values_list('menu_item_id')
+                             .annotate(quantity=Sum('quantity'))
+        )
+        if any(quantity > left.get(item_id, 0) for item_id, quantity in voided.items()):
+            raise AmendmentRejected('No se puede anular más de lo pedido')
+    inventory.consume_stock(additions)
+
+    previous_status, entered_at = order.status, order.status_changed_at or order.created_at
+    order.round += 1
+    if additions and order.status == 'ready':
+        order.status, order.status_changed_at = 'not_taken', timezone.now()
+    order.save(update_fields=['round', 'status', 'status_changed_at'])
+    lines = additions + [{**item, 'quantity': -item['quantity'], 'notes': ''} for item in voids]
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, menu_item_id=item['id'], quantity=item['quantity'],
+                  notes=item.get('notes', ''), round=order.round)
+        for item in lines
+    ])
+    printing.enqueue_order_tickets(order, stations, round=order.round)
+
+    # The new order total too, so replaying the event onto a later state is harmless
+    order_total = OrderItem.objects.filter(order=order)\
+                                   .aggregate(total=Sum(F('quantity') * F('menu_item__price')))['total']
+    events.record(
+        'order_amended', branch_id, order_id=order.id, table_id=table.id,
+        round=order.round, status=order.status, previous_status=previous_status,
+        total=str(sum(item['quantity'] * item['price'] for item in lines)), order_total=str(order_total),
+        items=[
+            {'menu_item_id': item['id'], 'quantity': item['quantity'], 'notes': item.get('notes', '')}
+            for item in lines
+        ],
+    )
+
+    # Log audit
+    AuditLog.objects.create(
+        user=user,
+        action='Modificar pedido',
+        details=f'Pedido {order.id} ronda {order.round} para mesa {table.number}',
+        event='order_amended', entity_type='order', entity_id=order.id,
+    )
+    queue_state.bump_kitchen_version(branch_id)
+    transaction.on_commit(metrics.order_amended)
+    if order.status != previous_status:
+        seconds = (order.status_changed_at - entered_at).total_seconds()
+        transaction.on_commit(partial(metrics.order_status_changed, previous_status, order.status, seconds))
+    return order
+
+
+@login_required
+@throttle('table')
+async def toggle_table_availability(request, table_id):
+    """
+    Toggle table availability status.
+
+    Allows waiters and admins to mark tables as available or occupied.
+    """
+    role, branch_id = await aprofile(request)
+    if role not in ['garzon', 'admin']:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+
+    if request.method == 'POST':
+        table = await sync_to_async(_toggle_table)(branch_id, table_id, await request.auser())
+        if table.is_available:
+            await seating.atable_freed(branch_id, table.id)
+        else:
+            await seating.atable_occupied(branch_id, table.id, table.occupied_since)
+        return JsonResponse({'success': True, 'is_available': table.is_available})
+
+    return JsonResponse({'error': 'Método no permitido'}, status=405)
+
+
+@transaction.atomic
+def _toggle_table(branch_id, table_id, user):
+    """Flip a table's availability, closing its stay when freed, with audit log and event."""
+    # Flip the flag in the database so concurrent toggles cannot be lost
+    tables = Table.objects.for_branch(branch_id).filter(id=table_id)
+    now = timezone.now()
+    updated = tables.update(
+        is_available=Case(When(is_available=True, then=Value(False)), default=Value(True)),
+        occupied_since=Case(When(is_available=True, then=Value(now)), default=F('occupied_since')),
+    )
+    if not updated:
+        raise Http404('Mesa no encontrada')
+    table = tables.get()
+
+    if table.is_available:
+        if table.occupied_since:
+            TableSession.objects.create(
+                branch_id=branch_id, table=table, capacity=table.capacity,
+                started_at=table.occupied_since, ended_at=now,
+            )
+        tables.update(occupied_since=None)
+        events.record('table_freed', branch_id, table_id=table.id, table_number=table.number)
+    else:
+        events.record('table_occupied', branch_id, table_id=table.id, table_number=table.number)
+
+    # Log audit
+    status_text = 'disponible' if table.is_available else 'ocupada'
+    AuditLog.objects.create(
+        user=user,
+        action=f'Marcar mesa como {status_text}',
+        details=f'Mesa {table.number} marcada como {status_text}',
+        event='table_freed' if table.is_available else 'table_occupied', entity_type='table', entity_id=table.id,
+    )
+    return table
@@ -3,6 +3,16 @@ ASGI config for restaurante_abba project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Kitchen and order endpoints are native async views, so one ASGI worker can
+hold hundreds of idle kitchen long-poll connections. To run locally:
+
+    uvicorn restaurante_abba.asgi:application --host 127.0.0.1 --port 8000
+
+In production, gunicorn manages uvicorn workers (from the uvicorn-worker
+package; uvicorn's own ``uvicorn.workers`` is deprecated):
+
+    gunicorn restaurante_abba.asgi:application -k uvicorn_worker.UvicornWorker -w 2
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,91 @@
+"""
+Database tuning profiles for restaurante_abba.
+
+The active profile is selected with the ``DB_PROFILE`` environment variable:
+
+- ``development`` (default): the plain ``dj_database_url`` configuration.
+- ``production``: engine-specific tuning for concurrent waiters and kitchen
+  writers. On SQLite it enables WAL mode, a busy timeout, synchronous=NORMAL
+  and memory-mapped I/O on every new connection. On PostgreSQL it enables
+  Django's native connection pool (when psycopg 3 is installed), connection
+  health checks and server-side cursors for ``.iterator()`` exports.
+"""
+
+import os
+from pathlib import Path
+
+# SQLite busy timeout, in seconds. Writers wait this long for the lock
+# instead of failing immediately with "database is locked".
+SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 20))
+
+# Size of the memory-mapped region SQLite may use for reads (256 MB).
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}',
+)
+
+POSTGRES_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 2))
+POSTGRES_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+
+
+def _psycopg_pool_available():
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def sqlite_production(config):
+    """Apply WAL/pragma tuning to a SQLite database configuration."""
+    options = config.setdefault('OPTIONS', {})
+    # The sqlite3 ``timeout`` parameter sets the connection's busy_timeout.
+    options['timeout'] = SQLITE_BUSY_TIMEOUT
+    # Take the write lock at BEGIN so concurrent writers queue on the busy
+    # timeout instead of failing when upgrading a read lock mid-transaction.
+    options['transaction_mode'] = 'IMMEDIATE'
+    options['init_command'] = ';'.join(SQLITE_PRAGMAS)
+    # The default in-memory test database is a shared cache that rejects
+    # concurrent writers outright; test against a file so they queue too.
+    name = Path(config['NAME'])
+    config.setdefault('TEST', {}).setdefault('NAME', str(name.with_name(f'test_{name.name}')))
+    return config
+
+
+def postgresql_production(config):
+    """Apply pooling and health-check tuning to a PostgreSQL configuration."""
+    options = config.setdefault('OPTIONS', {})
+    config['CONN_HEALTH_CHECKS'] = True
+    # Server-side cursors keep .iterator() exports at bounded memory. They
+    # must be disabled when running behind pgbouncer in transaction mode.
+    config['DISABLE_SERVER_SIDE_CURSORS'] = (
+        os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS', '') == '1'
+    )
+    if _psycopg_pool_available():
+        # Django's pool replaces persistent connections.
+        config['CONN_MAX_AGE'] = 0
+        options['pool'] = {
+            'min_size': POSTGRES_POOL_MIN_SIZE,
+            'max_size': POSTGRES_POOL_MAX_SIZE,
+            'timeout': 10,
+        }
+    return config
+
+
+def apply_profile(config, profile):
+    """
+    Return ``config`` tuned for ``profile``.
+
+    Unknown profiles and engines are returned unchanged.
+    """
+    if profile != 'production':
+        return config
+    engine = config.get('ENGINE', '')
+    if engine.endswith('sqlite3'):
+        return sqlite_production(config)
+    if engine.endswith('postgresql'):
+        return postgresql_production(config)
+    return config
@@ -0,0 +1,26 @@
+"""
+Test runner for restaurante_abba.
+
+SQLite test databases are created as files with the ``production``
+profile's tuning in every profile. The default in-memory test database
+rejects concurrent writers outright, so without this the stock
+concurrency tests could only run with ``DB_PROFILE=production``.
+"""
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+from .db_profiles import sqlite_production
+
+
+class TestRunner(DiscoverRunner):
+    def setup_databases(self, **kwargs):
+        for connection in connections.all():
+            settings_dict = connection.settings_dict
+            if settings_dict['ENGINE'].endswith('sqlite3') and not settings_dict['TEST'].get('MIRROR'):
+                # Django fills in TEST NAME as None, which setdefault would keep
+                if not settings_dict['TEST'].get('NAME'):
+                    del settings_dict['TEST']['NAME']
+                sqlite_production(settings_dict)
+                connection.close()
+        return super().setup_databases(**kwargs)
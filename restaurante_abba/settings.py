@@ -13,6 +13,8 @@ import os
 import dj_database_url
 from pathlib import Path
 
+from .db_profiles import apply_profile
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,7 +50,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'restaurant.metrics.MetricsMiddleware',
+    'restaurant.middleware.JsonCompressionMiddleware',
+    'restaurant.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -92,6 +96,87 @@ DATABASES = {
     )
 }
 
+# Perfil de base de datos: 'development' (por defecto) o 'production'.
+# Ver restaurante_abba/db_profiles.py
+DB_PROFILE = os.environ.get('DB_PROFILE', 'development')
+DATABASES['default'] = apply_profile(DATABASES['default'], DB_PROFILE)
+
+# Las bases SQLite de pruebas usan un archivo con el ajuste de 'production'
+# para que las pruebas de concurrencia corran con cualquier perfil.
+# Ver restaurante_abba/runner.py
+TEST_RUNNER = 'restaurante_abba.runner.TestRunner'
+
+# Réplica de solo lectura para consultas de reportes (opcional).
+# Ver restaurant/routers.py
+REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+# Segundos que un cliente lee del primario después de escribir
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+if REPLICA_DATABASE_URL:
+    DATABASES['replica'] = apply_profile(
+        dj_database_url.parse(REPLICA_DATABASE_URL, conn_max_age=600),
+        DB_PROFILE
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['restaurant.routers.PrimaryReplicaRouter']
+    MIDDLEWARE.append('restaurant.routers.ReplicaPinningMiddleware')
+
+# Días tras los cuales los pedidos entregados pasan al archivo
+# (python manage.py archive_orders). Ver restaurant/archive.py
+ORDER_ARCHIVE_AFTER_DAYS = int(os.environ.get('ORDER_ARCHIVE_AFTER_DAYS', 90))
+
+# Carpeta donde el cierre del día guarda los reportes Excel ya generados
+# (python manage.py close_day). Ver restaurant/closing.py
+DAY_CLOSE_DIR = os.environ.get('DAY_CLOSE_DIR', os.path.join(BASE_DIR, 'cierres'))
+
+# Impresoras de tickets por estación (python manage.py print_worker).
+# URLs tcp://host:9100 para impresoras de red o file:///ruta para un archivo.
+# Ver restaurant/printing.py
+PRINT_SINKS = {
+    'cocina': os.environ.get('PRINT_SINK_COCINA', f"file://{BASE_DIR / 'tickets_cocina.txt'}"),
+    'bar': os.environ.get('PRINT_SINK_BAR', f"file://{BASE_DIR / 'tickets_bar.txt'}"),
+}
+# 'escpos' para impresoras térmicas, 'text' para texto plano
+PRINT_FORMAT = os.environ.get('PRINT_FORMAT', 'text')
+
+# Sesiones y usuarios para tablets que consultan constantemente:
+# 'db' (por defecto), 'cached_db' o 'signed_cookies'. Los dos últimos cargan
+# además el usuario y su perfil desde la caché. Requieren una caché
+# compartida con más de un worker. Ver restaurant/auth.py
+SESSION_PROFILE = os.environ.get('SESSION_PROFILE', 'db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_PROFILE]
+if SESSION_PROFILE != 'db':
+    # ModelBackend sigue en la lista para las sesiones iniciadas antes del cambio
+    AUTHENTICATION_BACKENDS = [
+        'restaurant.auth.CachedModelBackend',
+        'django.contrib.auth.backends.ModelBackend',
+    ]
+
+# Límite por usuario y dispositivo de las vistas de tablets:
+# alcance -> (ráfaga de solicitudes, solicitudes por segundo).
+# Un alcance ausente no se limita. Ver restaurant/throttling.py
+THROTTLE_RATES = {
+    'poll': (30, 1),
+    'order_status': (20, 1),
+    'send_order': (10, 0.5),
+    'table': (20, 1),
+}
+
+# Destinos del registro de eventos de pedidos (python manage.py event_relay):
+# file:///ruta.jsonl, http(s)://webhook o bus://canal. Ver restaurant/events.py
+EVENT_SINKS = {
+    'archivo': os.environ.get('EVENT_SINK_FILE', f"file://{BASE_DIR / 'order_events.jsonl'}"),
+}
+if os.environ.get('EVENT_SINK_WEBHOOK'):
+    EVENT_SINKS['webhook'] = os.environ['EVENT_SINK_WEBHOOK']
+
+# Token opcional requerido por /metrics (cabecera Authorization: Bearer <token>)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 